@@ -11,6 +11,12 @@ except ImportError:
     from config import Config
 
 from app.models import db
+from app.database import init_engines, read_engine, read_only_database
+from app.event_store import init_generation, get_event_store
+from app.search import init_search_index, share_search_backend
+from app.importer import init_import_columns
+from app.timing import init_timing
+from app.metrics import init_metrics
 
 def create_app():
     # Get the root directory (parent of app/)
@@ -25,10 +31,23 @@ def create_app():
     
     # Initialize database
     db.init_app(app)
+    init_timing(app)
     
     # Create tables if they don't exist
     with app.app_context():
+        init_engines(db)
+        init_metrics(app, db)
         db.create_all()
+        init_import_columns(db.session)
+        init_generation(db.session)
+        init_search_index(db.session)
+        # A replica has the primary's schema, including its search index
+        share_search_backend(read_engine(db), db.engine)
+        if app.config.get('EVENT_SNAPSHOT_DIR'):
+            # Warm the event store at startup, from the snapshot when it is current
+            # (read the way the read-only endpoints will)
+            with read_only_database():
+                get_event_store(db.session)
     
     # Register blueprints
     from app.routes import bp
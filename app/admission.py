@@ -0,0 +1,150 @@
+"""
+Admission Module
+
+Admission control for expensive renders. At most RENDER_MAX_ACTIVE renders
+run at once and at most RENDER_QUEUE_SIZE wait for a slot; anything beyond
+that is shed at once (HTTP 503 with Retry-After) instead of piling up behind
+renders its client may no longer want.
+
+A client that identifies itself (X-Client-Id) has at most one queued render:
+a newer request from the same client supersedes its queued older one, which
+is answered with 409 so panning doesn't fill the queue with stale viewports.
+
+Cache hits and requests joining a render already in flight never queue.
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+
+class RenderOverloaded(Exception):
+    """The render queue is full, or the wait for a slot timed out (HTTP 503)"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RenderSuperseded(Exception):
+    """A newer request from the same client replaced this queued one (HTTP 409)"""
+
+    def __init__(self, message, client_id=None):
+        super().__init__(message)
+        self.client_id = client_id
+
+
+class _Ticket:
+    __slots__ = ('client_id', 'superseded')
+
+    def __init__(self, client_id):
+        self.client_id = client_id
+        self.superseded = False
+
+
+class RenderAdmission:
+    """Bounded render slots with a FIFO wait queue and per-client supersession"""
+
+    def __init__(self, max_active=4, max_queued=16, queue_timeout=30.0, retry_after=2):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queue = deque()
+        self._queued_by_client = {}
+        self.shed = 0
+        self.superseded = 0
+
+    def _overloaded(self, message):
+        self.shed += 1
+        return RenderOverloaded(message, self.retry_after)
+
+    def _dequeue(self, ticket):
+        self._queue.remove(ticket)
+        if self._queued_by_client.get(ticket.client_id) is ticket:
+            del self._queued_by_client[ticket.client_id]
+
+    def acquire(self, client_id=None):
+        """
+        Wait for a render slot.
+
+        Raises:
+            RenderOverloaded: If the queue is full or no slot freed up in time
+            RenderSuperseded: If the same client queued a newer request meanwhile
+        """
+        with self._cond:
+            if self._active < self.max_active and not self._queue:
+                self._active += 1
+                return
+
+            if client_id is not None:
+                older = self._queued_by_client.get(client_id)
+                if older is not None:
+                    older.superseded = True
+                    self._dequeue(older)
+                    self._cond.notify_all()
+            if len(self._queue) >= self.max_queued:
+                raise self._overloaded('Timeline render queue is full')
+
+            ticket = _Ticket(client_id)
+            self._queue.append(ticket)
+            if client_id is not None:
+                self._queued_by_client[client_id] = ticket
+
+            deadline = time.monotonic() + self.queue_timeout
+            while True:
+                if ticket.superseded:
+                    self.superseded += 1
+                    raise RenderSuperseded('Superseded by a newer request from the same client', client_id)
+                if self._queue[0] is ticket and self._active < self.max_active:
+                    self._dequeue(ticket)
+                    self._active += 1
+                    # The next ticket may fit in a slot too
+                    self._cond.notify_all()
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._dequeue(ticket)
+                    self._cond.notify_all()
+                    raise self._overloaded('Timed out waiting for a timeline render slot')
+                self._cond.wait(timeout=remaining)
+
+    def release(self):
+        """Give a slot back"""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, client_id=None):
+        """Hold a render slot for the block (see acquire())"""
+        self.acquire(client_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {'active': self._active, 'queued': len(self._queue),
+                    'shed': self.shed, 'superseded': self.superseded}
+
+
+render_admission = RenderAdmission(
+    max_active=getattr(Config, 'RENDER_MAX_ACTIVE', 4),
+    max_queued=getattr(Config, 'RENDER_QUEUE_SIZE', 16),
+    queue_timeout=getattr(Config, 'RENDER_QUEUE_TIMEOUT', 30),
+    retry_after=getattr(Config, 'RENDER_RETRY_AFTER', 2),
+)
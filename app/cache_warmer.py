@@ -0,0 +1,142 @@
+"""
+Cache Warmer Module
+
+Renders common viewports into the /api/timeline response cache and the
+/api/geo-clusters cache in the background, so the first user after a deploy
+or a data change doesn't pay for a full render of the default view.
+
+A warmer thread (started by run.py, once per server process) warms at
+startup and whenever the data generation changes: the configured
+CACHE_WARM_VIEWPORTS first, then the CACHE_WARM_TOP_N viewports requested
+most often recently in this process. Renders go through the same
+single-flight cache as requests, so a request for a viewport being warmed
+waits for that render instead of starting another.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+from app.database import read_only_database
+from app.event_store import current_generation, get_event_store
+from app.geo_clusters import cached_geo_clusters
+from app.models import db
+from app.render_pool import cached_timeline_figure
+from app.timeline import TimelineGenerator
+
+# Request defaults of the frontend (clusters on, spans off) and of /api/geo-clusters
+DEFAULT_RENDER_OPTIONS = (True, False)
+DEFAULT_GEO_CLUSTER_ZOOM = 2
+
+
+class ViewportLog:
+    """Bounded log of recently requested timeline viewports"""
+
+    def __init__(self, max_entries=1000):
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def record(self, start_year, end_year, enable_clustering=True, enable_spans=False):
+        with self._lock:
+            self._entries.append((start_year, end_year, enable_clustering, enable_spans))
+
+    def top(self, n):
+        """The n most requested viewports, most requested first"""
+        if n <= 0:
+            return []
+        with self._lock:
+            counts = Counter(self._entries)
+        return [viewport for viewport, _ in counts.most_common(n)]
+
+
+viewport_log = ViewportLog(max_entries=getattr(Config, 'CACHE_WARM_LOG_SIZE', 1000))
+
+
+def parse_viewports(value):
+    """
+    Parse 'start:end,start:end,...' into (start_year, end_year, clustering,
+    spans) tuples with the frontend's default render options.
+
+    Raises:
+        ValueError: If an entry is not two integers separated by ':'
+    """
+    viewports = []
+    for entry in (value or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        start, sep, end = entry.partition(':')
+        if not sep:
+            raise ValueError(f'Viewport "{entry}" must be start_year:end_year')
+        viewports.append((int(start), int(end)) + DEFAULT_RENDER_OPTIONS)
+    return viewports
+
+
+def warm_viewports():
+    """Configured viewports followed by the most requested ones, without duplicates"""
+    configured = parse_viewports(getattr(Config, 'CACHE_WARM_VIEWPORTS', ''))
+    recent = viewport_log.top(getattr(Config, 'CACHE_WARM_TOP_N', 5))
+    return list(dict.fromkeys(configured + recent))
+
+
+def warm_caches(app, viewports=None):
+    """
+    Render viewports into the timeline and geo-cluster caches (already
+    cached ones cost a lookup).
+
+    Returns:
+        Number of viewports warmed
+    """
+    viewports = warm_viewports() if viewports is None else viewports
+    warmed = 0
+    with app.app_context(), read_only_database():
+        for start_year, end_year, enable_clustering, enable_spans in viewports:
+            try:
+                # render_timeline() narrows the generator's frame, so each viewport gets its own
+                generator = TimelineGenerator(db.session)
+                cached_timeline_figure(generator, start_year, end_year,
+                                       enable_clustering=enable_clustering, enable_spans=enable_spans)
+                cached_geo_clusters(get_event_store(db.session), start_year, end_year, DEFAULT_GEO_CLUSTER_ZOOM)
+                warmed += 1
+            except Exception as e:
+                print(f"Cache warmer: could not render {start_year} to {end_year}: {e}")
+    return warmed
+
+
+def _run_warmer(app, interval):
+    warmed_generation = None
+    while True:
+        try:
+            with app.app_context(), read_only_database():
+                generation = current_generation(db.session)
+            if generation != warmed_generation:
+                warm_caches(app)
+                warmed_generation = generation
+        except Exception as e:
+            print(f"Cache warmer: {e}")
+        time.sleep(interval)
+
+
+def start_cache_warmer(app):
+    """
+    Start the warmer thread for this process if CACHE_WARMER_ENABLED.
+
+    Call it once per server process after the app is created (not in a
+    process that forks workers afterwards, such as gunicorn --preload, nor
+    in the Werkzeug reloader's watcher process).
+    """
+    if not getattr(Config, 'CACHE_WARMER_ENABLED', False):
+        return None
+    interval = getattr(Config, 'CACHE_WARM_INTERVAL', 10)
+    thread = threading.Thread(target=_run_warmer, args=(app, interval), name='cache-warmer', daemon=True)
+    thread.start()
+    return thread
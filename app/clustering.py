@@ -142,15 +142,18 @@ def cluster_events(df, start_year, end_year, tier, enable_clustering=True):
             # Representative point for cluster (center of bucket)
             cluster_year = bucket_start + (bucket_size / 2)
             
-            # Store cluster info
+            # Store cluster info (members carry the compact geometry encoding when available)
+            members = group
+            if 'geometry_compact' in group.columns:
+                members = group.drop(columns=['geometry']).rename(columns={'geometry_compact': 'geometry'})
             cluster_info[cluster_id] = {
                 'bucket_start': bucket_start,
                 'bucket_end': bucket_end,
                 'category': category,
                 'continent': continent,
                 'event_count': len(group),
-                'events': group[['id', 'title', 'start_year', 'end_year', 'category', 'continent', 
-                                'lat', 'lon', 'location_label', 'geometry', 'location_confidence']].to_dict('records')
+                'events': members[['id', 'title', 'start_year', 'end_year', 'category', 'continent', 
+                                  'lat', 'lon', 'location_label', 'geometry', 'location_confidence']].to_dict('records')
             }
             
             # Create cluster marker row
@@ -0,0 +1,95 @@
+"""
+Database Module
+
+Engine setup shared by the app and background jobs:
+
+- SQLite connections are switched to WAL mode with tuned pragmas, so readers
+  keep going while an import writes (and a writer waits for a lock instead of
+  failing at once).
+- Read-only endpoints can be routed to a separate read engine (a replica, or
+  a second pool on the same database) with READ_DATABASE_URL. Views marked
+  @read_only run every statement of the request on that engine; writes,
+  background jobs and unmarked views use the primary.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+READ_BIND = 'read'
+
+
+def _use_read_engine():
+    return has_app_context() and g.get('read_only_database', False)
+
+
+class RoutingSession(Session):
+    """Session that sends statements to the read engine inside read_only_database()"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _use_read_engine():
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def read_only_database():
+    """Run the block's database reads on the read engine (the primary if none is configured)"""
+    previous = g.get('read_only_database', False)
+    g.read_only_database = True
+    try:
+        yield
+    finally:
+        g.read_only_database = previous
+
+
+def read_only(view):
+    """Decorator routing a view's queries to the read engine"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with read_only_database():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        if getattr(Config, 'SQLITE_WAL', True):
+            # Persistent on the file; needs write access the first time
+            try:
+                cursor.execute('PRAGMA journal_mode=WAL')
+                cursor.execute('PRAGMA synchronous=NORMAL')
+            except Exception as e:
+                print(f"Could not enable SQLite WAL mode: {e}")
+        cursor.execute(f"PRAGMA busy_timeout={int(getattr(Config, 'SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+        # Negative cache_size is in KiB
+        cursor.execute(f"PRAGMA cache_size=-{int(getattr(Config, 'SQLITE_CACHE_SIZE_KB', 65536))}")
+        cursor.execute('PRAGMA temp_store=MEMORY')
+    finally:
+        cursor.close()
+
+
+def init_engines(db):
+    """Install connection setup on the app's engines (call in an app context, before first use)"""
+    for engine in db.engines.values():
+        if engine.dialect.name == 'sqlite' and not event.contains(engine, 'connect', _set_sqlite_pragmas):
+            event.listen(engine, 'connect', _set_sqlite_pragmas)
+
+
+def read_engine(db):
+    """The engine read-only views use"""
+    return db.engines.get(READ_BIND, db.engine)
@@ -0,0 +1,264 @@
+"""
+Event Store Module
+
+Keeps the prepared timeline DataFrame in memory between requests, together with
+the indexes derived from it. The store is tagged with the data generation kept
+in the database (see DataGeneration): every write bumps the generation, so each
+worker reloads on its next request after a change, whichever process made it.
+"""
+import os
+import sys
+import threading
+from datetime import datetime
+import pandas as pd
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+from sqlalchemy import select
+from app.models import db, TimelineEvent, DataGeneration
+from app.spatial_index import SpatiotemporalIndex, DEFAULT_CELL_DEGREES
+from app.geometry import GeometryIndex, compact_geometry, DEFAULT_SIMPLIFY_TOLERANCE, DEFAULT_PAYLOAD_ZOOM
+from app.snapshot import snapshot_dir, snapshot_key, load_snapshot, write_snapshot_in_background
+
+EVENT_COLUMNS = ['id', 'title', 'category', 'continent', 'start_year', 'end_year', 'description', 'start_date', 'end_date']
+
+# Columns loaded into the event store (the fields of TimelineEvent.to_dict())
+LOAD_COLUMNS = EVENT_COLUMNS + ['lat', 'lon', 'location_label', 'geometry', 'location_confidence']
+
+# Rows fetched per DBAPI round trip when loading the store
+LOAD_FETCH_SIZE = 10000
+
+
+def current_generation(session):
+    """Read the data generation from the database (0 if never written)"""
+    generation = session.query(DataGeneration.generation).filter_by(id=1).scalar()
+    return int(generation) if generation is not None else 0
+
+
+def init_generation(session):
+    """Create the generation row if it does not exist yet"""
+    if session.query(DataGeneration.id).filter_by(id=1).scalar() is None:
+        try:
+            session.add(DataGeneration(id=1, generation=0))
+            session.commit()
+        except Exception:
+            # Another worker created it first
+            session.rollback()
+
+
+def bump_generation(session):
+    """
+    Increment the data generation as part of the caller's transaction.
+
+    Call before committing any write to timeline_events so other workers
+    notice the change.
+    """
+    updated = session.query(DataGeneration).filter_by(id=1).update(
+        {
+            DataGeneration.generation: DataGeneration.generation + 1,
+            DataGeneration.updated_at: datetime.utcnow(),
+        },
+        synchronize_session=False
+    )
+    if not updated:
+        session.add(DataGeneration(id=1, generation=1))
+
+
+def load_events_frame(session):
+    """
+    Load all events from the database into a raw DataFrame.
+
+    Reads just the event columns through a DBAPI cursor in fetchmany batches
+    and builds the frame column by column, without creating an ORM object
+    (and calling to_dict()) per row. Dates arrive as the driver returns them
+    (ISO strings on SQLite) and are parsed by prepare_events_frame.
+    """
+    table = TimelineEvent.__table__
+    sql = str(select(*[table.c[column] for column in LOAD_COLUMNS]).compile(dialect=session.get_bind().dialect))
+    columns = [[] for _ in LOAD_COLUMNS]
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(LOAD_FETCH_SIZE)
+            if not rows:
+                break
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(values)
+    finally:
+        cursor.close()
+    if not columns[0]:
+        return pd.DataFrame()
+
+    return pd.DataFrame(dict(zip(LOAD_COLUMNS, columns)))
+
+
+def prepare_events_frame(df):
+    """
+    Normalize a raw events DataFrame for plotting and filtering.
+
+    Coerces year columns to numbers, adds the 'year' plotting column, parses
+    dates (invalid or out-of-range => NaT), encodes compact geometries and
+    orders categories.
+    """
+    if df.empty:
+        # Return empty dataframe with expected columns
+        df = pd.DataFrame(columns=EVENT_COLUMNS)
+
+    # Ensure year columns exist and are numeric
+    if not df.empty:
+        if 'start_year' in df.columns:
+            df["start_year"] = pd.to_numeric(df["start_year"], errors='coerce')
+        else:
+            df["start_year"] = None
+
+        if 'end_year' in df.columns:
+            df["end_year"] = pd.to_numeric(df["end_year"], errors='coerce')
+        else:
+            df["end_year"] = None
+
+        # Convenience column for numeric plotting
+        df["year"] = df["start_year"]
+    else:
+        # Empty dataframe - set default columns
+        df["start_year"] = None
+        df["end_year"] = None
+        df["year"] = None
+
+    # Parse dates where possible; out-of-range or invalid => NaT
+    if "start_date" in df.columns:
+        df["start_date"] = pd.to_datetime(df["start_date"], errors="coerce")
+    else:
+        df["start_date"] = pd.NaT
+
+    if "end_date" in df.columns:
+        df["end_date"] = pd.to_datetime(df["end_date"], errors="coerce")
+    else:
+        df["end_date"] = pd.NaT
+
+    # Compact geometry for API payloads, encoded once per load
+    if "geometry" in df.columns:
+        payload_zoom = getattr(Config, 'GEOMETRY_PAYLOAD_ZOOM', DEFAULT_PAYLOAD_ZOOM)
+        df["geometry_compact"] = [
+            compact_geometry(value, payload_zoom) if isinstance(value, str) and value.strip() else None
+            for value in df["geometry"].tolist()
+        ]
+
+    # Category order - include all categories found in data, not just predefined ones
+    if "category" in df.columns and not df.empty:
+        try:
+            # Get all unique categories from the data
+            data_categories = df["category"].dropna().unique().tolist()
+            # Combine with predefined order, keeping order but adding any missing categories
+            category_order = getattr(Config, 'CATEGORY_ORDER', ["era", "migration", "civilization", "empire", "war", "religion", "biblical"])
+            all_categories = [cat for cat in category_order if cat in data_categories]
+            # Add any categories in data that aren't in the predefined order
+            for cat in data_categories:
+                if cat not in all_categories:
+                    all_categories.append(cat)
+            # Set as categorical with all categories
+            df["category"] = pd.Categorical(df["category"], categories=all_categories, ordered=True)
+        except Exception as e:
+            print(f"Error setting category order: {e}")
+            # If categorical fails, just keep as string
+            pass
+
+    return df
+
+
+class EventStore:
+    """
+    Prepared events for one data generation, plus lazily built indexes.
+
+    The DataFrame is shared by all requests and must be treated as read-only;
+    filter with .copy() before modifying.
+    """
+
+    def __init__(self, df, generation):
+        self.df = df
+        self.generation = generation
+        self._spatial_index = None
+        self._geometry_index = None
+        self._geo_grids = {}
+        self._lock = threading.Lock()
+
+    @property
+    def spatial_index(self):
+        """Spatiotemporal index over self.df (built on first use)"""
+        if self._spatial_index is None:
+            with self._lock:
+                if self._spatial_index is None:
+                    cell_degrees = getattr(Config, 'SPATIAL_INDEX_CELL_DEGREES', DEFAULT_CELL_DEGREES)
+                    self._spatial_index = SpatiotemporalIndex(self.df, cell_degrees=cell_degrees)
+        return self._spatial_index
+
+    @property
+    def geometry_index(self):
+        """Parsed geometry bounds and simplified shapes for self.df (built on first use)"""
+        if self._geometry_index is None:
+            with self._lock:
+                if self._geometry_index is None:
+                    tolerance = getattr(Config, 'GEOMETRY_SIMPLIFY_TOLERANCE', DEFAULT_SIMPLIFY_TOLERANCE)
+                    self._geometry_index = GeometryIndex(self.df, tolerance=tolerance)
+        return self._geometry_index
+
+    def geo_grid(self, cell_degrees):
+        """Spatiotemporal grid at a given cell size, for geo clustering (built on first use)"""
+        grid = self._geo_grids.get(cell_degrees)
+        if grid is None:
+            with self._lock:
+                grid = self._geo_grids.get(cell_degrees)
+                if grid is None:
+                    grid = SpatiotemporalIndex(self.df, cell_degrees=cell_degrees)
+                    self._geo_grids[cell_degrees] = grid
+        return grid
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def load_store_frame(session, generation):
+    """
+    Prepared events DataFrame for a generation: from the on-disk snapshot if
+    one matches (see app/snapshot.py), else from the database, which then
+    writes the snapshot.
+    """
+    if not snapshot_dir():
+        return prepare_events_frame(load_events_frame(session))
+    key = snapshot_key(session, generation)
+    df = load_snapshot(key)
+    if df is None:
+        df = prepare_events_frame(load_events_frame(session))
+        write_snapshot_in_background(df, key)
+    return df
+
+
+def loaded_event_store():
+    """The store this process has loaded, or None (never loads or checks the generation)"""
+    return _store
+
+
+def get_event_store(session=None):
+    """
+    Return the event store for the current data generation, reloading it
+    (from the snapshot or the database) if another write happened since it
+    was built.
+    """
+    global _store
+    session = session or db.session
+    generation = current_generation(session)
+    store = _store
+    if store is not None and store.generation == generation:
+        return store
+
+    with _store_lock:
+        if _store is None or _store.generation != generation:
+            _store = EventStore(load_store_frame(session, generation), generation)
+        return _store
@@ -0,0 +1,260 @@
+"""
+Exporter Module
+
+Streams every timeline event out of the database at constant memory, for
+export_db_to_csv.py and the /api/export endpoint. Rows are read with a Core
+select in yield_per batches (a server-side cursor on PostgreSQL), never as
+ORM objects, and each batch is written out before the next is fetched.
+
+Formats:
+- csv: the import template columns (what init_db.py and /api/import-csv read)
+- parquet: one row group per batch
+- arrow: Arrow IPC, one record batch per batch (a stream over HTTP, a
+  Feather file on disk)
+
+Parquet and Arrow need pyarrow (in requirements.txt); CSV works without it.
+"""
+import csv
+import io
+import os
+import sys
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from sqlalchemy import select
+from app.models import TimelineEvent
+
+DEFAULT_BATCH_SIZE = 10000
+
+EXPORT_COLUMNS = ['id', 'title', 'category', 'continent', 'start_year', 'end_year', 'description',
+                  'start_date', 'end_date', 'lat', 'lon', 'location_label', 'geometry',
+                  'location_confidence']
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+class ExportFormatError(ValueError):
+    """Unknown export format, or one whose optional dependency is missing"""
+
+
+def check_format(export_format):
+    """Raise ExportFormatError unless export_format can be written here"""
+    if export_format not in EXPORT_FORMATS:
+        raise ExportFormatError(f'Unknown export format "{export_format}" (use csv, parquet or arrow)')
+    if export_format != 'csv' and pa is None:
+        raise ExportFormatError(f'{export_format} export needs pyarrow (pip install pyarrow)')
+
+
+def iter_event_batches(session, batch_size=None):
+    """
+    Yield lists of event rows (tuples in EXPORT_COLUMNS order), ordered by
+    start_year, fetching batch_size rows at a time.
+    """
+    batch_size = batch_size or getattr(Config, 'EXPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    columns = [getattr(TimelineEvent, column) for column in EXPORT_COLUMNS]
+    query = select(*columns).order_by(TimelineEvent.start_year, TimelineEvent.id)
+    result = session.execute(query.execution_options(yield_per=batch_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _csv_values(row):
+    """CSV cells for one row, formatted like the import template"""
+    (event_id, title, category, continent, start_year, end_year, description,
+     start_date, end_date, lat, lon, location_label, geometry, location_confidence) = row
+    return [
+        event_id,
+        title,
+        category,
+        continent or 'Global',
+        start_year,
+        end_year,
+        description or '',
+        start_date.isoformat() if start_date else '',
+        end_date.isoformat() if end_date else '',
+        lat if lat is not None else '',
+        lon if lon is not None else '',
+        location_label or '',
+        geometry or '',
+        location_confidence or 'exact',
+    ]
+
+
+def iter_csv(session, batch_size=None):
+    """Yield the CSV export as text chunks (header first, then one chunk per batch)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in iter_event_batches(session, batch_size):
+        writer.writerows(_csv_values(row) for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def arrow_schema():
+    """Arrow schema of exported events"""
+    return pa.schema([
+        ('id', pa.string()),
+        ('title', pa.string()),
+        ('category', pa.string()),
+        ('continent', pa.string()),
+        ('start_year', pa.int64()),
+        ('end_year', pa.int64()),
+        ('description', pa.string()),
+        ('start_date', pa.date32()),
+        ('end_date', pa.date32()),
+        ('lat', pa.float64()),
+        ('lon', pa.float64()),
+        ('location_label', pa.string()),
+        ('geometry', pa.string()),
+        ('location_confidence', pa.string()),
+    ])
+
+
+def _record_batch(rows, schema):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+class _ChunkSink:
+    """Write-only file object collecting bytes until drained, for streaming a writer's output"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _open_writer(export_format, sink, schema, stream=True):
+    if export_format == 'parquet':
+        return pq.ParquetWriter(sink, schema, compression='zstd')
+    if stream:
+        return pa.ipc.new_stream(sink, schema)
+    # Arrow IPC file (Feather v2), readable with pd.read_feather()
+    return pa.ipc.new_file(sink, schema)
+
+
+def iter_columnar(session, export_format, batch_size=None):
+    """
+    Yield a Parquet file or Arrow IPC stream as byte chunks, one row group
+    (or record batch) per database batch.
+    """
+    check_format(export_format)
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    writer = _open_writer(export_format, pa.PythonFile(sink, mode='w'), schema)
+    for batch in iter_event_batches(session, batch_size):
+        if export_format == 'parquet':
+            writer.write_table(pa.Table.from_batches([_record_batch(batch, schema)]))
+        else:
+            writer.write_batch(_record_batch(batch, schema))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def iter_export(session, export_format='csv', batch_size=None):
+    """Yield the export in the given format as str (csv) or bytes chunks"""
+    check_format(export_format)
+    if export_format == 'csv':
+        return iter_csv(session, batch_size)
+    return iter_columnar(session, export_format, batch_size)
+
+
+def export_events(session, path, export_format=None, batch_size=None):
+    """
+    Write every event to a file.
+
+    Args:
+        session: Database session
+        path: Output file
+        export_format: 'csv', 'parquet' or 'arrow' (default: from the file extension, else csv)
+        batch_size: Rows fetched and written at a time
+
+    Returns:
+        Number of events written
+    """
+    if export_format is None:
+        extension = os.path.splitext(path)[1].lower().lstrip('.')
+        export_format = {'parquet': 'parquet', 'arrow': 'arrow', 'arrows': 'arrow', 'feather': 'arrow'}.get(
+            extension, 'csv')
+    check_format(export_format)
+
+    count = 0
+    if export_format == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            for batch in iter_event_batches(session, batch_size):
+                writer.writerows(_csv_values(row) for row in batch)
+                count += len(batch)
+        return count
+
+    schema = arrow_schema()
+    with open(path, 'wb') as f:
+        writer = _open_writer(export_format, f, schema, stream=False)
+        for batch in iter_event_batches(session, batch_size):
+            record_batch = _record_batch(batch, schema)
+            if export_format == 'parquet':
+                writer.write_table(pa.Table.from_batches([record_batch]))
+            else:
+                writer.write_batch(record_batch)
+            count += len(batch)
+        writer.close()
+    return count
@@ -0,0 +1,92 @@
+"""
+Geo Clustering Module
+
+Grid-clustered event counts for the globe view. Each map zoom level maps to a
+grid cell size; the store keeps one spatiotemporal grid per requested level
+(per-cell interval lists and centroids), so a request only counts events per
+cell for its time window and never ships individual coordinates.
+"""
+import os
+import sys
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+from app.caching import LRUCache
+
+GEO_CLUSTER_BASE_DEGREES = 45.0  # Cell size at zoom 0; halves with every zoom level
+GEO_CLUSTER_MAX_ZOOM = 10
+
+geo_cluster_cache = LRUCache(max_entries=getattr(Config, 'GEO_CLUSTER_CACHE_SIZE', 256))
+
+
+def cell_degrees_for_zoom(zoom):
+    """Grid cell size in degrees for a map zoom level (clamped to 0-GEO_CLUSTER_MAX_ZOOM)"""
+    zoom = max(0, min(int(zoom), GEO_CLUSTER_MAX_ZOOM))
+    return GEO_CLUSTER_BASE_DEGREES / (2 ** zoom)
+
+
+def build_geo_clusters(store, start_year, end_year, zoom, region=None):
+    """
+    Count located events per grid cell for a time window.
+
+    Args:
+        store: EventStore for the current data generation
+        start_year: Start of time window
+        end_year: End of time window
+        zoom: Map zoom level (0 = whole world in a few cells)
+        region: Optional region (e.g. BBoxRegion of the visible map) limiting
+            which cells are returned
+
+    Returns:
+        dict with cell size, total count and a list of clusters
+        ({cell, count, lat, lon, bounds}) sorted by count descending
+    """
+    cell_degrees = cell_degrees_for_zoom(zoom)
+    grid = store.geo_grid(cell_degrees)
+
+    cell_ids = None
+    if region is not None:
+        cell_ids = grid.cells_for_bounds(*region.bounds())
+
+    counts = grid.cell_counts(start_year, end_year, cell_ids)
+    centroids = grid.cell_centroids()
+
+    clusters = []
+    for cell_id, count in counts.items():
+        lat, lon = centroids[cell_id]
+        clusters.append({
+            'cell': cell_id,
+            'count': count,
+            'lat': round(lat, 4),
+            'lon': round(lon, 4),
+            'bounds': list(grid.cell_bounds(cell_id)),
+        })
+    clusters.sort(key=lambda c: (-c['count'], c['cell']))
+
+    return {
+        'zoom': max(0, min(int(zoom), GEO_CLUSTER_MAX_ZOOM)),
+        'cell_degrees': cell_degrees,
+        'total': sum(counts.values()),
+        'clusters': clusters,
+    }
+
+
+def cached_geo_clusters(store, start_year, end_year, zoom, filter_bbox=None, region=None):
+    """
+    build_geo_clusters() response (with the time window), cached per data
+    generation, window, zoom and visible-area string (filter_bbox, parsed
+    into region by the caller).
+    """
+    cache_key = (store.generation, start_year, end_year, zoom, filter_bbox)
+    result = geo_cluster_cache.get(cache_key)
+    if result is None:
+        result = build_geo_clusters(store, start_year, end_year, zoom, region)
+        result.update({'start_year': start_year, 'end_year': end_year})
+        geo_cluster_cache.set(cache_key, result)
+    return result
@@ -0,0 +1,483 @@
+"""
+Geometry Module
+
+Parses the GeoJSON stored in TimelineEvent.geometry once per data generation
+into bounding boxes and simplified shapes, and provides the bbox/polygon
+regions used for geographic filtering. Region queries prune candidates by
+bounds first and only run exact intersection tests on the survivors.
+
+Coordinates follow GeoJSON order: [lon, lat] in degrees.
+"""
+import hashlib
+import json
+import math
+import numpy as np
+import pandas as pd
+
+DEFAULT_SIMPLIFY_TOLERANCE = 0.01  # degrees
+
+# Pre-simplified levels for compact geometry payloads:
+# (minimum map zoom, simplification tolerance in degrees, coordinate decimal places)
+GEOMETRY_LEVELS = (
+    (0, 0.1, 3),
+    (4, 0.01, 4),
+    (8, 0.001, 5),
+    (12, 0.0, 6),
+)
+DEFAULT_PAYLOAD_ZOOM = 4
+
+
+def simplify_line(coords, tolerance):
+    """
+    Douglas-Peucker simplification of a coordinate array.
+
+    Args:
+        coords: numpy array of shape (N, 2)
+        tolerance: Maximum deviation in degrees
+
+    Returns:
+        numpy array with a subset of the input points (endpoints kept)
+    """
+    n = len(coords)
+    if n <= 2 or tolerance <= 0:
+        return coords
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start = coords[first]
+        segment = coords[last] - start
+        points = coords[first + 1:last] - start
+        seg_len = math.hypot(segment[0], segment[1])
+        if seg_len == 0:
+            distances = np.hypot(points[:, 0], points[:, 1])
+        else:
+            distances = np.abs(segment[0] * points[:, 1] - segment[1] * points[:, 0]) / seg_len
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return coords[keep]
+
+
+def _simplify_ring(ring, tolerance):
+    simplified = simplify_line(ring, tolerance)
+    # A ring needs at least 3 distinct vertices plus the closing point
+    return simplified if len(simplified) >= 4 else ring
+
+
+def points_in_ring(xs, ys, ring):
+    """Ray-casting point-in-polygon test for arrays of points against one ring"""
+    inside = np.zeros(len(xs), dtype=bool)
+    x1 = ring[:-1, 0]
+    y1 = ring[:-1, 1]
+    x2 = ring[1:, 0]
+    y2 = ring[1:, 1]
+    for i in range(len(x1)):
+        crosses = (y1[i] > ys) != (y2[i] > ys)
+        if not crosses.any():
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_at = (x2[i] - x1[i]) * (ys - y1[i]) / (y2[i] - y1[i]) + x1[i]
+        inside ^= crosses & (xs < x_at)
+    return inside
+
+
+def points_in_polygon(xs, ys, polygon):
+    """Point-in-polygon test honoring holes (polygon = [outer, hole, ...])"""
+    inside = points_in_ring(xs, ys, polygon[0])
+    for hole in polygon[1:]:
+        inside &= ~points_in_ring(xs, ys, hole)
+    return inside
+
+
+def _edges(line):
+    return line[:-1], line[1:]
+
+
+def segments_intersect(line_a, line_b):
+    """True if any segment of polyline A crosses any segment of polyline B"""
+    if len(line_a) < 2 or len(line_b) < 2:
+        return False
+    a1, a2 = _edges(line_a)
+    b1, b2 = _edges(line_b)
+    p = a1[:, None, :]
+    r = (a2 - a1)[:, None, :]
+    q = b1[None, :, :]
+    s = (b2 - b1)[None, :, :]
+    denom = r[..., 0] * s[..., 1] - r[..., 1] * s[..., 0]
+    qp = q - p
+    t_num = qp[..., 0] * s[..., 1] - qp[..., 1] * s[..., 0]
+    u_num = qp[..., 0] * r[..., 1] - qp[..., 1] * r[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = t_num / denom
+        u = u_num / denom
+    proper = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    return bool(proper.any())
+
+
+class ParsedGeometry:
+    """
+    Parsed GeoJSON geometry: bounds plus simplified parts.
+
+    Attributes:
+        bounds: (min_lon, min_lat, max_lon, max_lat)
+        polygons: list of polygons, each a list of rings (numpy (N, 2) arrays)
+        lines: list of numpy (N, 2) arrays
+        points: numpy (N, 2) array
+    """
+
+    def __init__(self, polygons, lines, points):
+        self.polygons = polygons
+        self.lines = lines
+        self.points = points
+        coords = [ring for polygon in polygons for ring in polygon] + lines + [points]
+        stacked = np.vstack([c for c in coords if len(c)])
+        self.bounds = (
+            float(stacked[:, 0].min()), float(stacked[:, 1].min()),
+            float(stacked[:, 0].max()), float(stacked[:, 1].max()),
+        )
+
+    def simplified(self, tolerance):
+        """Copy with rings and lines simplified (bounds kept from the original)"""
+        copy = ParsedGeometry.__new__(ParsedGeometry)
+        copy.polygons = [[_simplify_ring(ring, tolerance) for ring in polygon] for polygon in self.polygons]
+        copy.lines = [simplify_line(line, tolerance) for line in self.lines]
+        copy.points = self.points
+        copy.bounds = self.bounds
+        return copy
+
+    def outlines(self):
+        """All rings and lines, for edge-crossing tests"""
+        return [ring for polygon in self.polygons for ring in polygon] + self.lines
+
+    def vertices(self):
+        """Every vertex as an (N, 2) array"""
+        parts = self.outlines() + [self.points]
+        return np.vstack([p for p in parts if len(p)])
+
+    def contains_points(self, xs, ys):
+        """Mask of points lying inside any polygon of this geometry"""
+        inside = np.zeros(len(xs), dtype=bool)
+        for polygon in self.polygons:
+            inside |= points_in_polygon(xs, ys, polygon)
+        return inside
+
+
+def _collect(geojson, polygons, lines, points):
+    kind = geojson.get('type')
+    coords = geojson.get('coordinates')
+    if kind == 'Feature':
+        if geojson.get('geometry'):
+            _collect(geojson['geometry'], polygons, lines, points)
+    elif kind == 'FeatureCollection':
+        for feature in geojson.get('features') or []:
+            _collect(feature, polygons, lines, points)
+    elif kind == 'GeometryCollection':
+        for geometry in geojson.get('geometries') or []:
+            _collect(geometry, polygons, lines, points)
+    elif kind == 'Point':
+        points.append(coords[:2])
+    elif kind == 'MultiPoint':
+        points.extend(c[:2] for c in coords)
+    elif kind == 'LineString':
+        lines.append(np.asarray([c[:2] for c in coords], dtype=float))
+    elif kind == 'MultiLineString':
+        lines.extend(np.asarray([c[:2] for c in line], dtype=float) for line in coords)
+    elif kind == 'Polygon':
+        polygons.append([np.asarray([c[:2] for c in ring], dtype=float) for ring in coords])
+    elif kind == 'MultiPolygon':
+        for polygon in coords:
+            polygons.append([np.asarray([c[:2] for c in ring], dtype=float) for ring in polygon])
+    else:
+        raise ValueError(f'Unsupported GeoJSON type: {kind}')
+
+
+def parse_geometry(value):
+    """
+    Parse a GeoJSON string or dict into a ParsedGeometry.
+
+    Returns:
+        ParsedGeometry, or None if the value is empty or not valid GeoJSON
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    try:
+        geojson = json.loads(value) if isinstance(value, str) else value
+        if not isinstance(geojson, dict):
+            return None
+        polygons, lines, points = [], [], []
+        _collect(geojson, polygons, lines, points)
+        # Drop polygons without a usable outer ring, and degenerate holes
+        polygons = [
+            [polygon[0]] + [hole for hole in polygon[1:] if len(hole) >= 4]
+            for polygon in polygons if polygon and len(polygon[0]) >= 4
+        ]
+        lines = [line for line in lines if len(line)]
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if not polygons and not lines and not len(points):
+            return None
+        return ParsedGeometry(polygons, lines, points)
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        return None
+
+
+class GeometryIndex:
+    """
+    Bounding boxes and simplified shapes for every event with a geometry.
+
+    Built once per data generation. Positions are row positions into the
+    DataFrame the index was built from.
+    """
+
+    def __init__(self, df, tolerance=DEFAULT_SIMPLIFY_TOLERANCE):
+        self.tolerance = tolerance
+        self.shapes = {}
+        positions = []
+        if 'geometry' in df.columns:
+            for position, value in enumerate(df['geometry'].tolist()):
+                parsed = parse_geometry(value)
+                if parsed is not None:
+                    self.shapes[position] = parsed.simplified(tolerance)
+                    positions.append(position)
+
+        self.positions = np.asarray(positions, dtype=np.int64)
+        bounds = np.asarray([self.shapes[p].bounds for p in positions], dtype=float).reshape(-1, 4)
+        self.min_lon, self.min_lat, self.max_lon, self.max_lat = bounds.T
+
+        starts = pd.to_numeric(df['start_year'], errors='coerce').to_numpy(dtype=float, na_value=np.nan) if 'start_year' in df.columns else np.full(len(df), np.nan)
+        ends = pd.to_numeric(df['end_year'], errors='coerce').to_numpy(dtype=float, na_value=np.nan) if 'end_year' in df.columns else np.full(len(df), np.nan)
+        self.starts = starts[self.positions]
+        self.ends = ends[self.positions]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def query(self, start_year, end_year, region):
+        """
+        Positions of events in the time window whose geometry intersects region.
+
+        Bounding boxes are compared first (vectorized); only overlapping shapes
+        get the exact intersection test.
+        """
+        if not len(self.positions):
+            return np.array([], dtype=np.int64)
+        mask = (self.starts <= end_year) & (self.ends >= start_year)
+        box_mask = np.zeros(len(self.positions), dtype=bool)
+        for min_lon, min_lat, max_lon, max_lat in region.boxes():
+            box_mask |= (
+                (self.min_lon <= max_lon) & (self.max_lon >= min_lon) &
+                (self.min_lat <= max_lat) & (self.max_lat >= min_lat)
+            )
+        candidates = self.positions[mask & box_mask]
+        matched = [p for p in candidates if region.intersects(self.shapes[int(p)])]
+        return np.asarray(matched, dtype=np.int64)
+
+
+class PolygonRegion:
+    """Polygon filter region (GeoJSON Polygon or MultiPolygon)"""
+
+    def __init__(self, geometry):
+        if not geometry.polygons:
+            raise ValueError('Polygon filter requires a Polygon or MultiPolygon geometry')
+        self.geometry = geometry
+
+    @classmethod
+    def from_geojson(cls, value):
+        """Build from a GeoJSON geometry string (Polygon, MultiPolygon or Feature)"""
+        parsed = parse_geometry(value)
+        if parsed is None:
+            raise ValueError('Invalid GeoJSON polygon')
+        return cls(parsed)
+
+    def cache_key(self):
+        """Hashable key identifying the region's shape, for response caches"""
+        digest = hashlib.sha1()
+        for polygon in self.geometry.polygons:
+            for ring in polygon:
+                digest.update(np.asarray(ring, dtype=np.float64).tobytes())
+                digest.update(b'|')
+            digest.update(b'#')
+        return ('polygon', digest.hexdigest())
+
+    def bounds(self):
+        """(min_lat, max_lat, min_lon, max_lon), matching RadiusRegion.bounds()"""
+        min_lon, min_lat, max_lon, max_lat = self.geometry.bounds
+        return min_lat, max_lat, min_lon, max_lon
+
+    def boxes(self):
+        min_lon, min_lat, max_lon, max_lat = self.geometry.bounds
+        return [(min_lon, min_lat, max_lon, max_lat)]
+
+    def contains(self, lats, lons):
+        return self.geometry.contains_points(lons, lats)
+
+    def intersects(self, shape):
+        vertices = shape.vertices()
+        if self.geometry.contains_points(vertices[:, 0], vertices[:, 1]).any():
+            return True
+        own_vertices = self.geometry.vertices()
+        if shape.contains_points(own_vertices[:, 0], own_vertices[:, 1]).any():
+            return True
+        return any(
+            segments_intersect(a, b)
+            for a in self.geometry.outlines()
+            for b in shape.outlines()
+        )
+
+
+class BBoxRegion(PolygonRegion):
+    """
+    Bounding-box filter region.
+
+    min_lon > max_lon denotes a box crossing the antimeridian.
+    """
+
+    def __init__(self, min_lon, min_lat, max_lon, max_lat):
+        if min_lat > max_lat:
+            raise ValueError('Bounding box min_lat must not exceed max_lat')
+        self.min_lon = float(min_lon)
+        self.min_lat = float(min_lat)
+        self.max_lon = float(max_lon)
+        self.max_lat = float(max_lat)
+        polygons = [
+            [np.asarray([[x0, self.min_lat], [x1, self.min_lat], [x1, self.max_lat], [x0, self.max_lat], [x0, self.min_lat]])]
+            for x0, _, x1, _ in self.boxes()
+        ]
+        super().__init__(ParsedGeometry(polygons, [], np.empty((0, 2))))
+
+    @classmethod
+    def from_string(cls, value):
+        """Parse 'min_lon,min_lat,max_lon,max_lat'"""
+        parts = [float(p) for p in value.split(',')]
+        if len(parts) != 4:
+            raise ValueError('Bounding box must be min_lon,min_lat,max_lon,max_lat')
+        return cls(*parts)
+
+    def bounds(self):
+        max_lon = self.max_lon if self.max_lon >= self.min_lon else self.max_lon + 360
+        return self.min_lat, self.max_lat, self.min_lon, max_lon
+
+    def boxes(self):
+        if self.max_lon >= self.min_lon:
+            return [(self.min_lon, self.min_lat, self.max_lon, self.max_lat)]
+        return [(self.min_lon, self.min_lat, 180.0, self.max_lat), (-180.0, self.min_lat, self.max_lon, self.max_lat)]
+
+    def contains(self, lats, lons):
+        in_lat = (lats >= self.min_lat) & (lats <= self.max_lat)
+        if self.max_lon >= self.min_lon:
+            in_lon = (lons >= self.min_lon) & (lons <= self.max_lon)
+        else:
+            in_lon = (lons >= self.min_lon) | (lons <= self.max_lon)
+        return in_lat & in_lon
+
+
+def encode_polyline(coords, precision):
+    """
+    Encode coordinates with the polyline algorithm (quantize, delta, zigzag,
+    base-32 varint as printable ASCII).
+
+    Coordinates keep GeoJSON [lon, lat] order.
+    """
+    factor = 10 ** precision
+    quantized = np.round(np.asarray(coords, dtype=float) * factor).astype(np.int64)
+    deltas = np.diff(quantized, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    zigzag = (deltas << 1) ^ (deltas >> 63)
+    chars = []
+    for value in zigzag.tolist():
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return ''.join(chars)
+
+
+def level_for_zoom(zoom):
+    """(tolerance, precision) of the finest geometry level not above a map zoom"""
+    chosen = GEOMETRY_LEVELS[0]
+    for level in GEOMETRY_LEVELS:
+        if zoom >= level[0]:
+            chosen = level
+    return chosen[1], chosen[2]
+
+
+def compact_geometry(geometry, zoom=DEFAULT_PAYLOAD_ZOOM):
+    """
+    Compact, simplified encoding of a geometry for API payloads.
+
+    The result mirrors GeoJSON nesting, but every coordinate list is a
+    polyline-encoded string, e.g.
+    {"type": "Polygon", "encoding": "polyline", "precision": 4, "coordinates": ["..."]}.
+    Features and mixed geometries become a GeometryCollection.
+
+    Args:
+        geometry: ParsedGeometry, GeoJSON string or dict
+        zoom: Map zoom level selecting the simplification level
+
+    Returns:
+        JSON string, or None if the geometry is empty or invalid
+    """
+    parsed = geometry if isinstance(geometry, ParsedGeometry) else parse_geometry(geometry)
+    if parsed is None:
+        return None
+    tolerance, precision = level_for_zoom(zoom)
+    simplified = parsed.simplified(tolerance)
+
+    parts = []
+    if simplified.polygons:
+        rings = [[encode_polyline(ring, precision) for ring in polygon] for polygon in simplified.polygons]
+        parts.append(('Polygon', rings[0]) if len(rings) == 1 else ('MultiPolygon', rings))
+    if simplified.lines:
+        lines = [encode_polyline(line, precision) for line in simplified.lines]
+        parts.append(('LineString', lines[0]) if len(lines) == 1 else ('MultiLineString', lines))
+    if len(simplified.points):
+        points = encode_polyline(simplified.points, precision)
+        parts.append(('Point', points) if len(simplified.points) == 1 else ('MultiPoint', points))
+
+    def _part(kind, coordinates):
+        return {'type': kind, 'encoding': 'polyline', 'precision': precision, 'coordinates': coordinates}
+
+    if len(parts) == 1:
+        compact = _part(*parts[0])
+    else:
+        compact = {'type': 'GeometryCollection', 'geometries': [_part(kind, coords) for kind, coords in parts]}
+    return json.dumps(compact, separators=(',', ':'))
+
+
+def simplified_geojson(geometry, zoom):
+    """
+    Simplified GeoJSON geometry (dict) for a map zoom level, or None if the
+    geometry is empty or invalid. Companion to compact_geometry for clients
+    that want plain coordinates.
+    """
+    parsed = geometry if isinstance(geometry, ParsedGeometry) else parse_geometry(geometry)
+    if parsed is None:
+        return None
+    tolerance, precision = level_for_zoom(zoom)
+    simplified = parsed.simplified(tolerance)
+
+    def _round(coords):
+        return np.round(np.asarray(coords, dtype=float), precision).tolist()
+
+    parts = []
+    if simplified.polygons:
+        rings = [[_round(ring) for ring in polygon] for polygon in simplified.polygons]
+        parts.append({'type': 'Polygon', 'coordinates': rings[0]} if len(rings) == 1
+                     else {'type': 'MultiPolygon', 'coordinates': rings})
+    if simplified.lines:
+        lines = [_round(line) for line in simplified.lines]
+        parts.append({'type': 'LineString', 'coordinates': lines[0]} if len(lines) == 1
+                     else {'type': 'MultiLineString', 'coordinates': lines})
+    if len(simplified.points):
+        points = _round(simplified.points)
+        parts.append({'type': 'Point', 'coordinates': points[0]} if len(points) == 1
+                     else {'type': 'MultiPoint', 'coordinates': points})
+
+    if len(parts) == 1:
+        return parts[0]
+    return {'type': 'GeometryCollection', 'geometries': parts}
@@ -0,0 +1,275 @@
+"""
+Import Jobs Module
+
+Runs CSV imports in the background so large files neither hold an HTTP
+request open past the worker timeout nor sit in memory whole. A job streams
+the file with pd.read_csv(chunksize=...) on a worker thread and hands each
+chunk to import_events().
+
+Job state lives in the import_jobs table, so any worker can report progress
+or cancel a job. Progress is committed after every chunk: a cancelled, failed
+or interrupted job (its worker died) resumes from the last committed chunk.
+Re-importing part of a chunk is harmless, since existing IDs are skipped
+(append mode) or unchanged rows left alone (sync mode).
+"""
+import json
+import os
+import sys
+import threading
+import uuid
+from datetime import datetime, timedelta
+import pandas as pd
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+from app.models import db, TimelineEvent, ImportJob
+from app.event_store import bump_generation
+from app.importer import import_events, sync_events, load_content_hashes, delete_missing_events, chunk_ids
+
+DEFAULT_CHUNK_SIZE = 50000
+DEFAULT_STALE_SECONDS = 300
+MAX_STORED_ERRORS = 10
+
+ACTIVE_STATUSES = ('queued', 'running', 'cancelling')
+RESUMABLE_STATUSES = ('cancelled', 'failed', 'interrupted')
+
+
+class ImportJobError(Exception):
+    """A job request that conflicts with the job's state (HTTP 409)"""
+
+
+def count_csv_rows(csv_path):
+    """Approximate number of data rows (lines after the header), for progress reporting"""
+    lines = 0
+    last = b'\n'
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1  # No trailing newline
+    return max(lines - 1, 0)
+
+
+def _is_stale(job):
+    stale_seconds = getattr(Config, 'IMPORT_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+    updated = job.updated_at or job.created_at
+    return updated is not None and datetime.utcnow() - updated > timedelta(seconds=stale_seconds)
+
+
+def job_status(job):
+    """Effective status: an active job with no progress for too long is 'interrupted'"""
+    if job.status in ACTIVE_STATUSES and _is_stale(job):
+        return 'interrupted'
+    return job.status
+
+
+def job_to_dict(job):
+    """JSON-ready progress report for a job"""
+    return {
+        'job_id': job.id,
+        'status': job_status(job),
+        'csv_path': job.csv_path,
+        'mode': job.mode,
+        'clear_existing': job.clear_existing,
+        'total_rows': job.total_rows,
+        'rows_read': job.rows_read,
+        'imported': job.imported,
+        'updated': job.updated,
+        'unchanged': job.unchanged,
+        'deleted': job.deleted,
+        'skipped': job.skipped,
+        'total_errors': job.error_count,
+        'errors': json.loads(job.errors) if job.errors else [],
+        'message': job.message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'updated_at': job.updated_at.isoformat() if job.updated_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def get_import_job(session, job_id):
+    """Job by id, or None"""
+    return session.get(ImportJob, job_id)
+
+
+def latest_import_job(session):
+    """Most recently created job, or None"""
+    return session.query(ImportJob).order_by(ImportJob.created_at.desc()).first()
+
+
+def active_import_job(session):
+    """A queued or running job that is still making progress, or None"""
+    for job in session.query(ImportJob).filter(ImportJob.status.in_(ACTIVE_STATUSES)).all():
+        if job_status(job) in ACTIVE_STATUSES:
+            return job
+    return None
+
+
+def _start_thread(app, job_id):
+    thread = threading.Thread(target=run_import_job, args=(app, job_id),
+                              name=f'import-job-{job_id}', daemon=True)
+    thread.start()
+    return thread
+
+
+def start_import_job(app, session, csv_path, clear_existing=False, mode='append'):
+    """
+    Create an import job and start it on a background thread.
+
+    Args:
+        app: Flask application (the thread runs in its own app context)
+        session: Database session
+        csv_path: CSV file to import
+        clear_existing: Delete all events before importing
+        mode: 'append' to add new IDs only, or 'sync' to also update changed
+            rows and delete rows missing from the file
+
+    Returns:
+        The new ImportJob
+
+    Raises:
+        ImportJobError: If another import is still running
+    """
+    running = active_import_job(session)
+    if running is not None:
+        raise ImportJobError(f'Import job {running.id} is already {running.status}')
+    job = ImportJob(id=uuid.uuid4().hex, csv_path=csv_path, clear_existing=clear_existing,
+                    mode=mode, status='queued')
+    session.add(job)
+    session.commit()
+    _start_thread(app, job.id)
+    return job
+
+
+def resume_import_job(app, session, job_id):
+    """
+    Restart a cancelled, failed or interrupted job from its last committed chunk.
+
+    Raises:
+        ImportJobError: If the job is not resumable or another import is running
+    """
+    job = get_import_job(session, job_id)
+    status = job_status(job)
+    if status not in RESUMABLE_STATUSES:
+        raise ImportJobError(f'Import job {job.id} is {status} and cannot be resumed')
+    running = active_import_job(session)
+    if running is not None and running.id != job.id:
+        raise ImportJobError(f'Import job {running.id} is already {running.status}')
+    job.status = 'queued'
+    job.message = None
+    job.finished_at = None
+    session.commit()
+    _start_thread(app, job.id)
+    return job
+
+
+def cancel_import_job(session, job_id):
+    """
+    Ask a job to stop. The worker stops after its current chunk; a job whose
+    worker is gone is marked cancelled right away.
+
+    Raises:
+        ImportJobError: If the job already finished
+    """
+    job = get_import_job(session, job_id)
+    status = job_status(job)
+    if status == 'interrupted' or job.status == 'queued':
+        job.status = 'cancelled'
+        job.finished_at = datetime.utcnow()
+    elif status == 'running':
+        job.status = 'cancelling'
+    elif status != 'cancelling':
+        raise ImportJobError(f'Import job {job.id} is {status} and cannot be cancelled')
+    session.commit()
+    return job
+
+
+def _cancel_requested(session, job_id):
+    status = session.query(ImportJob.status).filter_by(id=job_id).scalar()
+    return status == 'cancelling'
+
+
+def _finish(session, job, status, message=None):
+    job.status = status
+    job.message = message
+    job.finished_at = datetime.utcnow()
+    session.commit()
+
+
+def run_import_job(app, job_id):
+    """
+    Run an import job to completion, cancellation or failure (thread target).
+
+    Chunks before the job's rows_read are skipped, so a resumed job continues
+    where it left off.
+    """
+    chunk_size = getattr(Config, 'IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    with app.app_context():
+        session = db.session
+        job = get_import_job(session, job_id)
+        if job is None or job.status != 'queued':
+            return  # Cancelled before it started, or already picked up
+        try:
+            job.status = 'running'
+            if job.total_rows is None:
+                job.total_rows = count_csv_rows(job.csv_path)
+            if job.clear_existing and job.rows_read == 0:
+                TimelineEvent.query.delete()
+                bump_generation(session)
+            session.commit()
+
+            errors = json.loads(job.errors) if job.errors else []
+            sync = job.mode == 'sync'
+            hashes = load_content_hashes(session) if sync else None
+            seen_ids = set()  # Sync mode: every id in the file, for deleting the rest
+            position = 0  # Data rows of the file seen so far
+            for chunk in pd.read_csv(job.csv_path, chunksize=chunk_size):
+                chunk_start = position
+                position += len(chunk)
+                if job.rows_read > chunk_start:
+                    # Already processed before a resume
+                    done = chunk.iloc[:job.rows_read - chunk_start]
+                    if sync:
+                        seen_ids.update(chunk_ids(done))
+                    if position <= job.rows_read:
+                        continue
+                    chunk = chunk.iloc[len(done):]
+                    chunk_start = job.rows_read
+
+                if _cancel_requested(session, job_id):
+                    session.refresh(job)
+                    _finish(session, job, 'cancelled', 'Import cancelled')
+                    return
+
+                if sync:
+                    result = sync_events(session, chunk, hashes, row_offset=chunk_start)
+                    seen_ids.update(result['ids'])
+                else:
+                    result = import_events(session, chunk, row_offset=chunk_start)
+                session.refresh(job)
+                job.rows_read = position
+                job.imported += result['inserted'] if sync else result['imported']
+                if sync:
+                    job.updated += result['updated']
+                    job.unchanged += result['unchanged']
+                job.skipped += result['skipped']
+                job.error_count += len(result['errors'])
+                errors = (errors + result['errors'])[:MAX_STORED_ERRORS]
+                job.errors = json.dumps(errors)
+                session.commit()
+
+            session.refresh(job)
+            if sync:
+                job.deleted += delete_missing_events(session, hashes, seen_ids)
+            _finish(session, job, 'completed', 'CSV sync completed' if sync else 'CSV import completed')
+        except Exception as e:
+            session.rollback()
+            job = get_import_job(session, job_id)
+            _finish(session, job, 'failed', str(e))
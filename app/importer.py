@@ -0,0 +1,498 @@
+"""
+Importer Module
+
+Bulk CSV import shared by the /api/import-csv endpoint and init_db.py.
+Rows are validated and coerced a whole column at a time with pandas,
+existing IDs are found with set-based queries, and new rows are inserted in
+executemany batches (COPY on PostgreSQL), one commit and generation bump per
+batch.
+
+Sync mode (sync_events) instead makes the table match the CSV: every row
+carries a hash of its content, so a refresh inserts new rows, upserts changed
+ones and deletes removed ones, leaving unchanged rows (and caches) alone.
+"""
+import csv
+import hashlib
+import io
+import os
+import sys
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+from sqlalchemy import select, func, inspect, text, bindparam
+from app.models import TimelineEvent
+from app.event_store import bump_generation
+from app.search import bulk_insert_indexing
+
+DEFAULT_BATCH_SIZE = 5000
+LOCATION_CONFIDENCE_VALUES = ('exact', 'approx', 'disputed')
+
+# IDs per IN list when looking up existing events
+ID_LOOKUP_CHUNK = 500
+
+IMPORT_COLUMNS = ['id', 'title', 'category', 'continent', 'start_year', 'end_year', 'description',
+                  'start_date', 'end_date', 'lat', 'lon', 'location_label', 'geometry',
+                  'location_confidence', 'content_hash', 'created_at', 'updated_at']
+
+# Columns covered by content_hash (everything the CSV sets, except the id)
+HASH_COLUMNS = ['title', 'category', 'continent', 'start_year', 'end_year', 'description',
+                'start_date', 'end_date', 'lat', 'lon', 'location_label', 'geometry',
+                'location_confidence']
+
+# Columns an upsert overwrites (created_at is kept)
+UPSERT_COLUMNS = HASH_COLUMNS + ['content_hash', 'updated_at']
+
+
+def _text_column(df, name, default=None):
+    """Stripped strings; missing or blank values become default"""
+    if name not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    values = df[name].astype('string').str.strip()
+    values = values.mask(values == '')
+    return values.astype(object).where(values.notna(), default)
+
+
+def _date_column(df, name):
+    """datetime.date values; unparseable or missing dates become None"""
+    if name not in df.columns:
+        return pd.Series(None, index=df.index, dtype=object)
+    parsed = pd.to_datetime(df[name], errors='coerce', format='mixed')
+    return pd.Series(
+        [value.date() if not pd.isna(value) else None for value in parsed],
+        index=df.index, dtype=object
+    )
+
+
+def _coordinate_column(df, name, limit):
+    """Floats within [-limit, limit]; anything else becomes None"""
+    if name not in df.columns:
+        return pd.Series(None, index=df.index, dtype=object)
+    values = pd.to_numeric(df[name], errors='coerce')
+    values = values.where(values.abs() <= limit)
+    return values.astype(object).where(values.notna(), None)
+
+
+def prepare_import_frame(df, row_offset=0):
+    """
+    Validate and coerce a raw CSV DataFrame into timeline_events rows.
+
+    Rows missing id, title or start_year are skipped, as are repeated IDs
+    (the first occurrence wins). Invalid optional values (dates, coordinates,
+    confidence) are dropped rather than failing the row.
+
+    Args:
+        df: DataFrame as read from the CSV
+        row_offset: Data rows of the file before df (when importing in chunks),
+            so error messages give file row numbers
+
+    Returns:
+        (rows, skipped, errors): rows is a DataFrame with IMPORT_COLUMNS holding
+        Python values ready for insertion, skipped the number of rejected rows,
+        errors a list of messages for rows with invalid values
+    """
+    df = df.dropna(axis=1, how='all')  # Remove empty columns
+    errors = []
+
+    ids = _text_column(df, 'id')
+    titles = _text_column(df, 'title')
+    raw_start = df['start_year'] if 'start_year' in df.columns else pd.Series(np.nan, index=df.index)
+    start_years = pd.to_numeric(raw_start, errors='coerce')
+    end_years = pd.to_numeric(df['end_year'], errors='coerce') if 'end_year' in df.columns else start_years
+    end_years = end_years.fillna(start_years)
+
+    # Report values that are present but not numbers
+    for column, raw, parsed in (('start_year', raw_start, start_years),
+                                ('end_year', df.get('end_year', raw_start), end_years)):
+        bad = raw.notna() & parsed.isna()
+        for position in np.flatnonzero(bad.to_numpy())[:100]:
+            errors.append(
+                f"Row {row_offset + position + 2} (ID: {ids.iloc[position] or 'unknown'}): invalid {column} {raw.iloc[position]!r}"
+            )
+
+    valid = ids.notna() & titles.notna() & start_years.notna() & end_years.notna()
+    valid &= ~ids.duplicated(keep='first')
+
+    now = datetime.utcnow()
+    confidence = _text_column(df, 'location_confidence', 'exact').str.lower()
+    rows = pd.DataFrame({
+        'id': ids,
+        'title': titles,
+        'category': _text_column(df, 'category', 'other'),
+        'continent': _text_column(df, 'continent', 'Global'),
+        'start_year': start_years,
+        'end_year': end_years,
+        'description': _text_column(df, 'description'),
+        'start_date': _date_column(df, 'start_date'),
+        'end_date': _date_column(df, 'end_date'),
+        'lat': _coordinate_column(df, 'lat', 90),
+        'lon': _coordinate_column(df, 'lon', 180),
+        'location_label': _text_column(df, 'location_label'),
+        'geometry': _text_column(df, 'geometry'),
+        'location_confidence': confidence.where(confidence.isin(LOCATION_CONFIDENCE_VALUES), 'exact'),
+        'content_hash': None,
+        'created_at': now,
+        'updated_at': now,
+    })[valid]
+    rows['start_year'] = np.trunc(rows['start_year']).astype('int64')
+    rows['end_year'] = np.trunc(rows['end_year']).astype('int64')
+    rows['content_hash'] = content_hashes(rows)
+    return rows.reset_index(drop=True), int((~valid).sum()), errors
+
+
+def content_hashes(rows):
+    """
+    Hash of each row's HASH_COLUMNS values, as a list of hex strings.
+
+    Works on prepared import rows and on rows read back from the database
+    alike: values are compared by their string form, missing values all hash
+    the same.
+    """
+    columns = []
+    for column in HASH_COLUMNS:
+        missing = rows[column].isna().to_numpy()
+        columns.append(['\x00' if is_missing else str(value)
+                        for value, is_missing in zip(rows[column].tolist(), missing)])
+    return [hashlib.blake2b('\x1f'.join(values).encode('utf-8'), digest_size=16).hexdigest()
+            for values in zip(*columns)]
+
+
+def find_existing_ids(session, ids):
+    """Subset of ids already present in timeline_events"""
+    ids = list(ids)
+    if not ids:
+        return set()
+    if len(ids) > ID_LOOKUP_CHUNK:
+        table_size = session.execute(select(func.count()).select_from(TimelineEvent)).scalar()
+        if table_size <= 4 * len(ids):
+            # Candidates rival the table: one pass over the primary key beats many IN lists
+            wanted = set(ids)
+            return {event_id for event_id in session.execute(select(TimelineEvent.id)).scalars()
+                    if event_id in wanted}
+    existing = set()
+    for start in range(0, len(ids), ID_LOOKUP_CHUNK):
+        query = select(TimelineEvent.id).where(TimelineEvent.id.in_(ids[start:start + ID_LOOKUP_CHUNK]))
+        existing.update(session.execute(query).scalars())
+    return existing
+
+
+# Storage formats SQLAlchemy uses for Date/DateTime columns on SQLite
+_DATE_FORMATS = {
+    'start_date': '%Y-%m-%d',
+    'end_date': '%Y-%m-%d',
+    'created_at': '%Y-%m-%d %H:%M:%S.%f',
+    'updated_at': '%Y-%m-%d %H:%M:%S.%f',
+}
+
+
+def _row_tuples(rows, format_dates=False):
+    """Row tuples in IMPORT_COLUMNS order (dates as ISO strings if format_dates)"""
+    columns = []
+    for column in IMPORT_COLUMNS:
+        missing = rows[column].isna().to_numpy()
+        values = rows[column].tolist()
+        if missing.any():
+            values = [None if is_missing else value for value, is_missing in zip(values, missing)]
+        if format_dates and column in _DATE_FORMATS:
+            # Few distinct values per import, so format each once
+            formatted = {value: value.strftime(_DATE_FORMATS[column]) for value in set(values) if value is not None}
+            formatted[None] = None
+            values = [formatted[value] for value in values]
+        columns.append(values)
+    return list(zip(*columns))
+
+
+def _copy_rows(session, rows):
+    """Insert rows with PostgreSQL COPY"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        ['' if value is None else value for value in row] for row in _row_tuples(rows)
+    )
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY timeline_events ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def insert_rows(session, rows):
+    """Insert prepared rows in one statement batch (COPY on PostgreSQL, executemany elsewhere)"""
+    if rows.empty:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        _copy_rows(session, rows)
+    elif dialect == 'sqlite':
+        # Plain DBAPI executemany, with values in the formats SQLAlchemy stores on SQLite
+        placeholders = ', '.join('?' for _ in IMPORT_COLUMNS)
+        with bulk_insert_indexing(session):
+            session.connection().exec_driver_sql(
+                f"INSERT INTO timeline_events ({', '.join(IMPORT_COLUMNS)}) VALUES ({placeholders})",
+                _row_tuples(rows, format_dates=True)
+            )
+    else:
+        records = [dict(zip(IMPORT_COLUMNS, row)) for row in _row_tuples(rows)]
+        session.execute(TimelineEvent.__table__.insert(), records)
+
+
+def import_events(session, df, batch_size=None, progress=None, row_offset=0):
+    """
+    Import a raw CSV DataFrame, skipping IDs that already exist.
+
+    Each batch is committed with its own generation bump.
+
+    Args:
+        session: Database session
+        df: DataFrame as read from the CSV
+        batch_size: Rows per insert batch (Config.IMPORT_BATCH_SIZE by default)
+        progress: Optional callback(imported_so_far, total_to_import) after each batch
+        row_offset: Data rows of the file before df (when importing in chunks)
+
+    Returns:
+        Dict with 'imported', 'skipped' and 'errors'
+    """
+    batch_size = batch_size or getattr(Config, 'IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    rows, skipped, errors = prepare_import_frame(df, row_offset)
+
+    existing = find_existing_ids(session, rows['id'])
+    if existing:
+        new_rows = rows[~rows['id'].isin(existing)]
+        skipped += len(rows) - len(new_rows)
+        rows = new_rows
+
+    imported = 0
+    for offset in range(0, len(rows), batch_size):
+        batch = rows.iloc[offset:offset + batch_size]
+        try:
+            bump_generation(session)
+            insert_rows(session, batch)
+            session.commit()
+            imported += len(batch)
+        except Exception as e:
+            session.rollback()
+            errors.append(f"Rows {offset + 1}-{offset + len(batch)} of the new events: {str(e)}")
+            skipped += len(batch)
+        if progress:
+            progress(imported, len(rows))
+
+    return {'imported': imported, 'skipped': skipped, 'errors': errors}
+
+
+def upsert_rows(session, rows):
+    """Insert prepared rows, overwriting the content of rows whose id already exists"""
+    if rows.empty:
+        return
+    table = TimelineEvent.__table__
+    records = [dict(zip(IMPORT_COLUMNS, row)) for row in _row_tuples(rows)]
+    dialect = session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table)
+        # ON CONFLICT DO UPDATE rather than SQLite's INSERT OR REPLACE: REPLACE deletes
+        # the old row without firing delete triggers, which would leave stale FTS entries
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={column: statement.excluded[column] for column in UPSERT_COLUMNS}
+        )
+        session.execute(statement, records)
+    else:
+        existing = find_existing_ids(session, rows['id'])
+        updates = [record for record in records if record['id'] in existing]
+        if updates:
+            session.execute(
+                table.update().where(table.c.id == bindparam('event_id')),
+                [dict({column: record[column] for column in UPSERT_COLUMNS}, event_id=record['id'])
+                 for record in updates]
+            )
+        inserts = [record for record in records if record['id'] not in existing]
+        if inserts:
+            session.execute(table.insert(), inserts)
+
+
+def load_content_hashes(session):
+    """
+    {event id: content hash} for every stored event; None for events without
+    a hash (added in the app, or imported before hashes existed).
+    """
+    return dict(session.execute(select(TimelineEvent.id, TimelineEvent.content_hash)).all())
+
+
+def backfill_content_hashes(session, ids, hashes):
+    """
+    Compute and save the content hash of stored events that have none.
+
+    Sync calls this for unhashed events whose ids appear in the CSV: from
+    then on the file owns them, so they are compared (and deleted when they
+    leave the file) like imported events.
+
+    Args:
+        session: Database session
+        ids: Ids of stored events without a hash
+        hashes: {event id: content hash}, updated in place
+    """
+    missing = list(ids)
+    if not missing:
+        return
+    table = TimelineEvent.__table__
+    columns = [table.c.id] + [table.c[column] for column in HASH_COLUMNS]
+    # Keep updated_at: filling in a hash does not change the event
+    backfill = table.update().where(table.c.id == bindparam('event_id')).values(
+        content_hash=bindparam('hash'), updated_at=table.c.updated_at
+    )
+    for start in range(0, len(missing), ID_LOOKUP_CHUNK):
+        ids = missing[start:start + ID_LOOKUP_CHUNK]
+        stored = pd.DataFrame(
+            session.execute(select(*columns).where(table.c.id.in_(ids))).all(),
+            columns=['id'] + HASH_COLUMNS
+        )
+        computed = content_hashes(stored)
+        session.execute(backfill, [{'event_id': event_id, 'hash': content_hash}
+                                   for event_id, content_hash in zip(stored['id'], computed)])
+        hashes.update(zip(stored['id'], computed))
+    session.commit()
+
+
+def chunk_ids(df):
+    """Event ids in a raw CSV DataFrame, as the importer reads them"""
+    return _text_column(df, 'id').dropna().tolist()
+
+
+def sync_events(session, df, hashes, batch_size=None, row_offset=0):
+    """
+    Make the rows of a raw CSV DataFrame match the database: insert new IDs,
+    overwrite rows whose content hash differs, leave the rest untouched.
+
+    All changes commit in one transaction with a single generation bump;
+    nothing is written (and caches stay valid) when nothing changed.
+
+    Args:
+        session: Database session
+        df: DataFrame as read from the CSV
+        hashes: {event id: content hash} from load_content_hashes(), updated in place
+        batch_size: Rows per insert/upsert statement batch
+        row_offset: Data rows of the file before df (when syncing in chunks)
+
+    Returns:
+        Dict with 'inserted', 'updated', 'unchanged', 'skipped', 'errors' and
+        'ids' (every event id in df, valid or not)
+    """
+    batch_size = batch_size or getattr(Config, 'IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    rows, skipped, errors = prepare_import_frame(df, row_offset)
+
+    backfill_content_hashes(session, [event_id for event_id in rows['id']
+                                      if event_id in hashes and hashes[event_id] is None], hashes)
+    stored = rows['id'].map(hashes)
+    is_new = stored.isna().to_numpy()
+    is_changed = ~is_new & (stored != rows['content_hash']).to_numpy()
+    new_rows = rows[is_new]
+    changed_rows = rows[is_changed]
+
+    if len(new_rows) or len(changed_rows):
+        try:
+            bump_generation(session)
+            for offset in range(0, len(new_rows), batch_size):
+                insert_rows(session, new_rows.iloc[offset:offset + batch_size])
+            for offset in range(0, len(changed_rows), batch_size):
+                upsert_rows(session, changed_rows.iloc[offset:offset + batch_size])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        written = pd.concat([new_rows, changed_rows])
+        hashes.update(zip(written['id'], written['content_hash']))
+
+    return {
+        'inserted': len(new_rows),
+        'updated': len(changed_rows),
+        'unchanged': len(rows) - len(new_rows) - len(changed_rows),
+        'skipped': skipped,
+        'errors': errors,
+        'ids': chunk_ids(df),
+    }
+
+
+def delete_missing_events(session, hashes, seen_ids):
+    """
+    Delete imported events whose ids were not in the synced CSV.
+
+    Events without a content hash were never part of a CSV (added in the
+    app) and are kept.
+
+    Args:
+        session: Database session
+        hashes: {event id: content hash} covering every stored event, updated in place
+        seen_ids: Set of event ids present in the CSV
+
+    Returns:
+        Number of events deleted
+    """
+    removed = [event_id for event_id, content_hash in hashes.items()
+               if content_hash is not None and event_id not in seen_ids]
+    if not removed:
+        return 0
+    try:
+        bump_generation(session)
+        for start in range(0, len(removed), ID_LOOKUP_CHUNK):
+            ids = removed[start:start + ID_LOOKUP_CHUNK]
+            session.execute(TimelineEvent.__table__.delete().where(TimelineEvent.id.in_(ids)))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    for event_id in removed:
+        del hashes[event_id]
+    return len(removed)
+
+
+def sync_csv_frame(session, df, batch_size=None):
+    """
+    Sync the whole events table to a raw CSV DataFrame (see sync_events).
+
+    Returns:
+        Dict with 'inserted', 'updated', 'unchanged', 'deleted', 'skipped' and 'errors'
+    """
+    hashes = load_content_hashes(session)
+    result = sync_events(session, df, hashes, batch_size)
+    result['deleted'] = delete_missing_events(session, hashes, set(result.pop('ids')))
+    return result
+
+
+# Columns added to existing tables after they were first created (db.create_all
+# only creates missing tables)
+_ADDED_COLUMNS = {
+    'timeline_events': [
+        ('content_hash', 'VARCHAR(32)'),
+    ],
+    'import_jobs': [
+        ('mode', "VARCHAR(10) NOT NULL DEFAULT 'append'"),
+        ('updated', 'BIGINT NOT NULL DEFAULT 0'),
+        ('unchanged', 'BIGINT NOT NULL DEFAULT 0'),
+        ('deleted', 'BIGINT NOT NULL DEFAULT 0'),
+    ],
+}
+
+
+def init_import_columns(session):
+    """Add the content hash and sync job columns to tables created before they existed"""
+    inspector = inspect(session.get_bind())
+    for table, columns in _ADDED_COLUMNS.items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        for name, ddl in columns:
+            if name not in existing:
+                session.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+    session.commit()
@@ -0,0 +1,362 @@
+"""
+Metrics Module
+
+Prometheus text-format metrics for GET /metrics:
+
+- Request latency per route, render stage durations (the stages timed for
+  Server-Timing, see app/timing.py) and database query durations, as
+  histograms; request, cache hit/miss and load-shedding counters.
+- Gauges read at scrape time: store generation and size, cache entries,
+  render slots in use, and progress of the latest import job.
+
+Each process counts for itself. With METRICS_DIR set (gunicorn with several
+workers), every process also writes its totals to METRICS_DIR/metrics-<pid>.json
+(at most every METRICS_FLUSH_INTERVAL seconds, and at exit), and a scrape
+served by any worker adds up all files: counters and histograms of every
+process that ever wrote one, gauges of processes still running. Empty the
+directory before starting the server.
+"""
+import atexit
+import glob
+import json
+import math
+import os
+import sys
+import threading
+import time
+from flask import g, request
+from sqlalchemy import event
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+HELP = {
+    'timetrip_http_requests_total': ('counter', 'HTTP requests by route, method and status'),
+    'timetrip_http_request_duration_seconds': ('histogram', 'HTTP request latency by route'),
+    'timetrip_render_stage_duration_seconds': ('histogram', 'Time per timeline render stage'),
+    'timetrip_db_queries_total': ('counter', 'Database statements executed'),
+    'timetrip_db_query_duration_seconds': ('histogram', 'Database statement duration'),
+    'timetrip_cache_hits_total': ('counter', 'Cache lookups that found an entry'),
+    'timetrip_cache_misses_total': ('counter', 'Cache lookups that missed'),
+    'timetrip_cache_entries': ('gauge', 'Entries held by a cache'),
+    'timetrip_render_coalesced_total': ('counter', 'Timeline requests served by a render already running'),
+    'timetrip_render_shed_total': ('counter', 'Timeline renders refused with 503'),
+    'timetrip_render_superseded_total': ('counter', 'Queued timeline renders replaced by a newer one'),
+    'timetrip_render_active': ('gauge', 'Timeline renders holding a slot'),
+    'timetrip_render_queued': ('gauge', 'Timeline renders waiting for a slot'),
+    'timetrip_data_generation': ('gauge', 'Data generation in the database'),
+    'timetrip_store_generation': ('gauge', 'Data generation of the loaded event store'),
+    'timetrip_store_events': ('gauge', 'Events in the loaded event store'),
+    'timetrip_store_bytes': ('gauge', 'Memory of the loaded event store frame (shallow)'),
+    'timetrip_import_job_rows': ('gauge', 'Row counts of the latest import job'),
+    'timetrip_import_job_active': ('gauge', '1 while the latest import job is queued or running'),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, _label_key(labels or {}))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None, buckets=LATENCY_BUCKETS):
+        key = (name, _label_key(labels or {}))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {'buckets': list(buckets), 'counts': [0] * len(buckets),
+                                                'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(hist['buckets']):
+                if value <= bound:
+                    hist['counts'][i] += 1
+                    break
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def snapshot(self):
+        """JSON-ready copy of the counters and histograms (non-cumulative bucket counts)"""
+        with self._lock:
+            return {
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, dict(labels), dict(hist, counts=list(hist['counts']))]
+                               for (name, labels), hist in self._histograms.items()],
+            }
+
+
+registry = MetricsRegistry()
+
+
+def _process_snapshot():
+    """This process's totals, including the collectors' counters and gauges"""
+    snapshot = registry.snapshot()
+    counters, gauges = _collect_process_metrics()
+    snapshot['counters'].extend(counters)
+    snapshot['gauges'] = gauges
+    snapshot['pid'] = os.getpid()
+    return snapshot
+
+
+def _collect_process_metrics():
+    # Imported here: these modules import the app's models and config
+    from app.admission import render_admission
+    from app.geo_clusters import geo_cluster_cache
+    from app.timeline import timeline_cache, timeline_flight
+
+    counters = []
+    gauges = []
+    for cache_name, cache in (('timeline', timeline_cache), ('geo_clusters', geo_cluster_cache)):
+        labels = {'cache': cache_name}
+        counters.append(['timetrip_cache_hits_total', labels, cache.hits])
+        counters.append(['timetrip_cache_misses_total', labels, cache.misses])
+        gauges.append(['timetrip_cache_entries', labels, len(cache)])
+    counters.append(['timetrip_render_coalesced_total', {}, timeline_flight.shared])
+    stats = render_admission.stats()
+    counters.append(['timetrip_render_shed_total', {}, stats['shed']])
+    counters.append(['timetrip_render_superseded_total', {}, stats['superseded']])
+    gauges.append(['timetrip_render_active', {}, stats['active']])
+    gauges.append(['timetrip_render_queued', {}, stats['queued']])
+    return counters, gauges
+
+
+# --- File-backed aggregation (METRICS_DIR) ---
+
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def metrics_dir():
+    """Configured directory for per-process metric files, or None"""
+    return getattr(Config, 'METRICS_DIR', None) or None
+
+
+def _process_file(directory):
+    return os.path.join(directory, f'metrics-{os.getpid()}.json')
+
+
+def flush_metrics(force=False):
+    """Write this process's totals to METRICS_DIR (throttled unless force)"""
+    global _last_flush
+    directory = metrics_dir()
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < getattr(Config, 'METRICS_FLUSH_INTERVAL', 1.0):
+        return
+    with _flush_lock:
+        _last_flush = now
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = _process_file(directory)
+            temp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(_process_snapshot(), f)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Could not write metrics file: {e}")
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _process_snapshots():
+    """Snapshots of this process and (with METRICS_DIR) of every other process that wrote one"""
+    own = _process_snapshot()
+    directory = metrics_dir()
+    if not directory:
+        return [own]
+    snapshots = [own]
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue  # Being replaced, or not ours
+        if snapshot.get('pid') == own['pid']:
+            continue
+        pid = snapshot.get('pid')
+        if not pid or not _pid_alive(pid):
+            snapshot['gauges'] = []  # A dead process holds no cache entries or render slots
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def aggregate(snapshots):
+    """Sum counters, histograms and gauges of several process snapshots"""
+    counters = {}
+    histograms = {}
+    gauges = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, _label_key(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, value in snapshot.get('gauges', []):
+            key = (name, _label_key(labels))
+            gauges[key] = gauges.get(key, 0) + value
+        for name, labels, hist in snapshot['histograms']:
+            key = (name, _label_key(labels))
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = dict(hist, counts=list(hist['counts']))
+            else:
+                total['counts'] = [a + b for a, b in zip(total['counts'], hist['counts'])]
+                total['sum'] += hist['sum']
+                total['count'] += hist['count']
+    return counters, histograms, gauges
+
+
+# --- Scrape-time gauges (shared state, read once by the scraping process) ---
+
+def _collect_global_gauges(session):
+    from app.event_store import current_generation, loaded_event_store
+    from app.import_jobs import ACTIVE_STATUSES, job_status, latest_import_job
+
+    gauges = [['timetrip_data_generation', {}, current_generation(session)]]
+    store = loaded_event_store()
+    if store is not None:
+        gauges.append(['timetrip_store_generation', {}, store.generation])
+        gauges.append(['timetrip_store_events', {}, len(store.df)])
+        gauges.append(['timetrip_store_bytes', {}, int(store.df.memory_usage(index=True, deep=False).sum())])
+    job = latest_import_job(session)
+    if job is not None:
+        status = job_status(job)
+        job_labels = {'job_id': str(job.id), 'status': status}
+        for kind, value in (('total', job.total_rows), ('read', job.rows_read), ('imported', job.imported),
+                            ('updated', job.updated), ('unchanged', job.unchanged), ('deleted', job.deleted),
+                            ('skipped', job.skipped), ('errors', job.error_count)):
+            if value is not None:
+                gauges.append(['timetrip_import_job_rows', dict(job_labels, kind=kind), value])
+        gauges.append(['timetrip_import_job_active', {}, int(status in ACTIVE_STATUSES)])
+    return gauges
+
+
+# --- Text exposition ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+
+def render_metrics(session):
+    """Prometheus text exposition (format 0.0.4) of all processes' metrics"""
+    flush_metrics(force=True)
+    counters, histograms, gauges = aggregate(_process_snapshots())
+    for name, labels, value in _collect_global_gauges(session):
+        gauges[(name, _label_key(labels))] = value
+
+    samples = {}
+    for (name, labels), value in counters.items():
+        samples.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    for (name, labels), value in gauges.items():
+        samples.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    for (name, labels), hist in histograms.items():
+        lines = samples.setdefault(name, [])
+        cumulative = 0
+        for bound, count in zip(hist['buckets'], hist['counts']):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", _format_value(float(bound))),))} {cumulative}')
+        lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {hist["count"]}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(float(hist["sum"]))}')
+        lines.append(f'{name}_count{_format_labels(labels)} {hist["count"]}')
+
+    output = []
+    for name in sorted(samples):
+        kind, help_text = HELP.get(name, ('untyped', name))
+        output.append(f'# HELP {name} {help_text}')
+        output.append(f'# TYPE {name} {kind}')
+        output.extend(sorted(samples[name]) if kind != 'histogram' else samples[name])
+    return '\n'.join(output) + '\n'
+
+
+# --- Instrumentation hooks ---
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+
+
+def _finish_request(response):
+    started = g.get('metrics_started')
+    if started is None:
+        return response
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    registry.observe('timetrip_http_request_duration_seconds', time.perf_counter() - started,
+                     {'route': route, 'method': request.method})
+    registry.inc('timetrip_http_requests_total',
+                 {'route': route, 'method': request.method, 'status': str(response.status_code)})
+    timings = g.get('timings')
+    if timings:
+        for stage, seconds in timings.stages.items():
+            registry.observe('timetrip_render_stage_duration_seconds', seconds, {'stage': stage})
+    flush_metrics()
+    return response
+
+
+def _engine_name(bind_key):
+    return 'primary' if bind_key is None else bind_key
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_query_start'] = time.perf_counter()
+
+
+def _make_after_cursor_execute(engine_name):
+    labels = {'engine': engine_name}
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('metrics_query_start', None)
+        if started is None:
+            return
+        registry.observe('timetrip_db_query_duration_seconds', time.perf_counter() - started,
+                         labels, buckets=QUERY_BUCKETS)
+        registry.inc('timetrip_db_queries_total', labels)
+    return after_cursor_execute
+
+
+def init_metrics(app, db):
+    """Record request and database metrics for app (call in an app context)"""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    for bind_key, engine in db.engines.items():
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _make_after_cursor_execute(_engine_name(bind_key)))
+    if metrics_dir():
+        atexit.register(flush_metrics, True)
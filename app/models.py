@@ -3,12 +3,22 @@ Database models for TimeTrip application
 """
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from app.geometry import compact_geometry as encode_compact_geometry
+from app.database import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class TimelineEvent(db.Model):
     """Model representing a timeline event"""
     __tablename__ = 'timeline_events'
+    __table_args__ = (
+        # Time-window filters: end_year >= ? AND start_year <= ?
+        db.Index('ix_timeline_events_years', 'start_year', 'end_year'),
+        # Keyset pagination of the management list: ORDER BY start_year, id
+        db.Index('ix_timeline_events_start_id', 'start_year', 'id'),
+        db.Index('ix_timeline_events_category', 'category'),
+        db.Index('ix_timeline_events_location', 'lat', 'lon'),
+    )
     
     id = db.Column(db.String(100), primary_key=True)
     title = db.Column(db.String(500), nullable=False)
@@ -29,8 +39,19 @@ class TimelineEvent(db.Model):
     geometry = db.Column(db.Text, nullable=True)  # GeoJSON string
     location_confidence = db.Column(db.String(20), default='exact')  # 'exact', 'approx', 'disputed'
     
-    def to_dict(self):
-        """Convert model instance to dictionary"""
+    # Hash of the CSV-sourced fields, set by imports; NULL for events added in the app
+    content_hash = db.Column(db.String(32), nullable=True)
+    
+    def to_dict(self, compact_geometry=False):
+        """
+        Convert model instance to dictionary.
+        
+        With compact_geometry=True, 'geometry' holds the compact polyline
+        encoding used in API payloads instead of the raw GeoJSON text.
+        """
+        geometry = self.geometry
+        if compact_geometry and geometry:
+            geometry = encode_compact_geometry(geometry)
         return {
             'id': self.id,
             'title': self.title,
@@ -44,10 +65,49 @@ class TimelineEvent(db.Model):
             'lat': self.lat,
             'lon': self.lon,
             'location_label': self.location_label,
-            'geometry': self.geometry,
+            'geometry': geometry,
             'location_confidence': self.location_confidence,
         }
     
     def __repr__(self):
         return f'<TimelineEvent {self.id}: {self.title}>'
 
+
+class DataGeneration(db.Model):
+    """Single-row counter bumped by every write to timeline_events"""
+    __tablename__ = 'data_generation'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DataGeneration {self.generation}>'
+
+
+class ImportJob(db.Model):
+    """Progress of a background CSV import (shared by all workers through the database)"""
+    __tablename__ = 'import_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    csv_path = db.Column(db.String(1000), nullable=False)
+    clear_existing = db.Column(db.Boolean, nullable=False, default=False)
+    mode = db.Column(db.String(10), nullable=False, default='append')  # 'append' or 'sync'
+    # 'queued', 'running', 'cancelling', 'cancelled', 'failed' or 'completed'
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    total_rows = db.Column(db.BigInteger, nullable=True)  # Approximate (line count), for progress
+    rows_read = db.Column(db.BigInteger, nullable=False, default=0)  # CSV data rows consumed (the resume point)
+    imported = db.Column(db.BigInteger, nullable=False, default=0)
+    updated = db.Column(db.BigInteger, nullable=False, default=0)  # Sync mode: changed rows rewritten
+    unchanged = db.Column(db.BigInteger, nullable=False, default=0)  # Sync mode: rows left alone
+    deleted = db.Column(db.BigInteger, nullable=False, default=0)  # Sync mode: rows missing from the CSV
+    skipped = db.Column(db.BigInteger, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text, nullable=True)  # JSON list of the first few error messages
+    message = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ImportJob {self.id}: {self.status}>'
@@ -0,0 +1,173 @@
+"""
+Render Pool Module
+
+Optional pool of worker processes for /api/timeline figure rendering.
+make_figure_json is CPU-bound Python, so renders in the web process's
+threads serialize on the GIL; with RENDER_POOL_WORKERS > 0 they run in
+separate processes instead, and web threads only wait on the result.
+
+Each worker builds its own app and its own copy of the event store (read
+from the on-disk snapshot when EVENT_SNAPSHOT_DIR is set, rather than
+queried from the database), reloading it when the data generation changes like any web worker does.
+Workers are started with the 'spawn' method, which is safe under threaded
+servers.
+"""
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+from app.admission import RenderOverloaded, RenderSuperseded, render_admission
+from app.database import read_only_database
+from app.models import db
+from app.timeline import TimelineGenerator, render_timeline, timeline_cache, timeline_flight
+from app.timing import collect_timings, current_timings, record_count
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Worker process state
+_worker_app = None
+
+
+class RenderTimedOut(RenderOverloaded):
+    """A pool render took longer than RENDER_POOL_TIMEOUT (HTTP 503, like a full queue)"""
+
+
+def render_pool_size():
+    """Configured number of render processes (0: render in the web process)"""
+    return max(0, int(getattr(Config, 'RENDER_POOL_WORKERS', 0) or 0))
+
+
+def _init_worker():
+    global _worker_app
+    from app import create_app  # The web process imports this module while creating its app
+    _worker_app = create_app()
+
+
+def _render_job(start_year, end_year, region, enable_clustering, enable_spans):
+    with _worker_app.app_context(), read_only_database(), collect_timings() as timings:
+        generator = TimelineGenerator(db.session)
+        fig_json = render_timeline(generator, start_year, end_year, region,
+                                   enable_clustering=enable_clustering, enable_spans=enable_spans)
+        # Stage timings travel back to the requesting web process
+        return fig_json, timings.stages, timings.counts
+
+
+def get_render_pool():
+    """The process pool, started on first use, or None if disabled"""
+    global _pool
+    workers = render_pool_size()
+    if workers == 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker)
+        return _pool
+
+
+def shutdown_render_pool():
+    """Stop the worker processes (they are restarted on the next render)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_render_pool)
+
+
+def render_timeline_figure(generator, start_year, end_year, region=None, enable_clustering=True,
+                           enable_spans=False):
+    """
+    render_timeline() on the render pool if one is configured, else in this
+    process with the caller's generator.
+
+    A pool whose worker died is replaced, and that render runs in process.
+
+    Raises:
+        RenderTimedOut: If the pool render took longer than RENDER_POOL_TIMEOUT
+    """
+    pool = get_render_pool()
+    if pool is not None:
+        timeout = getattr(Config, 'RENDER_POOL_TIMEOUT', 60)
+        try:
+            future = pool.submit(_render_job, start_year, end_year, region, enable_clustering, enable_spans)
+            try:
+                fig_json, stages, counts = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                # Drops the job if no worker has started it; a running one finishes unobserved
+                future.cancel()
+                raise RenderTimedOut(f'Render took longer than {timeout}s',
+                                     getattr(Config, 'RENDER_RETRY_AFTER', 2))
+            timings = current_timings()
+            if timings is not None:
+                timings.merge(stages, counts)
+            return fig_json
+        except BrokenProcessPool as e:
+            print(f"Render pool failed, rendering in process: {e}")
+            shutdown_render_pool()
+    return render_timeline(generator, start_year, end_year, region,
+                           enable_clustering=enable_clustering, enable_spans=enable_spans)
+
+
+def timeline_cache_key(generation, start_year, end_year, region=None, enable_clustering=True, enable_spans=False):
+    """Response cache key of a timeline figure: data generation plus normalized request parameters"""
+    return (generation, start_year, end_year, enable_clustering, enable_spans,
+            region.cache_key() if region is not None else None)
+
+
+def cached_timeline_figure(generator, start_year, end_year, region=None, enable_clustering=True,
+                           enable_spans=False, client_id=None):
+    """
+    Timeline figure from the response cache, rendered on a miss.
+    
+    Identical misses arriving together wait for one render instead of each
+    running it. A new render needs a slot from render_admission (see
+    app/admission.py): the slot is taken inside the single-flight call, so
+    only its leader queues, and cache hits and requests joining a queued or
+    running render don't.
+    
+    Raises:
+        RenderOverloaded: If the render queue is full, or the render timed
+            out (RenderTimedOut)
+        RenderSuperseded: If client_id queued a newer render meanwhile
+    """
+    generation = generator.store.generation if generator.store is not None else None
+    cache_key = timeline_cache_key(generation, start_year, end_year, region, enable_clustering, enable_spans)
+    fig_json = timeline_cache.get(cache_key)
+    record_count('cache_hit', int(fig_json is not None))
+    if fig_json is not None:
+        return fig_json
+    
+    def render():
+        with render_admission.slot(client_id):
+            # Rendered while this request waited for a slot (already counted as a miss above)
+            result = timeline_cache.peek(cache_key)
+            if result is None:
+                result = render_timeline_figure(generator, start_year, end_year, region,
+                                                enable_clustering=enable_clustering, enable_spans=enable_spans)
+                timeline_cache.set(cache_key, result)
+            return result
+    
+    while True:
+        try:
+            return timeline_flight.do(cache_key, render)
+        except RenderSuperseded as e:
+            if client_id is not None and e.client_id == client_id:
+                raise
+            # Joined a render whose own client moved on: lead (or join) a fresh one
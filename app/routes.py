@@ -1,6 +1,9 @@
-from flask import Blueprint, render_template, jsonify, request, current_app
+from flask import Blueprint, render_template, jsonify, request, current_app, Response, stream_with_context
 import os
 import sys
+import json
+import base64
+import numpy as np
 import pandas as pd
 import uuid
 from datetime import datetime
@@ -14,7 +17,24 @@ except ImportError:
     from config import Config
 
 from app.timeline import TimelineGenerator
+from app.render_pool import cached_timeline_figure
+from app.cache_warmer import viewport_log
+from app.admission import RenderOverloaded, RenderSuperseded
 from app.models import db, TimelineEvent
+from app.database import read_only, read_only_database
+from app.event_store import bump_generation, get_event_store
+from app.geo_clusters import cached_geo_clusters
+from app.timing import timed
+from app.metrics import render_metrics
+from app.spatial_index import RadiusRegion
+from app.geometry import BBoxRegion, PolygonRegion, compact_geometry, simplified_geojson
+from app.search import faceted_search
+from app.typeahead import get_typeahead_index, note_event_writes
+from app.exporter import iter_export, EXPORT_FORMATS, ExportFormatError
+from app.import_jobs import (
+    ImportJobError, start_import_job, resume_import_job, cancel_import_job,
+    get_import_job, latest_import_job, active_import_job, job_to_dict
+)
 from sqlalchemy import text
 
 bp = Blueprint('main', __name__)
@@ -23,12 +43,36 @@ def get_timeline_generator():
     """Get timeline generator with current database session"""
     return TimelineGenerator(db.session)
 
+def parse_region_args(args):
+    """
+    Build the geographic filter region from request args, or None.
+    
+    Supported filters (first one present wins):
+      - filter_polygon: GeoJSON Polygon/MultiPolygon (or Feature) string
+      - filter_bbox: min_lon,min_lat,max_lon,max_lat
+      - filter_lat, filter_lon, filter_radius (km, default 500): circle
+    
+    Raises:
+        ValueError: If a filter parameter is malformed
+    """
+    if args.get('filter_polygon'):
+        return PolygonRegion.from_geojson(args['filter_polygon'])
+    if args.get('filter_bbox'):
+        return BBoxRegion.from_string(args['filter_bbox'])
+    filter_lat = args.get('filter_lat', type=float)
+    filter_lon = args.get('filter_lon', type=float)
+    filter_radius = args.get('filter_radius', type=float, default=500.0)
+    if filter_lat is not None and filter_lon is not None:
+        return RadiusRegion(filter_lat, filter_lon, filter_radius)
+    return None
+
 @bp.route('/')
 def index():
     """Main timeline page"""
     return render_template('index.html')
 
 @bp.route('/api/timeline')
+@read_only
 def get_timeline():
     """API endpoint to generate timeline figure"""
     start_year = request.args.get('start_year', type=int, default=0)
@@ -40,81 +84,63 @@ def get_timeline():
     # Get span rendering parameter (default: False)
     enable_spans = request.args.get('enable_spans', 'false').lower() == 'true'
     
-    # Get map filter parameters
-    filter_lat = request.args.get('filter_lat', type=float)
-    filter_lon = request.args.get('filter_lon', type=float)
-    filter_radius = request.args.get('filter_radius', type=float, default=500.0)  # km
+    # Get map filter parameters (radius, bbox or polygon)
+    try:
+        region = parse_region_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid location filter: {str(e)}'}), 400
+    
+    if region is None:
+        # Candidate for the cache warmer's most-requested viewports
+        viewport_log.record(start_year, end_year, enable_clustering, enable_spans)
     
     try:
         timeline_gen = get_timeline_generator()
-        
-        # Get count before generating figure
-        filtered_data = timeline_gen.get_filtered_data(start_year, end_year)
-        
-        # Apply location filter if provided
-        if filter_lat is not None and filter_lon is not None:
-            import math
-            # Filter events within radius (using Haversine formula for distance)
-            def haversine_distance(lat1, lon1, lat2, lon2):
-                """Calculate distance between two points in km"""
-                R = 6371  # Earth radius in km
-                dlat = math.radians(lat2 - lat1)
-                dlon = math.radians(lon2 - lon1)
-                a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
-                c = 2 * math.asin(math.sqrt(a))
-                return R * c
-            
-            # Filter events with valid lat/lon within radius
-            location_filtered = []
-            for _, row in filtered_data.iterrows():
-                if pd.notna(row.get('lat')) and pd.notna(row.get('lon')):
-                    distance = haversine_distance(filter_lat, filter_lon, row['lat'], row['lon'])
-                    if distance <= filter_radius:
-                        location_filtered.append(True)
-                    else:
-                        location_filtered.append(False)
-                else:
-                    location_filtered.append(False)
-            
-            filtered_data = filtered_data[location_filtered]
-        
-        event_count = len(filtered_data)
-        
-        # Update timeline generator's filtered data
-        timeline_gen.df = filtered_data
-        
-        fig_json = timeline_gen.make_figure_json(start_year, end_year, enable_clustering=enable_clustering, enable_spans=enable_spans)
-        
-        # Add metadata about event count
-        if 'layout' not in fig_json:
-            fig_json['layout'] = {}
-        if 'annotations' not in fig_json['layout']:
-            fig_json['layout']['annotations'] = []
-        
-        # Add annotation showing event count (will be added to layout)
-        total_events = len(timeline_gen._original_df) if hasattr(timeline_gen, '_original_df') and timeline_gen._original_df is not None else len(timeline_gen.df)
-        fig_json['_metadata'] = {
-            'total_events': total_events,
-            'filtered_events': event_count,
-            'start_year': start_year,
-            'end_year': end_year,
-            'location_filtered': filter_lat is not None and filter_lon is not None
-        }
-        
-        return jsonify(fig_json)
+        fig_json = cached_timeline_figure(timeline_gen, start_year, end_year, region,
+                                          enable_clustering=enable_clustering, enable_spans=enable_spans,
+                                          client_id=request.headers.get('X-Client-Id'))
+        
+        with timed('serialize'):
+            return jsonify(fig_json)
+    except RenderOverloaded as e:
+        response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+    except RenderSuperseded as e:
+        return jsonify({'error': str(e), 'superseded': True}), 409
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@bp.route('/metrics')
+@read_only
+def metrics():
+    """Prometheus metrics (text exposition format)"""
+    try:
+        return Response(render_metrics(db.session), content_type='text/plain; version=0.0.4; charset=utf-8')
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
 @bp.route('/api/data')
+@read_only
 def get_data():
     """API endpoint to get raw timeline data"""
     start_year = request.args.get('start_year', type=int, default=0)
     end_year = request.args.get('end_year', type=int, default=2025)
     
+    # Optional location filter (same parameters as /api/timeline)
+    try:
+        region = parse_region_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid location filter: {str(e)}'}), 400
+    
     try:
         timeline_gen = get_timeline_generator()
-        data = timeline_gen.get_filtered_data(start_year, end_year)
+        data = timeline_gen.get_filtered_data(start_year, end_year, region=region)
+        # Send the compact geometry encoding instead of raw GeoJSON
+        if 'geometry_compact' in data.columns:
+            data = data.drop(columns=['geometry']).rename(columns={'geometry_compact': 'geometry'})
         # Convert to dict, handling NaN values
         records = data.replace({pd.NA: None, pd.NaT: None}).to_dict('records')
         return jsonify({
@@ -125,6 +151,93 @@ def get_data():
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
+@bp.route('/api/geo-clusters')
+@read_only
+def get_geo_clusters():
+    """API endpoint returning grid-clustered event counts for the globe view"""
+    start_year = request.args.get('start_year', type=int, default=0)
+    end_year = request.args.get('end_year', type=int, default=2025)
+    zoom = request.args.get('zoom', type=int, default=2)
+    
+    # Optional visible map area
+    filter_bbox = request.args.get('filter_bbox')
+    try:
+        region = BBoxRegion.from_string(filter_bbox) if filter_bbox else None
+    except ValueError as e:
+        return jsonify({'error': f'Invalid bounding box: {str(e)}'}), 400
+    
+    try:
+        store = get_event_store(db.session)
+        return jsonify(cached_geo_clusters(store, start_year, end_year, zoom, filter_bbox, region))
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@bp.route('/api/events/typeahead', methods=['GET'])
+@read_only
+def typeahead_events():
+    """Search-box suggestions from the in-memory typeahead index"""
+    try:
+        query = request.args.get('q', '').strip()
+        limit = request.args.get('limit', type=int, default=10)
+        
+        results = []
+        for record, relevance in get_typeahead_index(db.session).search(query, limit):
+            event_dict = dict(record)
+            event_dict['relevance'] = relevance
+            results.append(event_dict)
+        
+        return jsonify({
+            'count': len(results),
+            'data': results
+        })
+    except Exception as e:
+        import traceback
+        db.session.rollback()
+        return jsonify({
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+@bp.route('/api/events/<event_id>/geometry')
+@read_only
+def get_event_geometry(event_id):
+    """
+    API endpoint returning one event's geometry simplified for a map zoom level.
+    
+    Query params: zoom (default 12, full detail) and format ('compact' for the
+    polyline encoding used in other payloads, or 'geojson').
+    """
+    zoom = request.args.get('zoom', type=int, default=12)
+    output_format = request.args.get('format', 'compact')
+    if output_format not in ('compact', 'geojson'):
+        return jsonify({'error': 'format must be "compact" or "geojson"'}), 400
+    
+    try:
+        event = TimelineEvent.query.filter_by(id=event_id).first()
+        if not event:
+            return jsonify({'error': f'Event with ID "{event_id}" not found'}), 404
+        if not event.geometry:
+            return jsonify({'error': f'Event "{event_id}" has no geometry'}), 404
+        
+        if output_format == 'geojson':
+            geometry = simplified_geojson(event.geometry, zoom)
+        else:
+            compact = compact_geometry(event.geometry, zoom)
+            geometry = json.loads(compact) if compact else None
+        if geometry is None:
+            return jsonify({'error': f'Event "{event_id}" has an invalid geometry'}), 422
+        
+        return jsonify({
+            'id': event.id,
+            'zoom': zoom,
+            'format': output_format,
+            'geometry': geometry
+        })
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
 @bp.route('/api/debug')
 def debug():
     """Debug endpoint to check data loading"""
@@ -197,100 +310,107 @@ def debug():
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
-@bp.route('/api/events', methods=['POST'])
-def add_event():
-    """Add a new event to the timeline"""
+def _parse_event_date(value):
+    """datetime.date from an event date string, or None if missing or invalid"""
+    if not value:
+        return None
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['title', 'category', 'start_year']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        # Generate ID if not provided
-        event_id = data.get('id') or f"event-{uuid.uuid4().hex[:8]}"
-        
-        # Check if ID already exists
-        existing = TimelineEvent.query.filter_by(id=event_id).first()
-        if existing:
-            return jsonify({'error': f'Event with ID "{event_id}" already exists'}), 400
-        
-        # Parse dates if provided
-        start_date = None
-        end_date = None
-        
-        if data.get('start_date'):
-            try:
-                start_date = pd.to_datetime(data['start_date'], errors='coerce')
-                if pd.notna(start_date):
-                    start_date = start_date.date()
-                else:
-                    start_date = None
-            except:
-                start_date = None
-        
-        if data.get('end_date'):
-            try:
-                end_date = pd.to_datetime(data['end_date'], errors='coerce')
-                if pd.notna(end_date):
-                    end_date = end_date.date()
-                else:
-                    end_date = None
-            except:
-                end_date = None
-        
-        # Validate location fields if provided
-        lat = None
-        lon = None
-        if 'lat' in data and data['lat'] is not None and data['lat'] != '':
-            try:
-                lat = float(data['lat'])
-                if lat < -90 or lat > 90:
-                    return jsonify({'error': 'Latitude must be between -90 and 90'}), 400
-            except (ValueError, TypeError):
-                return jsonify({'error': 'Invalid latitude value'}), 400
-        
-        if 'lon' in data and data['lon'] is not None and data['lon'] != '':
-            try:
-                lon = float(data['lon'])
-                if lon < -180 or lon > 180:
-                    return jsonify({'error': 'Longitude must be between -180 and 180'}), 400
-            except (ValueError, TypeError):
-                return jsonify({'error': 'Invalid longitude value'}), 400
-        
-        # Validate location_confidence
-        location_confidence = data.get('location_confidence', 'exact')
-        if location_confidence not in ['exact', 'approx', 'disputed']:
-            location_confidence = 'exact'
-        
-        # Create new event
-        new_event = TimelineEvent(
-            id=event_id,
+        parsed = pd.to_datetime(value, errors='coerce')
+        return parsed.date() if pd.notna(parsed) else None
+    except:
+        return None
+
+def build_event(data):
+    """
+    Validate new-event JSON and build the (unsaved) TimelineEvent.
+    
+    Shared by the single and batch add endpoints; does not check whether the
+    ID is already taken.
+    
+    Returns:
+        (event, None) if valid, or (None, error message)
+    """
+    if not isinstance(data, dict):
+        return None, 'Event must be a JSON object'
+    
+    # Validate required fields
+    required_fields = ['title', 'category', 'start_year']
+    for field in required_fields:
+        if field not in data or not data[field]:
+            return None, f'Missing required field: {field}'
+    
+    # Validate location fields if provided
+    lat = None
+    lon = None
+    if 'lat' in data and data['lat'] is not None and data['lat'] != '':
+        try:
+            lat = float(data['lat'])
+            if lat < -90 or lat > 90:
+                return None, 'Latitude must be between -90 and 90'
+        except (ValueError, TypeError):
+            return None, 'Invalid latitude value'
+    
+    if 'lon' in data and data['lon'] is not None and data['lon'] != '':
+        try:
+            lon = float(data['lon'])
+            if lon < -180 or lon > 180:
+                return None, 'Longitude must be between -180 and 180'
+        except (ValueError, TypeError):
+            return None, 'Invalid longitude value'
+    
+    # Validate location_confidence
+    location_confidence = data.get('location_confidence', 'exact')
+    if location_confidence not in ['exact', 'approx', 'disputed']:
+        location_confidence = 'exact'
+    
+    try:
+        event = TimelineEvent(
+            # Generate ID if not provided
+            id=data.get('id') or f"event-{uuid.uuid4().hex[:8]}",
             title=data['title'].strip(),
             category=data['category'].strip(),
             continent=data.get('continent', 'Global').strip(),
             start_year=int(data['start_year']),
             end_year=int(data.get('end_year', data['start_year'])),
             description=data.get('description', '').strip() or None,
-            start_date=start_date,
-            end_date=end_date,
+            start_date=_parse_event_date(data.get('start_date')),
+            end_date=_parse_event_date(data.get('end_date')),
             lat=lat,
             lon=lon,
             location_label=data.get('location_label', '').strip() or None,
             geometry=data.get('geometry', '').strip() or None,
             location_confidence=location_confidence
         )
+    except (ValueError, TypeError, AttributeError) as e:
+        return None, f'Invalid data: {str(e)}'
+    return event, None
+
+@bp.route('/api/events', methods=['POST'])
+def add_event():
+    """Add a new event to the timeline"""
+    try:
+        data = request.get_json()
+        
+        new_event, error = build_event(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # Check if ID already exists
+        existing = TimelineEvent.query.filter_by(id=new_event.id).first()
+        if existing:
+            return jsonify({'error': f'Event with ID "{new_event.id}" already exists'}), 400
         
         # Add to database
         db.session.add(new_event)
+        bump_generation(db.session)
         db.session.commit()
+        event_dict = new_event.to_dict(compact_geometry=True)
+        note_event_writes(db.session, upserts=[event_dict])
         
         return jsonify({
             'success': True,
             'message': 'Event added successfully',
-            'event': new_event.to_dict()
+            'event': event_dict
         }), 201
         
     except ValueError as e:
@@ -301,6 +421,78 @@ def add_event():
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
+def _batch_items(data, key):
+    """The list under key in a batch request body, or an error message"""
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, f'Request body must have a non-empty "{key}" list'
+    max_items = getattr(Config, 'EVENT_BATCH_MAX_SIZE', 1000)
+    if len(items) > max_items:
+        return None, f'At most {max_items} {key} per batch'
+    return items, None
+
+@bp.route('/api/events/batch', methods=['POST'])
+def add_events_batch():
+    """
+    Add several events in one transaction.
+    
+    Body: {"events": [...]}, each item validated like POST /api/events. Valid
+    items are saved together (one commit and one cache update); invalid ones,
+    including IDs that exist or repeat within the batch, are reported in the
+    per-item results and skipped.
+    """
+    try:
+        events_data, error = _batch_items(request.get_json(silent=True), 'events')
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # Validate everything first, then check all IDs with one query
+        built = [build_event(item) for item in events_data]
+        candidate_ids = [event.id for event, _ in built if event is not None]
+        existing = {
+            event_id for (event_id,) in
+            db.session.query(TimelineEvent.id).filter(TimelineEvent.id.in_(candidate_ids)).all()
+        } if candidate_ids else set()
+        
+        results = []
+        new_events = []
+        seen = set()
+        for index, (event, error) in enumerate(built):
+            if event is not None:
+                if event.id in existing:
+                    error = f'Event with ID "{event.id}" already exists'
+                elif event.id in seen:
+                    error = f'Event with ID "{event.id}" appears more than once in the batch'
+            if error:
+                item = events_data[index]
+                results.append({'index': index, 'id': item.get('id') if isinstance(item, dict) else None,
+                                'success': False, 'error': error})
+                continue
+            seen.add(event.id)
+            new_events.append(event)
+            results.append({'index': index, 'id': event.id, 'success': True})
+        
+        event_dicts = []
+        if new_events:
+            db.session.add_all(new_events)
+            bump_generation(db.session)
+            db.session.commit()
+            event_dicts = [event.to_dict(compact_geometry=True) for event in new_events]
+            note_event_writes(db.session, upserts=event_dicts)
+        
+        return jsonify({
+            'success': bool(new_events),
+            'created': len(new_events),
+            'failed': len(results) - len(new_events),
+            'results': results,
+            'events': event_dicts
+        }), 201 if new_events else 400
+        
+    except Exception as e:
+        db.session.rollback()
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
 @bp.route('/api/events/<event_id>', methods=['DELETE'])
 def delete_event(event_id):
     """Delete an event from the timeline"""
@@ -312,7 +504,9 @@ def delete_event(event_id):
         
         # Delete event
         db.session.delete(event)
+        bump_generation(db.session)
         db.session.commit()
+        note_event_writes(db.session, deletes=[event_id])
         
         return jsonify({
             'success': True,
@@ -324,12 +518,95 @@ def delete_event(event_id):
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
+@bp.route('/api/events/batch', methods=['DELETE'])
+def delete_events_batch():
+    """
+    Delete several events in one transaction.
+    
+    Body: {"ids": [...]}. Unknown IDs are reported as not found in the
+    per-item results; the rest are deleted with one statement and one commit.
+    """
+    try:
+        ids, error = _batch_items(request.get_json(silent=True), 'ids')
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # Type-check before hashing: a non-string id (e.g. an object) is a per-item error
+        wanted = list(dict.fromkeys(event_id for event_id in ids if isinstance(event_id, str)))
+        existing = {
+            event_id for (event_id,) in
+            db.session.query(TimelineEvent.id).filter(TimelineEvent.id.in_(wanted)).all()
+        } if wanted else set()
+        
+        results = []
+        for event_id in ids:
+            if not isinstance(event_id, str):
+                results.append({'id': event_id, 'success': False, 'error': 'id must be a string'})
+            elif event_id in existing:
+                results.append({'id': event_id, 'success': True})
+            else:
+                results.append({'id': event_id, 'success': False,
+                                'error': f'Event with ID "{event_id}" not found'})
+        
+        if existing:
+            TimelineEvent.query.filter(TimelineEvent.id.in_(existing)).delete(synchronize_session=False)
+            bump_generation(db.session)
+            db.session.commit()
+            note_event_writes(db.session, deletes=list(existing))
+        
+        return jsonify({
+            'success': bool(existing),
+            'deleted': len(existing),
+            'failed': len(results) - sum(1 for result in results if result['success']),
+            'results': results
+        }), 200 if existing else 404
+        
+    except Exception as e:
+        db.session.rollback()
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+def encode_page_cursor(start_year, event_id):
+    """Opaque cursor for the page after (start_year, event_id)"""
+    raw = json.dumps([start_year, event_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_page_cursor(cursor):
+    """
+    (start_year, event_id) from a cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        start_year, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return int(start_year), str(event_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
 @bp.route('/api/events', methods=['GET'])
+@read_only
 def list_events():
-    """Get list of all events (for management)"""
+    """
+    Get a page of events (for management), ordered by start_year then id.
+    
+    Keyset pagination: pass the returned next_cursor as cursor to get the
+    following page (null on the last page), so every page costs the same
+    however deep it is. limit sets the page size (default EVENTS_PAGE_SIZE).
+    The first page also carries total_estimate, the number of events in the
+    time window, counted from the in-memory interval index.
+    """
     try:
         start_year = request.args.get('start_year', type=int)
         end_year = request.args.get('end_year', type=int)
+        max_page_size = getattr(Config, 'EVENTS_PAGE_MAX_SIZE', 1000)
+        limit = request.args.get('limit', type=int, default=getattr(Config, 'EVENTS_PAGE_SIZE', 100))
+        limit = max(1, min(limit, max_page_size))
+        cursor = request.args.get('cursor')
+        try:
+            after = decode_page_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Check database connection
         try:
@@ -350,15 +627,35 @@ def list_events():
         if end_year is not None:
             query = query.filter(TimelineEvent.start_year <= end_year)
         
-        events = query.all()
+        # Resume after the last row of the previous page
+        if after is not None:
+            after_year, after_id = after
+            # start_year >= ... on its own lets the index seek straight to the page
+            query = query.filter(
+                TimelineEvent.start_year >= after_year,
+                db.or_(TimelineEvent.start_year > after_year, TimelineEvent.id > after_id)
+            )
+        
+        # One extra row tells whether another page follows
+        events = query.order_by(TimelineEvent.start_year, TimelineEvent.id).limit(limit + 1).all()
+        has_more = len(events) > limit
+        events = events[:limit]
         
         # Convert to dict
-        records = [event.to_dict() for event in events]
+        records = [event.to_dict(compact_geometry=True) for event in events]
         
-        return jsonify({
+        response = {
             'count': len(records),
-            'data': records
-        })
+            'data': records,
+            'next_cursor': encode_page_cursor(events[-1].start_year, events[-1].id) if has_more else None
+        }
+        if after is None:
+            store = get_event_store(db.session)
+            response['total_estimate'] = store.spatial_index.count(
+                start_year if start_year is not None else -np.inf,
+                end_year if end_year is not None else np.inf
+            )
+        return jsonify(response)
     except Exception as e:
         import traceback
         db.session.rollback()
@@ -369,11 +666,16 @@ def list_events():
 
 @bp.route('/api/import-csv', methods=['POST'])
 def import_csv():
-    """Import events from CSV file into database"""
+    """
+    Start a background import of the CSV file into the database.
+    
+    Returns 202 with the job id; poll /api/import-status?job_id=... for progress.
+    Pass clear=true to delete existing events first, or mode=sync to make the
+    database match the file (insert new rows, update changed ones, delete
+    rows the file no longer has).
+    """
     try:
         from config import Config
-        import pandas as pd
-        from datetime import datetime
         
         csv_path = Config.TIMELINE_DATA_FILE
         
@@ -384,136 +686,29 @@ def import_csv():
                 'hint': 'Make sure timeline_data_4.csv is in the repository root'
             }), 404
         
-        # Check if data already exists
-        existing_count = TimelineEvent.query.count()
-        if existing_count > 0:
-            # Check if user wants to overwrite (for web interface, we'll append by default)
-            # Or we can clear first - let's make it optional via query param
-            clear_existing = request.args.get('clear', 'false').lower() == 'true'
-            if clear_existing:
-                TimelineEvent.query.delete()
-                db.session.commit()
-        
-        # Read CSV
-        df = pd.read_csv(csv_path)
-        df = df.dropna(axis=1, how='all')  # Remove empty columns
-        
-        imported = 0
-        skipped = 0
-        errors = []
-        
-        for idx, row in df.iterrows():
-            try:
-                # Skip rows with missing required fields
-                if pd.isna(row.get('id')) or pd.isna(row.get('title')) or pd.isna(row.get('start_year')):
-                    skipped += 1
-                    continue
-                
-                # Check if event already exists
-                event_id = str(row['id']).strip()
-                existing = TimelineEvent.query.filter_by(id=event_id).first()
-                if existing:
-                    skipped += 1
-                    continue
-                
-                # Parse dates
-                start_date = None
-                end_date = None
-                
-                if 'start_date' in row and pd.notna(row['start_date']):
-                    try:
-                        start_date = pd.to_datetime(row['start_date'], errors='coerce')
-                        if pd.notna(start_date):
-                            start_date = start_date.date()
-                        else:
-                            start_date = None
-                    except:
-                        start_date = None
-                
-                if 'end_date' in row and pd.notna(row['end_date']):
-                    try:
-                        end_date = pd.to_datetime(row['end_date'], errors='coerce')
-                        if pd.notna(end_date):
-                            end_date = end_date.date()
-                        else:
-                            end_date = None
-                    except:
-                        end_date = None
-                
-                # Parse location fields if present
-                lat = None
-                lon = None
-                if 'lat' in row and pd.notna(row['lat']):
-                    try:
-                        lat = float(row['lat'])
-                        if lat < -90 or lat > 90:
-                            lat = None
-                    except (ValueError, TypeError):
-                        lat = None
-                
-                if 'lon' in row and pd.notna(row['lon']):
-                    try:
-                        lon = float(row['lon'])
-                        if lon < -180 or lon > 180:
-                            lon = None
-                    except (ValueError, TypeError):
-                        lon = None
-                
-                location_label = None
-                if 'location_label' in row and pd.notna(row['location_label']):
-                    location_label = str(row['location_label']).strip() or None
-                
-                geometry = None
-                if 'geometry' in row and pd.notna(row['geometry']):
-                    geometry = str(row['geometry']).strip() or None
-                
-                location_confidence = 'exact'
-                if 'location_confidence' in row and pd.notna(row['location_confidence']):
-                    conf = str(row['location_confidence']).strip().lower()
-                    if conf in ['exact', 'approx', 'disputed']:
-                        location_confidence = conf
-                
-                # Create event
-                event = TimelineEvent(
-                    id=event_id,
-                    title=str(row['title']).strip(),
-                    category=str(row.get('category', 'other')).strip(),
-                    continent=str(row.get('continent', 'Global')).strip(),
-                    start_year=int(row['start_year']),
-                    end_year=int(row.get('end_year', row['start_year'])),
-                    description=str(row.get('description', '')).strip() if pd.notna(row.get('description')) else None,
-                    start_date=start_date,
-                    end_date=end_date,
-                    lat=lat,
-                    lon=lon,
-                    location_label=location_label,
-                    geometry=geometry,
-                    location_confidence=location_confidence
-                )
-                
-                db.session.add(event)
-                imported += 1
-                
-                # Commit in batches
-                if imported % 50 == 0:
-                    db.session.commit()
-                    
-            except Exception as e:
-                errors.append(f"Row {idx + 2} (ID: {row.get('id', 'unknown')}): {str(e)}")
-                skipped += 1
-                continue
-        
-        # Final commit
-        db.session.commit()
+        # Append by default; clearing happens in the job, before the first chunk
+        clear_existing = request.args.get('clear', 'false').lower() == 'true'
+        mode = request.args.get('mode', 'append').lower()
+        if mode not in ('append', 'sync'):
+            return jsonify({'error': 'mode must be "append" or "sync"'}), 400
+        if mode == 'sync' and clear_existing:
+            return jsonify({'error': 'clear=true cannot be combined with mode=sync'}), 400
+        try:
+            job = start_import_job(current_app._get_current_object(), db.session, csv_path,
+                                   clear_existing, mode=mode)
+        except ImportJobError as e:
+            running = active_import_job(db.session)
+            return jsonify({
+                'error': str(e),
+                'job': job_to_dict(running) if running else None
+            }), 409
         
         return jsonify({
             'success': True,
-            'message': 'CSV import completed',
-            'imported': imported,
-            'skipped': skipped,
-            'errors': errors[:10] if errors else [],  # Limit errors shown
-            'total_errors': len(errors)
-        }), 200
+            'message': 'CSV import started',
+            'job_id': job.id,
+            'job': job_to_dict(job)
+        }), 202
         
     except Exception as e:
         db.session.rollback()
@@ -523,19 +718,57 @@ def import_csv():
             'traceback': traceback.format_exc()
         }), 500
 
+@bp.route('/api/export', methods=['GET'])
+@read_only
+def export_events():
+    """
+    Download every event as CSV, Parquet or Arrow (format=csv|parquet|arrow).
+    
+    The file is streamed batch by batch as rows are read from the database.
+    """
+    export_format = request.args.get('format', 'csv').lower()
+    try:
+        chunks = iter_export(db.session, export_format)
+    except ExportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        # Rows are read while streaming, after the view has returned
+        with read_only_database():
+            yield from chunks
+    
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=timeline_events_export.{extension}'}
+    )
+
 @bp.route('/api/import-status', methods=['GET'])
 def import_status():
-    """Check import status - how many events are in the database"""
+    """
+    Check import status - how many events are in the database, plus the
+    progress of the import job given by job_id (or of the latest job)
+    """
     try:
         total_events = TimelineEvent.query.count()
         from config import Config
         csv_exists = os.path.exists(Config.TIMELINE_DATA_FILE)
         
+        job_id = request.args.get('job_id')
+        if job_id:
+            job = get_import_job(db.session, job_id)
+            if job is None:
+                return jsonify({'error': f'Import job {job_id} not found'}), 404
+        else:
+            job = latest_import_job(db.session)
+        
         return jsonify({
             'total_events': total_events,
             'csv_file_exists': csv_exists,
             'csv_file_path': Config.TIMELINE_DATA_FILE if csv_exists else None,
-            'database_connected': True
+            'database_connected': True,
+            'job': job_to_dict(job) if job else None
         })
     except Exception as e:
         return jsonify({
@@ -544,56 +777,94 @@ def import_status():
             'database_connected': False
         }), 500
 
+@bp.route('/api/import-jobs/<job_id>/cancel', methods=['POST'])
+def cancel_import(job_id):
+    """Stop an import job after its current chunk"""
+    try:
+        if get_import_job(db.session, job_id) is None:
+            return jsonify({'error': f'Import job {job_id} not found'}), 404
+        try:
+            job = cancel_import_job(db.session, job_id)
+        except ImportJobError as e:
+            return jsonify({'error': str(e)}), 409
+        return jsonify({'success': True, 'job': job_to_dict(job)})
+    except Exception as e:
+        db.session.rollback()
+        import traceback
+        return jsonify({
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+@bp.route('/api/import-jobs/<job_id>/resume', methods=['POST'])
+def resume_import(job_id):
+    """Continue a cancelled, failed or interrupted import job from its last committed chunk"""
+    try:
+        if get_import_job(db.session, job_id) is None:
+            return jsonify({'error': f'Import job {job_id} not found'}), 404
+        try:
+            job = resume_import_job(current_app._get_current_object(), db.session, job_id)
+        except ImportJobError as e:
+            return jsonify({'error': str(e)}), 409
+        return jsonify({'success': True, 'job_id': job.id, 'job': job_to_dict(job)}), 202
+    except Exception as e:
+        db.session.rollback()
+        import traceback
+        return jsonify({
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
 @bp.route('/api/events/search', methods=['GET'])
+@read_only
 def search_events():
-    """Search events by title, description, or category"""
+    """
+    Search events by title, location, category, continent or description.
+    
+    Optional filters: start_year/end_year (events overlapping the window),
+    category and continent. The response includes the total number of matches
+    and per-facet counts.
+    """
     try:
         query = request.args.get('q', '').strip()
         limit = request.args.get('limit', type=int, default=10)
+        start_year = request.args.get('start_year', type=int)
+        end_year = request.args.get('end_year', type=int)
+        category = request.args.get('category', '').strip() or None
+        continent = request.args.get('continent', '').strip() or None
         
         if not query or len(query) < 2:
             return jsonify({
                 'count': 0,
-                'data': []
+                'total': 0,
+                'data': [],
+                'facets': {'category': {}, 'continent': {}}
             })
         
-        # Search in title, description, and category
-        search_pattern = f'%{query}%'
-        
-        events = TimelineEvent.query.filter(
-            db.or_(
-                TimelineEvent.title.ilike(search_pattern),
-                TimelineEvent.description.ilike(search_pattern),
-                TimelineEvent.category.ilike(search_pattern),
-                TimelineEvent.continent.ilike(search_pattern)
-            )
-        ).limit(limit).all()
+        # Ranked full-text search (see app/search.py) intersected with the filters, best match first
+        ranked, total, facets = faceted_search(
+            db.session, query, limit,
+            start_year=start_year, end_year=end_year, category=category, continent=continent
+        )
+        events = {
+            event.id: event
+            for event in TimelineEvent.query.filter(TimelineEvent.id.in_([event_id for event_id, _ in ranked])).all()
+        } if ranked else {}
         
-        # Convert to dict and add relevance score (simple: title matches are more relevant)
         results = []
-        for event in events:
-            event_dict = event.to_dict()
-            # Calculate simple relevance score
-            score = 0
-            title_lower = event.title.lower()
-            query_lower = query.lower()
-            if title_lower.startswith(query_lower):
-                score = 100
-            elif query_lower in title_lower:
-                score = 50
-            elif query_lower in (event.description or '').lower():
-                score = 25
-            else:
-                score = 10
-            event_dict['relevance'] = score
+        for event_id, relevance in ranked:
+            event = events.get(event_id)
+            if event is None:
+                continue
+            event_dict = event.to_dict(compact_geometry=True)
+            event_dict['relevance'] = round(relevance, 4)
             results.append(event_dict)
         
-        # Sort by relevance
-        results.sort(key=lambda x: x['relevance'], reverse=True)
-        
         return jsonify({
             'count': len(results),
-            'data': results
+            'total': total,
+            'data': results,
+            'facets': facets
         })
     except Exception as e:
         import traceback
@@ -0,0 +1,396 @@
+"""
+Search Module
+
+Full-text search over timeline events, ranked inside the database:
+
+- SQLite: an FTS5 table (timeline_events_fts) kept in sync with
+  timeline_events by triggers, ranked with weighted bm25.
+- PostgreSQL: a generated, weighted tsvector column with a GIN index,
+  ranked with ts_rank.
+- Anything else: ILIKE matching with the relevance computed in SQL, so the
+  LIMIT applies after ordering.
+
+Field weights: title > location label > category/continent > description.
+"""
+import re
+from contextlib import contextmanager
+from sqlalchemy import text, case, literal, func
+
+from app.models import db, TimelineEvent
+
+FTS_TABLE = 'timeline_events_fts'
+
+# bm25 weights, in FTS column order (title, location_label, category, continent, description)
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 2.0, 1.0)
+
+_SQLITE_SETUP = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, location_label, category, continent, description,
+        content='timeline_events', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS timeline_events_fts_insert AFTER INSERT ON timeline_events BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, location_label, category, continent, description)
+        VALUES (new.rowid, new.title, new.location_label, new.category, new.continent, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS timeline_events_fts_delete AFTER DELETE ON timeline_events BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, location_label, category, continent, description)
+        VALUES ('delete', old.rowid, old.title, old.location_label, old.category, old.continent, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS timeline_events_fts_update
+    AFTER UPDATE OF title, location_label, category, continent, description ON timeline_events BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, location_label, category, continent, description)
+        VALUES ('delete', old.rowid, old.title, old.location_label, old.category, old.continent, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, location_label, category, continent, description)
+        VALUES (new.rowid, new.title, new.location_label, new.category, new.continent, new.description);
+    END
+    """,
+]
+
+_POSTGRES_SETUP = [
+    """
+    ALTER TABLE timeline_events ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(location_label, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(category, '') || ' ' || coalesce(continent, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_timeline_events_search ON timeline_events USING GIN (search_vector)",
+]
+
+# Search backend per engine URL: 'fts5', 'tsvector' or 'like'
+_backends = {}
+
+
+def _dialect(session):
+    return session.get_bind().dialect.name
+
+
+def _fts_out_of_sync(session):
+    """
+    Whether the FTS table indexes different rowids than timeline_events has.
+
+    The index refers to events by their implicit rowid, which VACUUM may
+    renumber (the table has a string primary key). The docsize shadow table
+    holds one row per indexed rowid, so comparing rowid counts and sums is an
+    integer scan rather than a rebuild.
+    """
+    indexed = session.execute(text(f"SELECT count(*), coalesce(sum(id), 0) FROM {FTS_TABLE}_docsize")).one()
+    stored = session.execute(text("SELECT count(*), coalesce(sum(rowid), 0) FROM timeline_events")).one()
+    return tuple(indexed) != tuple(stored)
+
+
+def init_search_index(session):
+    """
+    Create the full-text index for the current database if it does not exist.
+
+    On SQLite the FTS table is filled from existing rows when it is created,
+    and rebuilt when its rowids no longer match the events table (e.g. after
+    a VACUUM). Falls back to ILIKE search if the database lacks full-text
+    support.
+    """
+    engine = session.get_bind()
+    dialect = engine.dialect.name
+    backend = 'like'
+    try:
+        if dialect == 'sqlite':
+            existed = session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE}
+            ).scalar() is not None
+            update_trigger = session.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'timeline_events_fts_update'")
+            ).scalar()
+            if update_trigger and 'UPDATE OF' not in update_trigger:
+                # Older definition fired on every update, including hash-only ones
+                session.execute(text("DROP TRIGGER timeline_events_fts_update"))
+            for statement in _SQLITE_SETUP:
+                session.execute(text(statement))
+            if not existed or _fts_out_of_sync(session):
+                session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            backend = 'fts5'
+        elif dialect == 'postgresql':
+            for statement in _POSTGRES_SETUP:
+                session.execute(text(statement))
+            backend = 'tsvector'
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Full-text search unavailable, using ILIKE search: {e}")
+        backend = 'like'
+    _backends[str(engine.url)] = backend
+    return backend
+
+
+def share_search_backend(engine, primary_engine):
+    """Use the primary's search backend for engine (a read replica of it)"""
+    if engine is not primary_engine:
+        _backends[str(engine.url)] = _backends.get(str(primary_engine.url), 'like')
+
+
+def rebuild_search_index(session):
+    """
+    Rebuild the SQLite FTS table from timeline_events (no-op elsewhere).
+
+    Run after a VACUUM of a live database; otherwise the next startup does it.
+    """
+    if _dialect(session) == 'sqlite':
+        session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        session.commit()
+
+
+@contextmanager
+def bulk_insert_indexing(session):
+    """
+    Index rows inserted inside the block with one statement instead of one
+    trigger call per row (SQLite FTS5 only; a no-op elsewhere).
+
+    The insert trigger is dropped and recreated within a savepoint of the
+    caller's transaction, so other connections never see it missing. If the
+    block raises, roll the session back to restore the trigger.
+    """
+    if search_backend(session) != 'fts5':
+        yield
+        return
+    connection = session.connection()
+    connection.exec_driver_sql("SAVEPOINT bulk_insert_indexing")
+    connection.exec_driver_sql("DROP TRIGGER IF EXISTS timeline_events_fts_insert")
+    # Read after taking the write lock, so every later rowid is ours
+    last_rowid = connection.exec_driver_sql("SELECT coalesce(max(rowid), 0) FROM timeline_events").scalar()
+    yield
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE}(rowid, title, location_label, category, continent, description) "
+        "SELECT rowid, title, location_label, category, continent, description "
+        "FROM timeline_events WHERE rowid > ?",
+        (last_rowid,)
+    )
+    connection.exec_driver_sql(_SQLITE_SETUP[1])
+    connection.exec_driver_sql("RELEASE bulk_insert_indexing")
+
+
+def search_backend(session):
+    """Name of the search backend in use for the session's database"""
+    return _backends.get(str(session.get_bind().url), 'like')
+
+
+def query_terms(query):
+    """Split a search string into lowercase word terms"""
+    return re.findall(r'\w+', query.lower())
+
+
+def _fts5_match(terms):
+    # Every term must match; each is a quoted prefix query so punctuation is inert
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _tsquery(terms):
+    return ' & '.join(f"{term}:*" for term in terms)
+
+
+def _filter_clause(start_year=None, end_year=None, category=None, continent=None):
+    """AND-ed SQL conditions on timeline_events e for the time window and facet filters"""
+    clause = ''
+    if end_year is not None:
+        clause += ' AND e.start_year <= :end_year'
+    if start_year is not None:
+        clause += ' AND e.end_year >= :start_year'
+    if category is not None:
+        clause += ' AND lower(e.category) = :category'
+    if continent is not None:
+        clause += ' AND lower(e.continent) = :continent'
+    return clause
+
+
+def _filter_params(start_year=None, end_year=None, category=None, continent=None):
+    return {
+        'start_year': start_year,
+        'end_year': end_year,
+        'category': category.lower() if category is not None else None,
+        'continent': continent.lower() if continent is not None else None,
+    }
+
+
+def _full_text_match(backend, terms):
+    """(FROM ... WHERE clause selecting matching events as e, relevance expression, params)"""
+    if backend == 'fts5':
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        return (
+            f"FROM {FTS_TABLE} JOIN timeline_events e ON e.rowid = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match",
+            f"-bm25({FTS_TABLE}, {weights})",
+            {'match': _fts5_match(terms)}
+        )
+    return (
+        "FROM timeline_events e, to_tsquery('simple', :tsquery) AS q WHERE e.search_vector @@ q",
+        "ts_rank(e.search_vector, q)",
+        {'tsquery': _tsquery(terms)}
+    )
+
+
+def search_event_ids(session, query, limit=10, start_year=None, end_year=None, category=None, continent=None):
+    """
+    Rank events matching a search string.
+
+    Args:
+        session: Database session
+        query: Search string; every word must match (as a prefix)
+        limit: Maximum number of results (None for all matches)
+        start_year, end_year: Optional time window; only events overlapping it
+            are ranked
+        category, continent: Optional exact (case-insensitive) filters
+
+    Returns:
+        List of (event_id, relevance) tuples, best match first
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    backend = search_backend(session)
+    if backend in ('fts5', 'tsvector'):
+        match_clause, relevance, params = _full_text_match(backend, terms)
+        params.update(_filter_params(start_year, end_year, category, continent), limit=limit)
+        rows = session.execute(
+            text(
+                f"SELECT e.id, {relevance} AS relevance {match_clause}" +
+                _filter_clause(start_year, end_year, category, continent) +
+                " ORDER BY relevance DESC, e.start_year" + (' LIMIT :limit' if limit is not None else '')
+            ),
+            params
+        ).all()
+    else:
+        rows = _like_search(session, query, limit, start_year, end_year, category, continent)
+    return [(row[0], float(row[1])) for row in rows]
+
+
+def search_facet_counts(session, query, start_year=None, end_year=None):
+    """
+    Matches of a search string counted per (category, continent) pair.
+
+    Args:
+        session: Database session
+        query: Search string, as for search_event_ids
+        start_year, end_year: Optional time window (events overlapping it match)
+
+    Returns:
+        List of (category, continent, category label, continent label, count)
+        tuples: category and continent lowercased (None if missing), labels as
+        stored
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    backend = search_backend(session)
+    if backend in ('fts5', 'tsvector'):
+        match_clause, _, params = _full_text_match(backend, terms)
+        params.update(_filter_params(start_year, end_year))
+        rows = session.execute(
+            text(
+                "SELECT lower(e.category), lower(e.continent), min(e.category), min(e.continent), count(*) "
+                f"{match_clause}" + _filter_clause(start_year, end_year) +
+                " GROUP BY lower(e.category), lower(e.continent)"
+            ),
+            params
+        ).all()
+    else:
+        category, continent = func.lower(TimelineEvent.category), func.lower(TimelineEvent.continent)
+        rows = _like_matches(session.query(
+            category, continent, func.min(TimelineEvent.category), func.min(TimelineEvent.continent), func.count()
+        ), query, start_year, end_year).group_by(category, continent).all()
+    return [tuple(row) for row in rows]
+
+
+def _like_matches(matches, query, start_year=None, end_year=None, category=None, continent=None):
+    """Restrict a TimelineEvent query to ILIKE matches of query within the filters"""
+    pattern = f'%{query}%'
+    matches = matches.filter(
+        db.or_(
+            TimelineEvent.title.ilike(pattern),
+            TimelineEvent.location_label.ilike(pattern),
+            TimelineEvent.description.ilike(pattern),
+            TimelineEvent.category.ilike(pattern),
+            TimelineEvent.continent.ilike(pattern)
+        )
+    )
+    if end_year is not None:
+        matches = matches.filter(TimelineEvent.start_year <= end_year)
+    if start_year is not None:
+        matches = matches.filter(TimelineEvent.end_year >= start_year)
+    if category is not None:
+        matches = matches.filter(func.lower(TimelineEvent.category) == category.lower())
+    if continent is not None:
+        matches = matches.filter(func.lower(TimelineEvent.continent) == continent.lower())
+    return matches
+
+
+def _like_search(session, query, limit, start_year=None, end_year=None, category=None, continent=None):
+    """ILIKE fallback, ranked in SQL: title prefix > title > location > description > other"""
+    pattern = f'%{query}%'
+    relevance = case(
+        (TimelineEvent.title.ilike(f'{query}%'), literal(100)),
+        (TimelineEvent.title.ilike(pattern), literal(50)),
+        (TimelineEvent.location_label.ilike(pattern), literal(40)),
+        (TimelineEvent.description.ilike(pattern), literal(25)),
+        else_=literal(10)
+    ).label('relevance')
+    matches = _like_matches(session.query(TimelineEvent.id, relevance), query,
+                            start_year, end_year, category, continent)
+    return matches.order_by(relevance.desc(), TimelineEvent.start_year).limit(limit).all()
+
+
+def faceted_search(session, query, limit=10, start_year=None, end_year=None, category=None, continent=None):
+    """
+    Ranked search restricted to a time window and category/continent, with
+    per-facet hit counts.
+
+    The window and facet filters are applied inside the ranking query, so
+    relevance is only computed for matches that pass them and the database
+    returns just the ranked page. Facet counts come from a separate grouped
+    count over the window's matches. Facets follow the usual convention:
+    each facet is counted with every filter applied except its own.
+
+    Args:
+        session: Database session
+        query: Search string
+        limit: Maximum number of results
+        start_year, end_year: Optional time window (events overlapping it match)
+        category, continent: Optional exact (case-insensitive) facet filters
+
+    Returns:
+        (ranked, total, facets): ranked is a list of (event_id, relevance) tuples,
+        total the number of matches after filtering, facets
+        {'category': {value: count}, 'continent': {value: count}}
+    """
+    facets = {'category': {}, 'continent': {}}
+    wanted_category = category.lower() if category else None
+    wanted_continent = continent.lower() if continent else None
+    labels = {'category': {}, 'continent': {}}
+    total = 0
+    for row_category, row_continent, category_label, continent_label, count in search_facet_counts(
+            session, query, start_year=start_year, end_year=end_year):
+        in_category = wanted_category is None or row_category == wanted_category
+        in_continent = wanted_continent is None or row_continent == wanted_continent
+        if in_continent and row_category:
+            label = labels['category'].setdefault(row_category, category_label)
+            facets['category'][label] = facets['category'].get(label, 0) + count
+        if in_category and row_continent:
+            label = labels['continent'].setdefault(row_continent, continent_label)
+            facets['continent'][label] = facets['continent'].get(label, 0) + count
+        if in_category and in_continent:
+            total += count
+    if not total:
+        return [], 0, facets
+
+    ranked = search_event_ids(session, query, limit=limit, start_year=start_year, end_year=end_year,
+                              category=wanted_category, continent=wanted_continent)
+    return ranked, total, facets
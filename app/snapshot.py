@@ -0,0 +1,135 @@
+"""
+Snapshot Module
+
+Optional on-disk copy of the prepared event DataFrame, so a starting (or
+recycled) worker loads the event store from a local file instead of
+querying and preparing every row.
+
+Snapshots are keyed by database and data generation: a file is only used when
+its key matches the generation row in the database, which is the one query a
+snapshot load makes. The first worker to load a new generation from the
+database writes its snapshot; later workers read that.
+
+Files are Arrow IPC (Feather); pyarrow is in requirements.txt. Without it,
+snapshots fall back to pandas pickles (row-wise, slower to load) and a
+warning is logged. Enable with EVENT_SNAPSHOT_DIR.
+"""
+import hashlib
+import logging
+import os
+import sys
+import threading
+import pandas as pd
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+logger = logging.getLogger('timetrip.snapshot')
+_pickle_warned = False
+
+from app.models import DataGeneration
+
+# Layout of the snapshot frame (prepare_events_frame's columns and dtypes).
+# Bump when that changes, so workers never load a snapshot written by older code.
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def snapshot_dir():
+    """Configured snapshot directory, or None if snapshots are disabled"""
+    return getattr(Config, 'EVENT_SNAPSHOT_DIR', None) or None
+
+
+def snapshot_key(session, generation):
+    """
+    File-name key for a database's data generation.
+
+    Includes the database URL and the generation row's timestamp, so a
+    recreated database that counts generations from zero again never matches
+    an old snapshot, and SNAPSHOT_FORMAT_VERSION, so a snapshot written by a
+    release with a different frame layout is never loaded.
+    """
+    url = session.get_bind().url.render_as_string(hide_password=True)
+    updated_at = session.query(DataGeneration.updated_at).filter_by(id=1).scalar()
+    digest = hashlib.sha1(f'{url}|{updated_at}'.encode('utf-8')).hexdigest()[:16]
+    return f'events-v{SNAPSHOT_FORMAT_VERSION}-{generation}-{digest}'
+
+
+def _extension():
+    global _pickle_warned
+    if feather is None and not _pickle_warned:
+        _pickle_warned = True
+        logger.warning("pyarrow is not installed: event snapshots use pandas pickles instead of "
+                       "Feather (pip install -r requirements.txt)")
+    return '.feather' if feather is not None else '.pkl'
+
+
+def snapshot_path(key, directory=None):
+    return os.path.join(directory or snapshot_dir(), key + _extension())
+
+
+def load_snapshot(key):
+    """Prepared events DataFrame for key, or None if there is no usable snapshot"""
+    directory = snapshot_dir()
+    if not directory:
+        return None
+    path = snapshot_path(key, directory)
+    if not os.path.exists(path):
+        return None
+    try:
+        if feather is not None:
+            return feather.read_feather(path, memory_map=True)
+        return pd.read_pickle(path)
+    except Exception as e:
+        print(f"Ignoring unreadable event snapshot {path}: {e}")
+        return None
+
+
+def write_snapshot(df, key):
+    """
+    Write df as the snapshot for key and delete older snapshots.
+
+    The file is written under a temporary name and renamed into place, so
+    readers never see a partial snapshot.
+    """
+    directory = snapshot_dir()
+    if not directory or df.empty:
+        return
+    path = snapshot_path(key, directory)
+    if os.path.exists(path):
+        return  # Another worker got there first
+    try:
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        if feather is not None:
+            feather.write_feather(df.reset_index(drop=True), temp_path)
+        else:
+            df.to_pickle(temp_path)
+        os.replace(temp_path, path)
+    except Exception as e:
+        print(f"Could not write event snapshot {path}: {e}")
+        return
+
+    # Only the current snapshot is ever loaded
+    for name in os.listdir(directory):
+        if name.startswith('events-') and name != os.path.basename(path) and not name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def write_snapshot_in_background(df, key):
+    """write_snapshot on a daemon thread, so the request that reloaded the store doesn't wait"""
+    if not snapshot_dir() or df.empty:
+        return
+    threading.Thread(target=write_snapshot, args=(df, key), name='event-snapshot', daemon=True).start()
@@ -0,0 +1,365 @@
+"""
+Spatiotemporal Index Module
+
+Joint index over (time interval, lat, lon) for "events in this region during
+this window" queries. Events are bucketed into a fixed-size lat/lon grid, and
+every grid cell (plus the table as a whole) keeps its events sorted by
+start_year and by end_year. An interval-overlap query is then two binary
+searches followed by a scan of whichever side is smaller, and the geographic
+and temporal constraints are intersected inside the index instead of one full
+scan after another.
+"""
+import math
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_CELL_DEGREES = 10.0
+
+
+def haversine_km(lat1, lon1, lats, lons):
+    """
+    Great-circle distance in km from one point to an array of points.
+
+    Args:
+        lat1, lon1: Reference point in degrees
+        lats, lons: numpy arrays of points in degrees
+
+    Returns:
+        numpy array of distances in km
+    """
+    lat1_r = math.radians(lat1)
+    lats_r = np.radians(lats)
+    dlat = lats_r - lat1_r
+    dlon = np.radians(lons - lon1)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1_r) * np.cos(lats_r) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def point_line_km(lat, lon, line):
+    """
+    Approximate distance in km from a point to the nearest segment of a line.
+
+    Uses a local equirectangular projection around the point, which is
+    accurate enough for radius filters of up to a few thousand km.
+
+    Args:
+        lat, lon: Point in degrees
+        line: numpy array of shape (N, 2) with [lon, lat] vertices
+    """
+    scale = math.cos(math.radians(lat))
+    xs = (line[:, 0] - lon) * scale
+    ys = line[:, 1] - lat
+    if len(line) == 1:
+        return float(np.hypot(xs, ys).min()) * math.pi / 180 * EARTH_RADIUS_KM
+    x1, y1, x2, y2 = xs[:-1], ys[:-1], xs[1:], ys[1:]
+    dx, dy = x2 - x1, y2 - y1
+    length_sq = dx * dx + dy * dy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(np.where(length_sq > 0, -(x1 * dx + y1 * dy) / length_sq, 0.0), 0.0, 1.0)
+    distances = np.hypot(x1 + t * dx, y1 + t * dy)
+    return float(distances.min()) * math.pi / 180 * EARTH_RADIUS_KM
+
+
+def split_lon_range(min_lat, max_lat, min_lon, max_lon):
+    """
+    Split bounds with unwrapped longitudes (as returned by region bounds())
+    into (min_lon, min_lat, max_lon, max_lat) boxes inside [-180, 180].
+    """
+    if max_lon - min_lon >= 360:
+        return [(-180.0, min_lat, 180.0, max_lat)]
+    boxes = []
+    if min_lon < -180:
+        boxes.append((min_lon + 360, min_lat, 180.0, max_lat))
+        min_lon = -180.0
+    if max_lon > 180:
+        boxes.append((-180.0, min_lat, max_lon - 360, max_lat))
+        max_lon = 180.0
+    boxes.append((min_lon, min_lat, max_lon, max_lat))
+    return boxes
+
+
+class RadiusRegion:
+    """Circular region: all points within radius_km of (lat, lon)"""
+
+    def __init__(self, lat, lon, radius_km):
+        self.lat = float(lat)
+        self.lon = float(lon)
+        self.radius_km = float(radius_km)
+
+    def cache_key(self):
+        """Hashable key identifying the region, for response caches"""
+        return ('radius', self.lat, self.lon, self.radius_km)
+
+    def bounds(self):
+        """
+        Bounding box of the circle as (min_lat, max_lat, min_lon, max_lon).
+
+        Longitudes are not wrapped, so min_lon may be < -180 or max_lon > 180
+        when the circle crosses the antimeridian.
+        """
+        angular = self.radius_km / EARTH_RADIUS_KM
+        dlat = math.degrees(angular)
+        min_lat = self.lat - dlat
+        max_lat = self.lat + dlat
+        if min_lat <= -90 or max_lat >= 90 or angular >= math.pi / 2:
+            # Circle reaches a pole: every longitude is in range
+            return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+        ratio = math.sin(angular) / math.cos(math.radians(self.lat))
+        if ratio >= 1:
+            return min_lat, max_lat, -180.0, 180.0
+        dlon = math.degrees(math.asin(ratio))
+        return min_lat, max_lat, self.lon - dlon, self.lon + dlon
+
+    def boxes(self):
+        """Bounds as boxes inside [-180, 180] (two when crossing the antimeridian)"""
+        return split_lon_range(*self.bounds())
+
+    def contains(self, lats, lons):
+        """Boolean mask of points inside the circle"""
+        return haversine_km(self.lat, self.lon, lats, lons) <= self.radius_km
+
+    def intersects(self, shape):
+        """True if a parsed geometry (see app.geometry) reaches into the circle"""
+        if shape.contains_points(np.array([self.lon]), np.array([self.lat])).any():
+            return True
+        if len(shape.points) and self.contains(shape.points[:, 1], shape.points[:, 0]).any():
+            return True
+        return any(point_line_km(self.lat, self.lon, line) <= self.radius_km for line in shape.outlines())
+
+
+class _IntervalList:
+    """Row positions sorted by start and by end, for interval-overlap queries"""
+
+    def __init__(self, positions, starts, ends):
+        by_start = np.argsort(starts, kind='stable')
+        self.start_positions = positions[by_start]
+        self.sorted_starts = starts[by_start]
+        self.ends_by_start = ends[by_start]
+
+        by_end = np.argsort(ends, kind='stable')
+        self.end_positions = positions[by_end]
+        self.sorted_ends = ends[by_end]
+        self.starts_by_end = starts[by_end]
+
+    @classmethod
+    def presorted(cls, start_positions, sorted_starts, ends_by_start, end_positions, sorted_ends, starts_by_end):
+        """Build from arrays that are already sorted (e.g. slices of a grouped sort)"""
+        interval_list = cls.__new__(cls)
+        interval_list.start_positions = start_positions
+        interval_list.sorted_starts = sorted_starts
+        interval_list.ends_by_start = ends_by_start
+        interval_list.end_positions = end_positions
+        interval_list.sorted_ends = sorted_ends
+        interval_list.starts_by_end = starts_by_end
+        return interval_list
+
+    def __len__(self):
+        return len(self.start_positions)
+
+    def _bounds(self, start_year, end_year):
+        # Prefix of the start-sorted list with start <= end_year, and suffix of
+        # the end-sorted list with end >= start_year
+        n_start = int(np.searchsorted(self.sorted_starts, end_year, side='right'))
+        first_end = int(np.searchsorted(self.sorted_ends, start_year, side='left'))
+        return n_start, first_end
+
+    def count(self, start_year, end_year):
+        """
+        Number of intervals overlapping [start_year, end_year].
+
+        Exact for well-formed intervals (start <= end); used for query planning.
+        """
+        n_start, first_end = self._bounds(start_year, end_year)
+        return max(0, n_start - first_end)
+
+    def query(self, start_year, end_year):
+        """Positions of intervals overlapping [start_year, end_year] (unordered)"""
+        n = len(self)
+        n_start, first_end = self._bounds(start_year, end_year)
+        if n_start <= n - first_end:
+            mask = self.ends_by_start[:n_start] >= start_year
+            return self.start_positions[:n_start][mask]
+        mask = self.starts_by_end[first_end:] <= end_year
+        return self.end_positions[first_end:][mask]
+
+
+class SpatiotemporalIndex:
+    """
+    Time-interval index combined with a lat/lon grid.
+
+    Positions returned by queries are integer row positions into the DataFrame
+    the index was built from (use with df.iloc).
+    """
+
+    # Per-cell binary searches cost roughly this many vectorized event checks
+    PER_CELL_COUNT_RATIO = 64
+
+    def __init__(self, df, cell_degrees=DEFAULT_CELL_DEGREES):
+        self.cell_degrees = float(cell_degrees)
+        self.n_rows = int(math.ceil(180.0 / self.cell_degrees))
+        self.n_cols = int(math.ceil(360.0 / self.cell_degrees))
+        self.size = len(df)
+        self._centroids = None
+
+        starts = self._column(df, 'start_year')
+        ends = self._column(df, 'end_year')
+        self.lats = self._column(df, 'lat')
+        self.lons = self._column(df, 'lon')
+
+        timed = ~np.isnan(starts) & ~np.isnan(ends)
+        positions = np.flatnonzero(timed)
+        self.all = _IntervalList(positions, starts[timed], ends[timed])
+
+        # Grid cell per row (-1 for rows without a usable location)
+        located = (
+            timed &
+            ~np.isnan(self.lats) & ~np.isnan(self.lons) &
+            (np.abs(self.lats) <= 90) & (np.abs(self.lons) <= 180)
+        )
+        self.cell_ids = np.full(self.size, -1, dtype=np.int64)
+        if located.any():
+            rows = np.minimum(((self.lats[located] + 90.0) // self.cell_degrees).astype(np.int64), self.n_rows - 1)
+            cols = ((self.lons[located] + 180.0) // self.cell_degrees).astype(np.int64) % self.n_cols
+            self.cell_ids[located] = rows * self.n_cols + cols
+
+        # Per-cell interval lists are slices of one sort grouped by cell
+        self.cells = {}
+        located_positions = np.flatnonzero(located)
+        if len(located_positions):
+            located_cells = self.cell_ids[located_positions]
+            located_starts = starts[located_positions]
+            located_ends = ends[located_positions]
+            by_start = np.lexsort((located_starts, located_cells))
+            by_end = np.lexsort((located_ends, located_cells))
+            start_positions = located_positions[by_start]
+            sorted_starts = located_starts[by_start]
+            ends_by_start = located_ends[by_start]
+            end_positions = located_positions[by_end]
+            sorted_ends = located_ends[by_end]
+            starts_by_end = located_starts[by_end]
+            cell_values, offsets = np.unique(located_cells[by_start], return_index=True)
+            offsets = np.append(offsets, len(located_positions))
+            for i, cell_id in enumerate(cell_values.tolist()):
+                lo, hi = offsets[i], offsets[i + 1]
+                self.cells[cell_id] = _IntervalList.presorted(
+                    start_positions[lo:hi], sorted_starts[lo:hi], ends_by_start[lo:hi],
+                    end_positions[lo:hi], sorted_ends[lo:hi], starts_by_end[lo:hi]
+                )
+
+    @staticmethod
+    def _column(df, name):
+        if name not in df.columns:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+    def cells_for_bounds(self, min_lat, max_lat, min_lon, max_lon):
+        """Ids of non-empty grid cells intersecting a lat/lon bounding box"""
+        row_lo = max(0, int((min_lat + 90.0) // self.cell_degrees))
+        row_hi = min(self.n_rows - 1, int((max_lat + 90.0) // self.cell_degrees))
+        if max_lon - min_lon >= 360:
+            cols = range(self.n_cols)
+        else:
+            col_lo = int(math.floor((min_lon + 180.0) / self.cell_degrees))
+            col_hi = int(math.floor((max_lon + 180.0) / self.cell_degrees))
+            cols = sorted({c % self.n_cols for c in range(col_lo, col_hi + 1)})
+        cell_ids = []
+        for row in range(row_lo, row_hi + 1):
+            for col in cols:
+                cell_id = row * self.n_cols + col
+                if cell_id in self.cells:
+                    cell_ids.append(cell_id)
+        return cell_ids
+
+    def count(self, start_year, end_year):
+        """Number of events overlapping the time window (O(log n))"""
+        return self.all.count(start_year, end_year)
+
+    def cell_bounds(self, cell_id):
+        """(min_lon, min_lat, max_lon, max_lat) of a grid cell"""
+        row, col = divmod(int(cell_id), self.n_cols)
+        min_lat = -90.0 + row * self.cell_degrees
+        min_lon = -180.0 + col * self.cell_degrees
+        return min_lon, min_lat, min(min_lon + self.cell_degrees, 180.0), min(min_lat + self.cell_degrees, 90.0)
+
+    def cell_centroids(self):
+        """Mean lat/lon of all located events per cell: dict cell_id -> (lat, lon)"""
+        if self._centroids is None:
+            located = self.cell_ids >= 0
+            cell_values, inverse = np.unique(self.cell_ids[located], return_inverse=True)
+            counts = np.bincount(inverse)
+            mean_lats = np.bincount(inverse, weights=self.lats[located]) / counts
+            mean_lons = np.bincount(inverse, weights=self.lons[located]) / counts
+            self._centroids = {
+                cell_id: (lat, lon)
+                for cell_id, lat, lon in zip(cell_values.tolist(), mean_lats.tolist(), mean_lons.tolist())
+            }
+        return self._centroids
+
+    def cell_counts(self, start_year, end_year, cell_ids=None):
+        """
+        Number of events overlapping the time window in each grid cell.
+
+        When the window holds many more events than there are cells, each cell
+        answers with two binary searches; otherwise the window is enumerated
+        once and binned.
+
+        Args:
+            start_year: Start of time window
+            end_year: End of time window
+            cell_ids: Optional subset of cells to count (default: all non-empty)
+
+        Returns:
+            dict mapping cell_id -> count (cells with no events omitted)
+        """
+        if cell_ids is None:
+            cell_ids = list(self.cells.keys())
+        if not cell_ids:
+            return {}
+
+        if len(cell_ids) * self.PER_CELL_COUNT_RATIO <= self.all.count(start_year, end_year):
+            counts = {cell_id: self.cells[cell_id].count(start_year, end_year) for cell_id in cell_ids}
+            return {cell_id: count for cell_id, count in counts.items() if count > 0}
+
+        positions = self.all.query(start_year, end_year)
+        binned = self.cell_ids[positions]
+        binned = binned[np.isin(binned, cell_ids)]
+        unique, counts = np.unique(binned, return_counts=True)
+        return {int(cell_id): int(count) for cell_id, count in zip(unique, counts)}
+
+    def query(self, start_year, end_year, region=None):
+        """
+        Find events overlapping [start_year, end_year], optionally within a region.
+
+        The cheaper side drives the query: when the region's grid cells hold
+        fewer events than the time window, each cell is searched by time;
+        otherwise the time window is enumerated and pruned by grid cell.
+        Candidates then get the region's exact containment test.
+
+        Args:
+            start_year: Start of time window
+            end_year: End of time window
+            region: Optional region with bounds() and contains(lats, lons)
+
+        Returns:
+            numpy array of row positions in ascending order
+        """
+        if region is None:
+            return np.sort(self.all.query(start_year, end_year))
+
+        cell_ids = self.cells_for_bounds(*region.bounds())
+        if not cell_ids:
+            return np.array([], dtype=np.int64)
+
+        geo_candidates = sum(len(self.cells[cell_id]) for cell_id in cell_ids)
+        time_candidates = self.all.count(start_year, end_year)
+
+        if geo_candidates <= time_candidates:
+            positions = np.concatenate([self.cells[cell_id].query(start_year, end_year) for cell_id in cell_ids])
+        else:
+            positions = self.all.query(start_year, end_year)
+            positions = positions[np.isin(self.cell_ids[positions], cell_ids)]
+
+        if len(positions):
+            positions = positions[region.contains(self.lats[positions], self.lons[positions])]
+        return np.sort(positions)
@@ -1,11 +1,21 @@
 import pandas as pd
+import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
+import multiprocessing
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from plotly.io.json import to_json_plotly
 from app.clustering import get_zoom_tier, should_cluster, cluster_events
-from app.span_packing import prepare_spans_and_points, should_render_as_span
+from app.span_packing import prepare_spans_and_points
+from app.event_store import get_event_store, prepare_events_frame
+from app.geometry import GeometryIndex
+from app.caching import LRUCache, SingleFlight
+from app.timing import add_timing, record_count, timed
 
 # Import config - handle both direct execution and Flask app context
 Config = None
@@ -25,6 +35,256 @@ except ImportError:
             CATEGORY_ORDER = ["era", "migration", "civilization", "empire", "war", "religion", "biblical"]
             TIMELINE_DATA_FILE = "timeline_data_4.csv"
 
+# Rendered /api/timeline figures, keyed by (generation, normalized request parameters)
+timeline_cache = LRUCache(max_entries=getattr(Config, 'TIMELINE_CACHE_SIZE', 32))
+# Concurrent renders of the same key run once
+timeline_flight = SingleFlight()
+
+TRACE_COLORS = px.colors.qualitative.Set3
+
+# Columns the per-category trace builder reads
+CATEGORY_COLUMNS = ['id', 'title', 'category', 'continent', 'start_year', 'end_year', 'year', 'description',
+                    'start_date', 'end_date', 'lat', 'lon', 'location_label', 'geometry_compact',
+                    'location_confidence', 'is_cluster', 'cluster_id']
+
+# Views with fewer rows are built in the request thread (pool overhead would dominate)
+CATEGORY_PARALLEL_MIN_ROWS = 1000
+
+_category_pool = None
+_category_pool_lock = threading.Lock()
+
+
+def category_columns(df):
+    """CATEGORY_COLUMNS present in df"""
+    return [column for column in CATEGORY_COLUMNS if column in df.columns]
+
+
+def _format_date(value):
+    if pd.notna(value):
+        try:
+            return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+        except:
+            return None
+    return None
+
+
+def _hover_text(row):
+    """Hover text for an event (or cluster) record"""
+    if row.get('is_cluster', False):
+        # Cluster hover shows count and category
+        parts = [f"<b>Cluster: {row.get('title', 'N/A')}</b>"]
+        parts.append(f"Category: {row.get('category', 'N/A')}")
+        parts.append(f"Time: {int(row.get('start_year', 0)):,} - {int(row.get('end_year', 0)):,}")
+        parts.append("<br><i>Click to expand and view events</i>")
+    else:
+        parts = [f"<b>{row.get('title', 'N/A')}</b>"]
+        if pd.notna(row.get('start_year')):
+            parts.append(f"Start: {int(row['start_year']):,}")
+        if pd.notna(row.get('end_year')) and row.get('end_year') != row.get('start_year'):
+            parts.append(f"End: {int(row['end_year']):,}")
+        if pd.notna(row.get('continent')):
+            parts.append(f"Continent: {row['continent']}")
+        if pd.notna(row.get('description')):
+            desc = str(row['description'])[:150]  # Limit description length
+            if len(str(row['description'])) > 150:
+                desc += "..."
+            parts.append(f"<br><i>{desc}</i>")
+    return "<br>".join(parts)
+
+
+def _customdata(row):
+    """
+    Click payload for an event record: [id, title, category, continent, start_year, end_year,
+    start_date, end_date, description, lat, lon, location_label, geometry, location_confidence,
+    is_cluster, cluster_id]
+    """
+    lat = row.get('lat') if pd.notna(row.get('lat')) else None
+    lon = row.get('lon') if pd.notna(row.get('lon')) else None
+    return [
+        str(row.get('id', '')),
+        str(row.get('title', 'Unknown')),
+        str(row.get('category', 'N/A')),
+        str(row.get('continent', 'N/A')),
+        int(row['start_year']) if pd.notna(row.get('start_year')) else None,
+        int(row['end_year']) if pd.notna(row.get('end_year')) else None,
+        _format_date(row.get('start_date')),
+        _format_date(row.get('end_date')),
+        str(row.get('description', '')) if pd.notna(row.get('description')) else '',
+        float(lat) if lat is not None else None,
+        float(lon) if lon is not None else None,
+        str(row.get('location_label', '')) if pd.notna(row.get('location_label')) else None,
+        # Compact (polyline-encoded, simplified) geometry; raw GeoJSON stays in the database
+        str(row.get('geometry_compact')) if pd.notna(row.get('geometry_compact')) else None,
+        str(row.get('location_confidence', 'exact')) if pd.notna(row.get('location_confidence')) else 'exact',
+        row.get('is_cluster', False),
+        row.get('cluster_id', None),
+    ]
+
+
+def build_category_traces(cat_data, cat, idx, base_y, time_range, enable_spans):
+    """
+    Row-1 (numeric years) traces for one category: a line per span (stacked
+    into lanes), one marker trace for points and one for clusters.
+    
+    A pure function of its arguments, so categories can be built in parallel;
+    traces are returned as plotly JSON (as fig.to_json() would write them),
+    which skips plotly's per-trace validation and pickles cheaply.
+    
+    Args:
+        cat_data: The category's rows (CATEGORY_COLUMNS)
+        cat: Category name
+        idx: Category position (picks the color; the first category owns the span legend entry)
+        base_y: Numeric y-position of the category
+        time_range: Visible time range, for span decisions
+        enable_spans: Whether events with duration render as spans
+    
+    Returns:
+        (traces_json, lanes, lane_pack_seconds): JSON list of trace dicts, the
+        number of span lanes used, and the time spent packing them
+    """
+    lane_offset = 0.15  # Vertical offset per lane (as fraction of category spacing)
+    color = TRACE_COLORS[idx % len(TRACE_COLORS)]
+    
+    # Pack spans into lanes (if spans enabled)
+    lanes = 0
+    span_lanes = {}
+    pack_start = time.perf_counter()
+    if enable_spans:
+        spans_data, _, _ = prepare_spans_and_points(cat_data, time_range, cat)
+        if spans_data:
+            lanes = max((s.get('lane', 0) for s in spans_data), default=0) + 1
+        for span in spans_data:
+            span_lanes.setdefault(span['index'], span['lane'])
+    lane_pack_seconds = time.perf_counter() - pack_start
+    
+    records = cat_data.to_dict('records')
+    hover_texts = [_hover_text(row) for row in records]
+    customdata = [_customdata(row) for row in records]
+    
+    traces = []
+    point_positions = []
+    cluster_positions = []
+    for position, (label, row) in enumerate(zip(cat_data.index, records)):
+        if row.get('is_cluster', False):
+            cluster_positions.append(position)
+            continue
+        lane = span_lanes.get(label)
+        if lane is None:
+            point_positions.append(position)
+            continue
+        # Span as a horizontal line, offset by its lane
+        y_pos = base_y + (lane * lane_offset)
+        trace = {
+            'type': 'scatter',
+            'x': [row['start_year'], row['end_year']],
+            'y': [y_pos, y_pos],
+            'mode': 'lines+markers',  # Markers at endpoints for better clickability
+            'showlegend': lane == 0 and idx == 0,  # Only show legend for first span trace
+            'line': {'width': 4, 'color': color},
+            'marker': {'size': 6, 'color': color, 'opacity': 0.7},
+            'hoverinfo': 'text',
+            'text': [hover_texts[position]] * 2,
+            'customdata': [customdata[position]] * 2,
+            'hovertemplate': '%{text}<br>Start: %{x:,}<br>End: %{x:,}<extra></extra>',
+            'fill': 'none',
+            'xaxis': 'x',
+            'yaxis': 'y',
+        }
+        if lane == 0:
+            trace['name'] = f"{cat} span"
+        traces.append(trace)
+    
+    # Points for instant events
+    if point_positions:
+        point_years = []
+        for position in point_positions:
+            row = records[position]
+            if 'year' in row and pd.notna(row['year']):
+                point_years.append(row['year'])
+            elif pd.notna(row.get('start_year')):
+                point_years.append(row['start_year'])
+            else:
+                point_years.append(None)
+        traces.append({
+            'type': 'scatter',
+            'x': point_years,
+            'y': [base_y] * len(point_positions),
+            'mode': 'markers',
+            'name': str(cat),
+            'marker': {'size': 10, 'color': color, 'line': {'width': 1, 'color': "rgba(255, 255, 255, 0.3)"},
+                       'opacity': 0.85},
+            'text': [hover_texts[position] for position in point_positions],
+            'customdata': [customdata[position] for position in point_positions],
+            'hovertemplate': '%{text}<br>Year: %{x:,}<extra></extra>',
+            'xaxis': 'x',
+            'yaxis': 'y',
+        })
+    
+    # Clusters (larger, different style)
+    if cluster_positions:
+        traces.append({
+            'type': 'scatter',
+            'x': [records[position]['year'] for position in cluster_positions],
+            'y': [base_y] * len(cluster_positions),
+            'mode': 'markers',
+            'name': f"{cat} (clusters)",
+            'marker': {'size': 16, 'color': color, 'line': {'width': 2, 'color': "rgba(255, 215, 0, 0.8)"},
+                       'opacity': 0.9, 'symbol': 'diamond'},
+            'text': [hover_texts[position] for position in cluster_positions],
+            'customdata': [customdata[position] for position in cluster_positions],
+            'hovertemplate': '%{text}<br>Year: %{x:,}<br><i>Click to expand cluster</i><extra></extra>',
+            'xaxis': 'x',
+            'yaxis': 'y',
+        })
+    
+    return to_json_plotly(traces), lanes, lane_pack_seconds
+
+
+def get_category_pool():
+    """
+    Pool building categories in parallel, or None (TIMELINE_CATEGORY_WORKERS = 0).
+    
+    TIMELINE_CATEGORY_POOL picks 'process' (trace building is mostly Python,
+    so threads would share one core under the GIL) or 'thread'.
+    """
+    global _category_pool
+    workers = int(getattr(Config, 'TIMELINE_CATEGORY_WORKERS', 0) or 0)
+    if workers <= 0:
+        return None
+    with _category_pool_lock:
+        if _category_pool is None:
+            if getattr(Config, 'TIMELINE_CATEGORY_POOL', 'process') == 'thread':
+                _category_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='timeline-category')
+            else:
+                _category_pool = ProcessPoolExecutor(max_workers=workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+        return _category_pool
+
+
+def map_categories(jobs):
+    """
+    build_category_traces() for each job (an argument tuple), in job order.
+    
+    Runs on the category pool when one is configured and the view is large
+    enough to be worth it, else in the calling thread.
+    """
+    global _category_pool
+    pool = None
+    if len(jobs) > 1 and sum(len(job[0]) for job in jobs) >= CATEGORY_PARALLEL_MIN_ROWS:
+        pool = get_category_pool()
+    if pool is not None:
+        try:
+            # Largest categories first, so one big category doesn't start last
+            order = sorted(range(len(jobs)), key=lambda i: -len(jobs[i][0]))
+            futures = {i: pool.submit(build_category_traces, *jobs[i]) for i in order}
+            return [futures[i].result() for i in range(len(jobs))]
+        except BrokenProcessPool as e:
+            print(f"Category pool failed, building traces in process: {e}")
+            with _category_pool_lock:
+                _category_pool = None
+    return [build_category_traces(*job) for job in jobs]
+
+
 class TimelineGenerator:
     """Generates timeline visualizations from database"""
     
@@ -45,6 +305,7 @@ class TimelineGenerator:
         """Load and prepare data from database"""
         # Store original dataframe for reference
         self._original_df = None
+        self.store = None
         if self.db_session is None:
             # Fallback: try to load from CSV if database not available
             try:
@@ -57,96 +318,69 @@ class TimelineGenerator:
             except Exception as e:
                 print(f"Error loading CSV fallback: {e}")
                 df = pd.DataFrame()
+            self.df = prepare_events_frame(df)
         else:
-            # Load from database
-            from app.models import TimelineEvent
-            events = self.db_session.query(TimelineEvent).all()
-            
-            if not events:
-                df = pd.DataFrame()
-            else:
-                # Convert to list of dicts
-                data = [event.to_dict() for event in events]
-                df = pd.DataFrame(data)
-                
-                # Store original for reference
-                self._original_df = df.copy()
-                
-                # Debug: log data loading
-                print(f"DEBUG: Loaded {len(df)} events from database")
-                if not df.empty:
-                    print(f"DEBUG: Columns: {list(df.columns)}")
-                    print(f"DEBUG: Sample start_year: {df['start_year'].head(3).tolist() if 'start_year' in df.columns else 'N/A'}")
-        
-        if df.empty:
-            # Return empty dataframe with expected columns
-            df = pd.DataFrame(columns=['id', 'title', 'category', 'continent', 'start_year', 'end_year', 'description', 'start_date', 'end_date'])
-        
-        # Ensure year columns exist and are numeric
-        if not df.empty:
-            if 'start_year' in df.columns:
-                df["start_year"] = pd.to_numeric(df["start_year"], errors='coerce')
-            else:
-                df["start_year"] = None
-                
-            if 'end_year' in df.columns:
-                df["end_year"] = pd.to_numeric(df["end_year"], errors='coerce')
-            else:
-                df["end_year"] = None
-            
-            # Convenience column for numeric plotting
-            df["year"] = df["start_year"]
-        else:
-            # Empty dataframe - set default columns
-            df["start_year"] = None
-            df["end_year"] = None
-            df["year"] = None
-        
-        # Parse dates where possible; out-of-range or invalid => NaT
-        if "start_date" in df.columns:
-            df["start_date"] = pd.to_datetime(df["start_date"], errors="coerce")
-        else:
-            df["start_date"] = pd.NaT
-            
-        if "end_date" in df.columns:
-            df["end_date"] = pd.to_datetime(df["end_date"], errors="coerce")
-        else:
-            df["end_date"] = pd.NaT
-        
-        # Category order - include all categories found in data, not just predefined ones
-        if "category" in df.columns and not df.empty:
-            try:
-                # Get all unique categories from the data
-                data_categories = df["category"].dropna().unique().tolist()
-                # Combine with predefined order, keeping order but adding any missing categories
-                category_order = getattr(Config, 'CATEGORY_ORDER', ["era", "migration", "civilization", "empire", "war", "religion", "biblical"])
-                all_categories = [cat for cat in category_order if cat in data_categories]
-                # Add any categories in data that aren't in the predefined order
-                for cat in data_categories:
-                    if cat not in all_categories:
-                        all_categories.append(cat)
-                # Set as categorical with all categories
-                df["category"] = pd.Categorical(df["category"], categories=all_categories, ordered=True)
-            except Exception as e:
-                print(f"Error setting category order: {e}")
-                # If categorical fails, just keep as string
-                pass
-        
-        self.df = df
+            # Load from the shared in-memory store (reloaded when the database changes)
+            with timed('load'):
+                self.store = get_event_store(self.db_session)
+            self.df = self.store.df
+            if not self.df.empty:
+                self._original_df = self.store.df
     
-    def get_filtered_data(self, start_year, end_year):
-        """Get filtered data for the given year range"""
+    def _get_indexes(self):
+        """Store indexes (spatial, geometry) for self.df, or (None, None) if self.df is not the store's frame"""
+        if self.store is not None and self.df is self.store.df:
+            return self.store.spatial_index, self.store.geometry_index
+        return None, None
+    
+    def get_filtered_data(self, start_year, end_year, region=None):
+        """
+        Get filtered data for the given year range.
+        
+        Args:
+            start_year: Start of time window
+            end_year: End of time window
+            region: Optional region (RadiusRegion, BBoxRegion or PolygonRegion).
+                Events match if their lat/lon point lies inside it or their
+                geometry intersects it.
+        """
         if self.df.empty or 'start_year' not in self.df.columns or 'end_year' not in self.df.columns:
             return pd.DataFrame()
         
-        # Handle NaN values in year columns
-        mask = (
-            (self.df["end_year"].notna()) & 
-            (self.df["start_year"].notna()) &
-            (self.df["end_year"] >= start_year) & 
-            (self.df["start_year"] <= end_year)
-        )
-        return self.df[mask].copy()
+        spatial_index, geometry_index = self._get_indexes()
+        if spatial_index is not None:
+            # The index intersects time window and region in one query
+            with timed('geo_filter' if region is not None else 'filter'):
+                positions = spatial_index.query(start_year, end_year, region)
+                if region is not None:
+                    shape_positions = geometry_index.query(start_year, end_year, region)
+                    positions = np.union1d(positions, shape_positions)
+                return self.df.iloc[positions].copy()
+        
+        with timed('filter'):
+            # Handle NaN values in year columns
+            mask = (
+                (self.df["end_year"].notna()) & 
+                (self.df["start_year"].notna()) &
+                (self.df["end_year"] >= start_year) & 
+                (self.df["start_year"] <= end_year)
+            )
+        if region is not None:
+            with timed('geo_filter'):
+                inside = np.zeros(len(self.df), dtype=bool)
+                if 'lat' in self.df.columns and 'lon' in self.df.columns:
+                    lats = pd.to_numeric(self.df['lat'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                    lons = pd.to_numeric(self.df['lon'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                    located = ~np.isnan(lats) & ~np.isnan(lons)
+                    inside[located] = region.contains(lats[located], lons[located])
+                if 'geometry' in self.df.columns:
+                    # Only parse geometries of events already inside the time window
+                    candidates = np.flatnonzero(mask.to_numpy() & self.df['geometry'].notna().to_numpy())
+                    matched = GeometryIndex(self.df.iloc[candidates]).query(start_year, end_year, region)
+                    inside[candidates[matched]] = True
+                mask &= inside
+        with timed('filter'):
+            return self.df[mask].copy()
     
     def make_figure_json(self, start_year, end_year, enable_clustering=True, enable_spans=True):
         """
@@ -162,10 +396,7 @@ class TimelineGenerator:
         """
         # Filter by overlap in numeric years
         df_filtered = self.get_filtered_data(start_year, end_year)
-        
-        # Debug: log how many events we have
-        print(f"DEBUG: Total events in dataset: {len(self.df)}")
-        print(f"DEBUG: Events in filtered range ({start_year} to {end_year}): {len(df_filtered)}")
+        record_count('events_in', len(df_filtered))
         
         # Determine zoom tier and apply clustering if needed
         time_range = end_year - start_year
@@ -175,11 +406,9 @@ class TimelineGenerator:
         if enable_clustering and not df_filtered.empty:
             should_cluster_events = should_cluster(tier, len(df_filtered), time_range)
             if should_cluster_events:
-                print(f"DEBUG: Clustering enabled for tier {tier} (range: {time_range:,} years)")
-                df_filtered, cluster_info = cluster_events(df_filtered, start_year, end_year, tier, enable_clustering)
-                print(f"DEBUG: After clustering: {len(df_filtered)} markers (clusters + individual events)")
-            else:
-                print(f"DEBUG: Clustering not needed (tier {tier}, {len(df_filtered)} events)")
+                with timed('cluster'):
+                    df_filtered, cluster_info = cluster_events(df_filtered, start_year, end_year, tier, enable_clustering)
+        record_count('markers_out', len(df_filtered))
         
         # Check if we have data
         if df_filtered.empty:
@@ -233,8 +462,6 @@ class TimelineGenerator:
         # Remove rows with missing year data
         df_plot = df_filtered.dropna(subset=['year']).copy()
         
-        print(f"DEBUG: Events after dropping NaN years: {len(df_plot)}")
-        
         # Handle missing categories - convert to string first to avoid Categorical issues
         if 'category' in df_plot.columns:
             # Convert categorical to string to avoid issues with adding new categories
@@ -243,9 +470,6 @@ class TimelineGenerator:
             # Fill any NaN values (which are now 'nan' strings) with a default
             df_plot['category'] = df_plot['category'].replace('nan', 'other').fillna('other')
         
-        print(f"DEBUG: Final events to plot: {len(df_plot)}")
-        print(f"DEBUG: Categories in plot: {df_plot['category'].value_counts().to_dict()}")
-        
         if df_plot.empty:
             # If no valid data after dropping NaN, return empty figure
             fig = make_subplots(
@@ -278,7 +502,6 @@ class TimelineGenerator:
         # Group by category to create separate traces with proper colors
         # Get unique categories and assign colors
         categories = df_plot['category'].unique()
-        colors = px.colors.qualitative.Set3  # Use a color palette
         
         # Create category to numeric y-position mapping (for lane offsets)
         category_to_y = {cat: idx for idx, cat in enumerate(categories)}
@@ -291,248 +514,22 @@ class TimelineGenerator:
         # Track maximum lanes needed across all categories for y-axis range
         max_lanes = 0
         
-        # Create a trace for each category to ensure all points are included
-        for idx, cat in enumerate(categories):
-            cat_data = df_plot[df_plot['category'] == cat].copy()
-            
-            # Separate spans and points, and pack spans into lanes (if spans enabled)
-            if enable_spans:
-                spans_data, points_df, lane_assignments = prepare_spans_and_points(cat_data, time_range, cat)
-                # Track maximum lanes for this category
-                if spans_data:
-                    max_lanes_for_cat = max((s.get('lane', 0) for s in spans_data), default=0) + 1
-                    max_lanes = max(max_lanes, max_lanes_for_cat)
-            else:
-                # If spans disabled, treat all events as points
-                spans_data = []
-                points_df = cat_data.copy()
-                lane_assignments = {}
-            
-            # Prepare hover text and customdata for all events (spans and points)
-            hover_templates = []
-            customdata_list = []
-            
-            for _, row in cat_data.iterrows():
-                # Check if this is a cluster
-                is_cluster = row.get('is_cluster', False)
-                
-                # Hover text
-                if is_cluster:
-                    # Cluster hover shows count and category
-                    event_count = row.get('title', '').replace(' events', '').replace('events', '').strip()
-                    parts = [f"<b>Cluster: {row.get('title', 'N/A')}</b>"]
-                    parts.append(f"Category: {row.get('category', 'N/A')}")
-                    parts.append(f"Time: {int(row.get('start_year', 0)):,} - {int(row.get('end_year', 0)):,}")
-                    parts.append("<br><i>Click to expand and view events</i>")
-                else:
-                    parts = [f"<b>{row.get('title', 'N/A')}</b>"]
-                    if pd.notna(row.get('start_year')):
-                        parts.append(f"Start: {int(row['start_year']):,}")
-                    if pd.notna(row.get('end_year')) and row.get('end_year') != row.get('start_year'):
-                        parts.append(f"End: {int(row['end_year']):,}")
-                    if pd.notna(row.get('continent')):
-                        parts.append(f"Continent: {row['continent']}")
-                    if pd.notna(row.get('description')):
-                        desc = str(row['description'])[:150]  # Limit description length
-                        if len(str(row['description'])) > 150:
-                            desc += "..."
-                        parts.append(f"<br><i>{desc}</i>")
-                hover_templates.append("<br>".join(parts))
-                
-                # Customdata for click events: [id, title, category, continent, start_year, end_year, start_date, end_date, description, lat, lon, location_label, geometry, location_confidence]
-                start_date_str = None
-                end_date_str = None
-                if pd.notna(row.get('start_date')):
-                    try:
-                        start_date_str = row['start_date'].strftime('%Y-%m-%d') if hasattr(row['start_date'], 'strftime') else str(row['start_date'])
-                    except:
-                        start_date_str = None
-                if pd.notna(row.get('end_date')):
-                    try:
-                        end_date_str = row['end_date'].strftime('%Y-%m-%d') if hasattr(row['end_date'], 'strftime') else str(row['end_date'])
-                    except:
-                        end_date_str = None
-                
-                # Get location fields
-                lat = row.get('lat') if pd.notna(row.get('lat')) else None
-                lon = row.get('lon') if pd.notna(row.get('lon')) else None
-                location_label = str(row.get('location_label', '')) if pd.notna(row.get('location_label')) else None
-                geometry = str(row.get('geometry', '')) if pd.notna(row.get('geometry')) else None
-                location_confidence = str(row.get('location_confidence', 'exact')) if pd.notna(row.get('location_confidence')) else 'exact'
-                
-                # Check if this is a cluster
-                is_cluster = row.get('is_cluster', False)
-                cluster_id = row.get('cluster_id', None)
-                
-                customdata_list.append([
-                    str(row.get('id', '')),
-                    str(row.get('title', 'Unknown')),
-                    str(row.get('category', 'N/A')),
-                    str(row.get('continent', 'N/A')),
-                    int(row['start_year']) if pd.notna(row.get('start_year')) else None,
-                    int(row['end_year']) if pd.notna(row.get('end_year')) else None,
-                    start_date_str,
-                    end_date_str,
-                    str(row.get('description', '')) if pd.notna(row.get('description')) else '',
-                    float(lat) if lat is not None else None,
-                    float(lon) if lon is not None else None,
-                    location_label,
-                    geometry,
-                    location_confidence,
-                    is_cluster,
-                    cluster_id
-                ])
-            
-            # Separate clusters from individual events for different styling
-            cluster_mask = cat_data.get('is_cluster', pd.Series([False] * len(cat_data)))
-            individual_data = cat_data[~cluster_mask] if 'is_cluster' in cat_data.columns else cat_data
-            cluster_data = cat_data[cluster_mask] if 'is_cluster' in cat_data.columns else pd.DataFrame()
-            
-            # Separate individual events into spans and points
-            individual_spans = []
-            individual_points = []
-            
-            for orig_idx, row in individual_data.iterrows():
-                is_cluster = row.get('is_cluster', False)
-                if is_cluster:
-                    continue
-                
-                # Find corresponding hover and customdata
-                row_idx = cat_data.index.get_loc(orig_idx) if orig_idx in cat_data.index else None
-                if row_idx is None:
-                    continue
-                
-                hover_text = hover_templates[row_idx] if row_idx < len(hover_templates) else ''
-                customdata = customdata_list[row_idx] if row_idx < len(customdata_list) else None
-                
-                # Only check for spans if spans are enabled
-                is_span = False
-                if enable_spans:
-                    is_span = should_render_as_span(row, time_range)
-                    if is_span:
-                        # Find lane assignment
-                        span_info = next((s for s in spans_data if s['index'] == orig_idx), None)
-                        if span_info:
-                            lane = span_info['lane']
-                            individual_spans.append({
-                                'row': row,
-                                'hover': hover_text,
-                                'customdata': customdata,
-                                'lane': lane
-                            })
-                        else:
-                            # Span detected but not in spans_data (shouldn't happen, but fallback to point)
-                            is_span = False
-                
-                if not is_span:
-                    individual_points.append({
-                        'row': row,
-                        'hover': hover_text,
-                        'customdata': customdata
-                    })
-            
-            # Render spans as horizontal lines with lane offsets
-            if individual_spans:
-                base_y = category_to_y[cat]
-                
-                # Create span traces (one per span for proper hover/click)
-                for span_info in individual_spans:
-                    row = span_info['row']
-                    lane = span_info['lane']
-                    
-                    # Calculate y-position with lane offset
-                    y_pos = base_y + (lane * lane_offset)
-                    
-                    x_vals = [row['start_year'], row['end_year']]
-                    y_vals = [y_pos, y_pos]
-                    
-                    span_trace = go.Scatter(
-                        x=x_vals,
-                        y=y_vals,
-                        mode='lines+markers',  # Add markers at endpoints for better clickability
-                        name=f"{cat} span" if lane == 0 else None,
-                        showlegend=(lane == 0 and idx == 0),  # Only show legend for first span trace
-                        line=dict(
-                            width=4,
-                            color=colors[idx % len(colors)],
-                        ),
-                        marker=dict(
-                            size=6,
-                            color=colors[idx % len(colors)],
-                            opacity=0.7
-                        ),
-                        hoverinfo='text',
-                        text=[span_info['hover'], span_info['hover']],
-                        customdata=[span_info['customdata'], span_info['customdata']],
-                        hovertemplate='%{text}<br>Start: %{x:,}<br>End: %{x:,}<extra></extra>',
-                        fill='none',
-                    )
-                    fig.add_trace(span_trace, row=1, col=1)
-            
-            # Render points for instant events
-            if individual_points:
-                point_rows = [p['row'] for p in individual_points]
-                point_hover = [p['hover'] for p in individual_points]
-                point_customdata = [p['customdata'] for p in individual_points]
-                
-                # Ensure we have year column for points
-                point_years = []
-                for p_row in point_rows:
-                    if 'year' in p_row and pd.notna(p_row['year']):
-                        point_years.append(p_row['year'])
-                    elif pd.notna(p_row.get('start_year')):
-                        point_years.append(p_row['start_year'])
-                    else:
-                        point_years.append(None)
-                
-                base_y = category_to_y[cat]
-                
-                point_trace = go.Scatter(
-                    x=point_years,
-                    y=[base_y] * len(individual_points),  # Use numeric y-position
-                    mode='markers',
-                    name=str(cat),
-                    marker=dict(
-                        size=10,
-                        color=colors[idx % len(colors)],
-                        line=dict(width=1, color="rgba(255, 255, 255, 0.3)"),
-                        opacity=0.85
-                    ),
-                    text=point_hover,
-                    customdata=point_customdata,
-                    hovertemplate='%{text}<br>Year: %{x:,}<extra></extra>',
-                )
-                fig.add_trace(point_trace, row=1, col=1)
-            
-            # Create trace for clusters (larger, different style)
-            if not cluster_data.empty:
-                cluster_indices = [i for i, is_clust in enumerate(cluster_mask) if is_clust]
-                cluster_hover = [hover_templates[i] for i in cluster_indices]
-                cluster_customdata = [customdata_list[i] for i in cluster_indices]
-                
-                base_y = category_to_y[cat]
-                
-                cluster_trace = go.Scatter(
-                    x=cluster_data['year'].tolist(),
-                    y=[base_y] * len(cluster_data),  # Use numeric y-position
-                    mode='markers',
-                    name=f"{cat} (clusters)",
-                    marker=dict(
-                        size=16,
-                        color=colors[idx % len(colors)],
-                        line=dict(width=2, color="rgba(255, 215, 0, 0.8)"),
-                        opacity=0.9,
-                        symbol='diamond'
-                    ),
-                    text=cluster_hover,
-                    customdata=cluster_customdata,
-                    hovertemplate='%{text}<br>Year: %{x:,}<br><i>Click to expand cluster</i><extra></extra>',
-                )
-                fig.add_trace(cluster_trace, row=1, col=1)
-        
-        print(f"DEBUG: Number of traces added: {len(categories)}")
-        print(f"DEBUG: Total data points: {len(df_plot)}")
-        print(f"DEBUG: Points per category: {df_plot.groupby('category').size().to_dict()}")
+        # Build each category's row-1 traces (independent of each other, so
+        # possibly in parallel) and merge them in category order
+        category_jobs = [
+            (df_plot[df_plot['category'] == cat][category_columns(df_plot)], cat, idx, category_to_y[cat],
+             time_range, enable_spans)
+            for idx, cat in enumerate(categories)
+        ]
+        row1_traces = []
+        lane_pack_seconds = 0.0
+        with timed('trace_build'):
+            for traces_json, lanes, pack_seconds in map_categories(category_jobs):
+                row1_traces.extend(json.loads(traces_json))
+                max_lanes = max(max_lanes, lanes)
+                lane_pack_seconds += pack_seconds
+        # Part of trace_build (summed over categories, so may exceed it when built in parallel)
+        add_timing('lane_pack', lane_pack_seconds)
         
         # Top x-axis: SHOW tick labels, move them to top
         fig.update_xaxes(
@@ -575,7 +572,10 @@ class TimelineGenerator:
             (df_filtered["start_date"].dt.year >= self.RECENT_MIN_YEAR) &
             (df_filtered["start_date"].dt.year <= self.RECENT_MAX_YEAR)
         ].copy()
-        
+        # Plain strings, as for the top row (plotly groups categoricals by every category)
+        if pd.api.types.is_categorical_dtype(df_recent['category']):
+            df_recent['category'] = df_recent['category'].astype(str)
+
         if not df_recent.empty:
             fig_dates = px.scatter(
                 df_recent,
@@ -597,57 +597,9 @@ class TimelineGenerator:
             for trace in fig_dates.data:
                 trace.showlegend = False  # legend already shown from top plot
                 trace.marker.update(size=10, line=dict(width=1, color="rgba(255, 255, 255, 0.3)"))
-                # Add customdata to date traces as well
-                if hasattr(trace, 'customdata') and trace.customdata:
-                    # Keep existing customdata if present
-                    pass
-                else:
-                    # Create customdata from the dataframe
-                    trace_customdata = []
-                    for _, row in df_recent.iterrows():
-                        start_date_str = None
-                        end_date_str = None
-                        if pd.notna(row.get('start_date')):
-                            try:
-                                start_date_str = row['start_date'].strftime('%Y-%m-%d') if hasattr(row['start_date'], 'strftime') else str(row['start_date'])
-                            except:
-                                start_date_str = None
-                        if pd.notna(row.get('end_date')):
-                            try:
-                                end_date_str = row['end_date'].strftime('%Y-%m-%d') if hasattr(row['end_date'], 'strftime') else str(row['end_date'])
-                            except:
-                                end_date_str = None
-                        
-                        # Get location fields
-                        lat = row.get('lat') if pd.notna(row.get('lat')) else None
-                        lon = row.get('lon') if pd.notna(row.get('lon')) else None
-                        location_label = str(row.get('location_label', '')) if pd.notna(row.get('location_label')) else None
-                        geometry = str(row.get('geometry', '')) if pd.notna(row.get('geometry')) else None
-                        location_confidence = str(row.get('location_confidence', 'exact')) if pd.notna(row.get('location_confidence')) else 'exact'
-                        
-                        # Check if this is a cluster (date traces typically won't have clusters, but check anyway)
-                        is_cluster = row.get('is_cluster', False)
-                        cluster_id = row.get('cluster_id', None)
-                        
-                        trace_customdata.append([
-                            str(row.get('id', '')),
-                            str(row.get('title', 'Unknown')),
-                            str(row.get('category', 'N/A')),
-                            str(row.get('continent', 'N/A')),
-                            int(row['start_year']) if pd.notna(row.get('start_year')) else None,
-                            int(row['end_year']) if pd.notna(row.get('end_year')) else None,
-                            start_date_str,
-                            end_date_str,
-                            str(row.get('description', '')) if pd.notna(row.get('description')) else '',
-                            float(lat) if lat is not None else None,
-                            float(lon) if lon is not None else None,
-                            location_label,
-                            geometry,
-                            location_confidence,
-                            is_cluster,
-                            cluster_id
-                        ])
-                    trace.customdata = trace_customdata
+                # Add customdata to date traces as well, unless plotly already set it
+                if getattr(trace, 'customdata', None) is None or len(trace.customdata) == 0:
+                    trace.customdata = [_customdata(row) for _, row in df_recent.iterrows()]
                 fig.add_trace(trace, row=2, col=1)
             
             # Set date-axis range based on requested year window & what's available
@@ -743,8 +695,11 @@ class TimelineGenerator:
             row=2, col=1
         )
         
-        # Convert to JSON and add cluster info to metadata
-        fig_json = json.loads(fig.to_json())
+        # Convert to JSON (row-1 traces are already JSON and come first) and add cluster info to metadata
+        with timed('serialize'):
+            fig_json = json.loads(fig.to_json())
+        fig_json['data'] = row1_traces + fig_json['data']
+        record_count('traces', len(fig_json['data']))
         if '_metadata' not in fig_json:
             fig_json['_metadata'] = {}
         fig_json['_metadata']['cluster_info'] = cluster_info
@@ -761,3 +716,41 @@ class TimelineGenerator:
             traceback.print_exc()
             return False
 
+
+def render_timeline(generator, start_year, end_year, region=None, enable_clustering=True, enable_spans=False):
+    """
+    Timeline figure JSON for a time window and optional location filter, with
+    event counts in '_metadata'.
+    
+    Args:
+        generator: TimelineGenerator holding the full event frame
+        start_year: Start of visible time range
+        end_year: End of visible time range
+        region: Optional RadiusRegion/BBoxRegion/PolygonRegion filter
+        enable_clustering: Whether to cluster events when zoomed out
+        enable_spans: Whether to render events with duration as spans
+    """
+    # Time window and location filter are intersected inside the spatiotemporal index
+    filtered_data = generator.get_filtered_data(start_year, end_year, region=region)
+    event_count = len(filtered_data)
+    
+    # Update timeline generator's filtered data
+    generator.df = filtered_data
+    
+    fig_json = generator.make_figure_json(start_year, end_year, enable_clustering=enable_clustering, enable_spans=enable_spans)
+    
+    # Add metadata about event count
+    if 'layout' not in fig_json:
+        fig_json['layout'] = {}
+    if 'annotations' not in fig_json['layout']:
+        fig_json['layout']['annotations'] = []
+    
+    total_events = len(generator._original_df) if generator._original_df is not None else len(generator.df)
+    fig_json['_metadata'] = {
+        'total_events': total_events,
+        'filtered_events': event_count,
+        'start_year': start_year,
+        'end_year': end_year,
+        'location_filtered': region is not None
+    }
+    return fig_json
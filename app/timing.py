@@ -0,0 +1,141 @@
+"""
+Timing Module
+
+Per-request stage timings and counts for the render path. Code on that path
+wraps its stages in timed('name') and reports sizes with record_count();
+both are no-ops outside a request (the cache warmer, category workers).
+
+After each request that recorded anything, the stages and counts are sent
+back as a Server-Timing header (visible in the browser's network panel) and
+logged as one JSON line on the 'timetrip.timing' logger.
+"""
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from flask import g, has_app_context, request
+
+# Import config - handle both direct execution and Flask app context
+try:
+    from config import Config
+except ImportError:
+    # If running as module, add parent to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+
+logger = logging.getLogger('timetrip.timing')
+
+
+class Timings:
+    """Stage durations (seconds, summed per name) and counts of one request"""
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def merge(self, stages, counts):
+        """Add the stages and counts recorded elsewhere (e.g. by a render worker)"""
+        for name, seconds in stages.items():
+            self.add(name, seconds)
+        self.counts.update(counts)
+
+    def __bool__(self):
+        return bool(self.stages or self.counts)
+
+    def server_timing(self, total=None):
+        """Server-Timing header value: stages as durations in ms, counts as descriptions"""
+        metrics = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.stages.items()]
+        if total is not None:
+            metrics.append(f'total;dur={total * 1000:.1f}')
+        metrics.extend(f'{name};desc="{value}"' for name, value in self.counts.items())
+        return ', '.join(metrics)
+
+
+def current_timings():
+    """The Timings being recorded in this context, or None"""
+    if not has_app_context():
+        return None
+    return g.get('timings')
+
+
+@contextmanager
+def collect_timings():
+    """Record the block's stages into a fresh Timings (yielded), restoring the previous one after"""
+    previous = g.get('timings')
+    g.timings = Timings()
+    try:
+        yield g.timings
+    finally:
+        g.timings = previous
+
+
+@contextmanager
+def timed(name):
+    """Add the block's wall time to stage name of the current request"""
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def add_timing(name, seconds):
+    """Add a duration measured elsewhere (e.g. in a category worker) to stage name"""
+    timings = current_timings()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+def record_count(name, value):
+    """Record a count (events, traces, bytes, ...) for the current request"""
+    timings = current_timings()
+    if timings is not None:
+        timings.count(name, value)
+
+
+def _start_request():
+    g.timings = Timings()
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    timings = g.get('timings')
+    if not timings:
+        return response
+    total = time.perf_counter() - g.request_started
+    if not response.is_streamed and response.content_length is not None:
+        timings.count('bytes', response.content_length)
+    response.headers['Server-Timing'] = timings.server_timing(total)
+    logger.info(json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round(total * 1000, 1),
+        'stages_ms': {name: round(seconds * 1000, 1) for name, seconds in timings.stages.items()},
+        'counts': timings.counts,
+    }))
+    return response
+
+
+def init_timing(app):
+    """Time requests of app; log timing lines to stderr if TIMING_LOG is set"""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    if getattr(Config, 'TIMING_LOG', False) and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
@@ -0,0 +1,362 @@
+"""
+Typeahead Module
+
+In-memory index answering search-box queries without touching the database.
+Titles and location labels are indexed by a sorted list of word starts
+(prefix matches) and by character trigrams (substring and fuzzy matches);
+descriptions by word.
+The index is built from the event store and updated in place for writes made
+by this process, so it is only rebuilt when another worker changed the data.
+
+Relevance keeps the ordering of the original search endpoint:
+title prefix > title word prefix > title substring > location label >
+description > fuzzy (typo-tolerant) title/label matches.
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+import pandas as pd
+
+from app.models import db
+from app.event_store import current_generation, get_event_store
+
+RECORD_COLUMNS = ['id', 'title', 'category', 'continent', 'start_year', 'end_year', 'description',
+                  'start_date', 'end_date', 'lat', 'lon', 'location_label', 'geometry', 'location_confidence']
+
+SCORE_TITLE_PREFIX = 100
+SCORE_WORD_PREFIX = 75
+SCORE_TITLE_SUBSTRING = 50
+SCORE_LABEL = 40
+SCORE_DESCRIPTION = 25
+SCORE_FUZZY = 20
+
+# Score of a word-start match by kind: title start, title word, location label word
+_START_SCORES = (SCORE_TITLE_PREFIX, SCORE_WORD_PREFIX, SCORE_LABEL)
+
+# Fuzzy matching: title/label candidates (by shared trigrams) checked with edit distance
+FUZZY_CANDIDATES = 64
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize(value):
+    """Lowercase and strip accents, so 'Köln' matches 'koln'"""
+    if not isinstance(value, str):
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def trigrams(text):
+    """Set of character trigrams of a normalized string"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _indexed_grams(text):
+    # Padded so word starts (' eg') are grams too, which fuzzy lookups rely on
+    return trigrams(' ' + text + ' ') if text else set()
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Edit distance between a and b counting adjacent transpositions as one
+    edit (optimal string alignment), or max_distance + 1 if larger.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _allowed_typos(word):
+    return 0 if len(word) < 4 else 1 if len(word) < 8 else 2
+
+
+def _record_from_row(row):
+    """JSON-ready event record from an event-store row"""
+    record = {}
+    for column in RECORD_COLUMNS:
+        value = row.get(column)
+        if column == 'geometry':
+            value = row.get('geometry_compact', value)
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            value = None
+        elif column in ('start_date', 'end_date'):
+            value = value.date().isoformat() if hasattr(value, 'date') else str(value)
+        elif column in ('start_year', 'end_year'):
+            value = int(value)
+        elif column in ('lat', 'lon'):
+            value = float(value)
+        elif column == 'category':
+            value = str(value)
+        record[column] = value
+    return record
+
+
+class TypeaheadIndex:
+    """Prefix/trigram index over event titles, location labels and descriptions"""
+
+    def __init__(self, records, generation):
+        self.generation = generation
+        self._lock = threading.Lock()
+        self._records = {}        # slot -> record
+        self._texts = {}          # slot -> (title, label, description) normalized
+        self._order = {}          # slot -> tie-break key (shorter titles, then earlier events first)
+        self._slots = {}          # event id -> slot
+        self._next_slot = 0
+        self._starts = []         # sorted (text from a word start, slot, kind); kind indexes _START_SCORES
+        self._grams = defaultdict(set)              # trigram -> slots (title + label)
+        self._description_words = defaultdict(set)  # word -> slots
+        self._vocabulary = []                        # sorted description words
+        self._building = True
+        for record in records:
+            self._add(record)
+        self._starts.sort()
+        self._vocabulary.sort()
+        self._building = False
+
+    @classmethod
+    def from_store(cls, store):
+        """Build the index from an EventStore"""
+        df = store.df
+        if df.empty:
+            return cls([], store.generation)
+        columns = [c for c in RECORD_COLUMNS + ['geometry_compact'] if c in df.columns]
+        return cls((_record_from_row(row) for row in df[columns].to_dict('records')), store.generation)
+
+    def __len__(self):
+        return len(self._records)
+
+    @staticmethod
+    def _start_entries(slot, title, label):
+        entries = [(title, slot, 0)] if title else []
+        entries += [(title[m.start():], slot, 1) for m in _WORD_RE.finditer(title) if m.start() > 0]
+        entries += [(label[m.start():], slot, 2) for m in _WORD_RE.finditer(label)]
+        return entries
+
+    def _add(self, record):
+        if record.get('id') in self._slots:
+            self._remove(record['id'])
+        slot = self._next_slot
+        self._next_slot += 1
+        title = normalize(record.get('title'))
+        label = normalize(record.get('location_label'))
+        description = normalize(record.get('description'))
+        self._records[slot] = record
+        self._texts[slot] = (title, label, description)
+        self._order[slot] = (len(title), record.get('start_year') or 0)
+        self._slots[record['id']] = slot
+        for entry in self._start_entries(slot, title, label):
+            if self._building:
+                self._starts.append(entry)
+            else:
+                bisect.insort(self._starts, entry)
+        for text in (title, label):
+            for gram in _indexed_grams(text):
+                self._grams[gram].add(slot)
+        for word in set(_WORD_RE.findall(description)):
+            postings = self._description_words[word]
+            if not postings:
+                if self._building:
+                    self._vocabulary.append(word)
+                else:
+                    bisect.insort(self._vocabulary, word)
+            postings.add(slot)
+
+    def _remove(self, event_id):
+        slot = self._slots.pop(event_id, None)
+        if slot is None:
+            return
+        del self._records[slot]
+        del self._order[slot]
+        title, label, description = self._texts.pop(slot)
+        for entry in self._start_entries(slot, title, label):
+            index = bisect.bisect_left(self._starts, entry)
+            if index < len(self._starts) and self._starts[index] == entry:
+                del self._starts[index]
+        for text in (title, label):
+            for gram in _indexed_grams(text):
+                self._grams[gram].discard(slot)
+        for word in set(_WORD_RE.findall(description)):
+            postings = self._description_words[word]
+            postings.discard(slot)
+            if not postings:
+                del self._description_words[word]
+                index = bisect.bisect_left(self._vocabulary, word)
+                if index < len(self._vocabulary) and self._vocabulary[index] == word:
+                    del self._vocabulary[index]
+
+    def apply(self, upserts=(), deletes=(), generation=None):
+        """Apply local writes: upserts are event records, deletes are event ids"""
+        with self._lock:
+            for event_id in deletes:
+                self._remove(event_id)
+            for record in upserts:
+                self._add(record)
+            if generation is not None:
+                self.generation = generation
+
+    def _word_start_matches(self, query, kinds):
+        """Slots -> score for titles/labels with a word starting with the query"""
+        scores = {}
+        lo = bisect.bisect_left(self._starts, (query,))
+        hi = bisect.bisect_left(self._starts, (query + '\uffff',), lo)
+        for _, slot, kind in self._starts[lo:hi]:
+            if kind in kinds:
+                score = _START_SCORES[kind]
+                if score > scores.get(slot, 0):
+                    scores[slot] = score
+        return scores
+
+    def _substring_matches(self, query):
+        """Slots -> score for titles/labels containing the query anywhere"""
+        postings = sorted((self._grams.get(gram, set()) for gram in trigrams(query)), key=len)
+        if not postings or not postings[0]:
+            return {}
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return {}
+        scores = {}
+        for slot in candidates:
+            title, label, _ = self._texts[slot]
+            if query in title:
+                scores[slot] = SCORE_TITLE_SUBSTRING
+            elif query in label:
+                scores[slot] = SCORE_LABEL
+        return scores
+
+    def _description_matches(self, words):
+        """Slots whose description has a word starting with each query word"""
+        matches = None
+        for word in words:
+            slots = set()
+            index = bisect.bisect_left(self._vocabulary, word)
+            while index < len(self._vocabulary) and self._vocabulary[index].startswith(word):
+                slots |= self._description_words[self._vocabulary[index]]
+                index += 1
+            matches = slots if matches is None else matches & slots
+            if not matches:
+                return set()
+        return matches or set()
+
+    def _fuzzy_matches(self, words, exclude):
+        """Slots -> score for title/label words within a few typos of every query word (as prefixes)"""
+        counts = Counter()
+        for gram in set().union(*(trigrams(' ' + word) for word in words)):
+            counts.update(self._grams.get(gram, ()))
+        scores = {}
+        for slot, _ in counts.most_common(FUZZY_CANDIDATES + len(exclude)):
+            if slot in exclude:
+                continue
+            title, label, _ = self._texts[slot]
+            candidate_words = _WORD_RE.findall(title) + _WORD_RE.findall(label)
+            total = 0
+            for word in words:
+                allowed = _allowed_typos(word)
+                best = min((edit_distance(word, w[:len(word)], allowed) for w in candidate_words),
+                           default=allowed + 1)
+                if best > allowed:
+                    break
+                total += best
+            else:
+                scores[slot] = SCORE_FUZZY - 5 * total
+        return scores
+
+    def search(self, query, limit=10):
+        """
+        Rank events for a typeahead query.
+
+        Tiers are evaluated best first and later tiers are skipped once
+        `limit` results are found, since they could only rank lower. Two-letter
+        queries only match the start of title and location words.
+
+        Args:
+            query: Text typed so far (at least 2 characters to match)
+            limit: Maximum number of results
+
+        Returns:
+            List of (record, relevance) tuples, best match first
+        """
+        query = normalize(query).strip()
+        if len(query) < 2:
+            return []
+        words = _WORD_RE.findall(query)
+        with self._lock:
+            ranked = []
+            self._take(ranked, self._word_start_matches(query, (0, 1)), limit)
+            if len(ranked) < limit:
+                if len(query) >= 3:
+                    tier = self._substring_matches(query)
+                else:
+                    tier = self._word_start_matches(query, (2,))
+                self._take(ranked, tier, limit)
+            if len(ranked) < limit and len(query) >= 3 and words:
+                matches = self._description_matches(words)
+                self._take(ranked, dict.fromkeys(matches, SCORE_DESCRIPTION), limit)
+            if len(ranked) < limit and len(query) >= 3 and words:
+                self._take(ranked, self._fuzzy_matches(words, {slot for slot, _ in ranked}), limit)
+            return [(self._records[slot], score) for slot, score in ranked]
+
+    def _take(self, ranked, tier, limit):
+        """Append the best of a tier's (slot -> score) matches not already ranked, up to limit"""
+        seen = {slot for slot, _ in ranked}
+        order = self._order
+        candidates = ((slot, score) for slot, score in tier.items() if slot not in seen)
+        ranked.extend(heapq.nsmallest(limit - len(ranked), candidates,
+                                      key=lambda item: (-item[1], order[item[0]])))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_typeahead_index(session=None):
+    """Return the typeahead index for the current data generation (rebuilt if stale)"""
+    global _index
+    session = session or db.session
+    generation = current_generation(session)
+    index = _index
+    if index is not None and index.generation == generation:
+        return index
+    with _index_lock:
+        if _index is None or _index.generation != generation:
+            _index = TypeaheadIndex.from_store(get_event_store(session))
+        return _index
+
+
+def note_event_writes(session, upserts=(), deletes=()):
+    """
+    Update the typeahead index in place after this process committed a write.
+
+    Only applies when the committed write is the single change since the index
+    was built (generation advanced by exactly one); otherwise the next query
+    rebuilds the index from the event store.
+
+    Args:
+        session: Database session (after commit)
+        upserts: Event records (TimelineEvent.to_dict(compact_geometry=True))
+        deletes: Deleted event ids
+    """
+    index = _index
+    if index is None:
+        return
+    generation = current_generation(session)
+    with _index_lock:
+        if _index is index and index.generation == generation - 1:
+            index.apply(upserts, deletes, generation)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark loading the event store: ORM objects + to_dict() (the previous
+loader) against the column-wise DBAPI loader in app/event_store.py
+
+Usage:
+    python benchmarks/load_events.py [--repeat 3]
+
+Uses the database configured by DATABASE_URL (or the local SQLite file).
+"""
+import sys
+import os
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from app import create_app
+from app.models import db, TimelineEvent
+from app.event_store import load_events_frame, prepare_events_frame
+
+def load_events_frame_orm(session):
+    """The previous loader: one ORM object and to_dict() call per row"""
+    events = session.query(TimelineEvent).all()
+    if not events:
+        return pd.DataFrame()
+    return pd.DataFrame([event.to_dict() for event in events])
+
+def best_time(loader, session, repeat):
+    """Fastest of `repeat` runs (seconds) and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        session.expunge_all()
+        start = time.perf_counter()
+        result = loader(session)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark event store loading')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per loader (best is reported)')
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        session = db.session
+        total = TimelineEvent.query.count()
+        print(f"Loading {total} events ({db.engine.dialect.name}), best of {args.repeat}:")
+        
+        orm_time, orm_df = best_time(load_events_frame_orm, session, args.repeat)
+        core_time, core_df = best_time(load_events_frame, session, args.repeat)
+        print(f"  ORM objects + to_dict(): {orm_time * 1000:8.0f} ms")
+        print(f"  Column-wise DBAPI load:  {core_time * 1000:8.0f} ms  ({orm_time / core_time:.1f}x faster)")
+        
+        # Both loaders must give the same prepared frame (date units may differ by driver)
+        orm_prepared = prepare_events_frame(orm_df)
+        core_prepared = prepare_events_frame(core_df)
+        try:
+            pd.testing.assert_frame_equal(orm_prepared, core_prepared, check_dtype=False)
+            print("  ✓ Prepared frames match")
+        except AssertionError as e:
+            print(f"  ✗ Prepared frames differ: {e}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Synthetic timeline events for benchmarks and load tests
+
+generate_events(n, seed) returns n events with the columns of the CSV
+template (timeline_events_template.csv), shaped like real data:
+
+- Years skewed toward the present: a few cosmic and geologic events, more
+  prehistory and antiquity, most in the last few centuries; within each era
+  events bunch up toward its recent end.
+- About a third are spans, with durations that scale with their era
+  (centuries-long ones in antiquity, millions of years in deep time).
+- Recent events carry calendar dates; about two thirds are geolocated around
+  a set of population centers, a few with GeoJSON polygon areas.
+- Categories follow a long-tailed distribution.
+
+The same n and seed always give the same events.
+
+Usage:
+    python benchmarks/synthetic.py 100000 synthetic_events.csv [--seed 42]
+
+The CSV can be imported like any other (python init_db.py, or Import in the UI).
+"""
+import sys
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+PRESENT_YEAR = 2025
+
+# (name, start_year, end_year, share of events, longest span as a fraction of the era)
+ERAS = [
+    ('cosmic', -13_800_000_000, -1_000_000_000, 0.02, 0.05),
+    ('geologic', -1_000_000_000, -1_000_000, 0.06, 0.05),
+    ('prehistoric', -1_000_000, -10_000, 0.07, 0.02),
+    ('ancient', -10_000, 500, 0.20, 0.02),
+    ('medieval', 500, 1800, 0.25, 0.05),
+    ('modern', 1800, PRESENT_YEAR, 0.40, 0.10),
+]
+
+CATEGORIES = ['politics', 'war', 'science', 'culture', 'religion', 'technology',
+              'economy', 'exploration', 'nature', 'era', 'art', 'disaster']
+
+# (label, continent, lat, lon, weight)
+CENTERS = [
+    ('London', 'Europe', 51.5, -0.1, 8), ('Paris', 'Europe', 48.9, 2.4, 7), ('Rome', 'Europe', 41.9, 12.5, 7),
+    ('Cairo', 'Africa', 30.0, 31.2, 5), ('Baghdad', 'Asia', 33.3, 44.4, 4), ('Delhi', 'Asia', 28.6, 77.2, 5),
+    ('Beijing', 'Asia', 39.9, 116.4, 6), ('Tokyo', 'Asia', 35.7, 139.7, 4), ('New York', 'North America', 40.7, -74.0, 6),
+    ('Mexico City', 'North America', 19.4, -99.1, 3), ('Lima', 'South America', -12.0, -77.0, 2),
+    ('Lagos', 'Africa', 6.5, 3.4, 2), ('Sydney', 'Oceania', -33.9, 151.2, 2),
+]
+
+SPAN_SHARE = 0.35
+LOCATED_SHARE = 0.65
+AREA_SHARE = 0.03  # Of located events: polygon geometry instead of a point only
+DATED_SHARE = 0.7  # Of events after 1678 (pandas' datetime range)
+
+
+def _skewed_years(rng, start, end, size):
+    """Years in [start, end), log-distributed by distance from end"""
+    distance = np.exp(rng.uniform(0, np.log(end - start), size))
+    return np.floor(end - distance).astype(np.int64)
+
+
+def _area_geometry(lat, lon, half_size):
+    ring = [[lon - half_size, lat - half_size], [lon + half_size, lat - half_size],
+            [lon + half_size, lat + half_size], [lon - half_size, lat + half_size],
+            [lon - half_size, lat - half_size]]
+    return json.dumps({'type': 'Polygon', 'coordinates': [[[round(x, 4), round(y, 4)] for x, y in ring]]})
+
+
+def generate_events(n, seed=42):
+    """
+    n synthetic events as a raw DataFrame (template columns, dates as ISO strings).
+
+    Args:
+        n: Number of events
+        seed: Random seed (same n and seed give the same events)
+    """
+    rng = np.random.default_rng(seed)
+
+    shares = np.array([era[3] for era in ERAS])
+    era_of = rng.choice(len(ERAS), size=n, p=shares / shares.sum())
+    start_year = np.zeros(n, dtype=np.int64)
+    end_year = np.zeros(n, dtype=np.int64)
+    for i, (_, era_start, era_end, _, span_fraction) in enumerate(ERAS):
+        members = np.flatnonzero(era_of == i)
+        starts = _skewed_years(rng, era_start, era_end, len(members))
+        longest = max(2.0, (era_end - era_start) * span_fraction)
+        durations = np.floor(np.exp(rng.uniform(0, np.log(longest), len(members)))).astype(np.int64)
+        is_span = rng.random(len(members)) < SPAN_SHARE
+        start_year[members] = starts
+        end_year[members] = np.where(is_span, np.minimum(starts + durations, PRESENT_YEAR), starts)
+
+    weights = 1.0 / np.arange(1, len(CATEGORIES) + 1)
+    category = np.array(CATEGORIES)[rng.choice(len(CATEGORIES), size=n, p=weights / weights.sum())]
+
+    # Calendar dates for recent events (four-digit years)
+    dated = (start_year >= 1678) & (rng.random(n) < DATED_SHARE)
+    month = rng.integers(1, 13, n)
+    day = rng.integers(1, 29, n)
+    month_day = pd.Series([f'-{m:02d}-{d:02d}' for m, d in zip(month, day)])
+    start_date = pd.Series(start_year).astype(str).add(month_day).where(dated, None)
+    end_date = pd.Series(end_year).astype(str).add(month_day).where(dated, None)
+
+    # Locations around population centers (a few anywhere)
+    center_weights = np.array([center[4] for center in CENTERS], dtype=float)
+    center_of = rng.choice(len(CENTERS), size=n, p=center_weights / center_weights.sum())
+    located = rng.random(n) < LOCATED_SHARE
+    anywhere = rng.random(n) < 0.1
+    labels, continents, center_lats, center_lons, _ = (np.array(column) for column in zip(*CENTERS))
+    lat = np.where(anywhere, rng.uniform(-60, 70, n), center_lats.astype(float)[center_of] + rng.normal(0, 3, n))
+    lon = np.where(anywhere, rng.uniform(-180, 180, n), center_lons.astype(float)[center_of] + rng.normal(0, 4, n))
+    lat = np.clip(lat, -89.0, 89.0).round(4)
+    lon = (((lon + 180.0) % 360.0) - 180.0).round(4)
+    near_center = located & ~anywhere
+    continent = np.where(near_center, continents[center_of], 'Global')
+    location_label = np.where(near_center, labels[center_of], '')
+    geometry = np.full(n, None, dtype=object)
+    for i in np.flatnonzero(located & (rng.random(n) < AREA_SHARE)):
+        geometry[i] = _area_geometry(lat[i], lon[i], 0.5 + 2.0 * rng.random())
+
+    index = np.arange(n)
+    era_names = np.array([era[0] for era in ERAS])[era_of]
+    return pd.DataFrame({
+        'id': [f'syn-{i:07d}' for i in index],
+        'title': [f'Synthetic {cat} event {i}' for cat, i in zip(category, index)],
+        'category': category,
+        'continent': continent,
+        'start_year': start_year,
+        'end_year': end_year,
+        'description': [f'Generated {era} {cat} event for benchmarks.' for era, cat in zip(era_names, category)],
+        'start_date': start_date,
+        'end_date': end_date,
+        'lat': np.where(located, lat, np.nan),
+        'lon': np.where(located, lon, np.nan),
+        'location_label': np.where(located, location_label, ''),
+        'geometry': geometry,
+        'location_confidence': np.where(near_center, 'approx', 'exact'),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write synthetic timeline events as CSV')
+    parser.add_argument('count', type=int, help='Number of events')
+    parser.add_argument('output', help='CSV file to write')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    generate_events(args.count, args.seed).to_csv(args.output, index=False)
+    print(f"Wrote {args.count} synthetic events to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
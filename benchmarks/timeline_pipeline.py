@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmark the timeline pipeline on synthetic events (benchmarks/synthetic.py)
+
+For each dataset size, loads the events into a temporary SQLite database
+and times:
+  - load_store: building the event store frame from the database
+  - get_filtered_data: full range, deep time, recent centuries, and a bbox filter
+  - cluster_events, pack_intervals, prepare_spans_and_points
+  - make_figure_json: clustered full range, and recent centuries with spans
+  - /api/timeline end to end: a cold render (caches cleared) and a cached hit
+
+Each result is the best of --repeat runs (the median is recorded too) and is
+written to benchmarks/results/. With a baseline file, every benchmark slower
+than its baseline by more than the regression threshold is reported and the
+script exits with status 1.
+
+Usage:
+    python benchmarks/timeline_pipeline.py [--sizes 1000,10000,100000] [--repeat 5]
+    python benchmarks/timeline_pipeline.py --sizes 1000,10000,100000,1000000
+    python benchmarks/timeline_pipeline.py --save-baseline   # record the reference numbers
+
+Baselines are machine-specific: record them on the machine that compares
+against them. Thresholds live in the baseline file ("threshold", and
+per-benchmark overrides in "thresholds") and can be edited there.
+"""
+import sys
+import os
+import json
+import atexit
+import shutil
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.join(ROOT_DIR, 'benchmarks')
+sys.path.insert(0, ROOT_DIR)
+
+# A throwaway database and no background work; must be set before config is imported
+_work_dir = tempfile.mkdtemp(prefix='timetrip-bench-')
+atexit.register(shutil.rmtree, _work_dir, ignore_errors=True)
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_work_dir, 'bench.db')}"
+os.environ.pop('READ_DATABASE_URL', None)
+os.environ.pop('EVENT_SNAPSHOT_DIR', None)
+os.environ.pop('METRICS_DIR', None)
+os.environ['CACHE_WARMER_ENABLED'] = 'false'
+os.environ['TIMING_LOG'] = 'false'
+
+import pandas as pd
+from config import Config
+from app import create_app
+from app.models import db, TimelineEvent
+from app.event_store import bump_generation, current_generation, load_store_frame
+from app.timeline import TimelineGenerator, timeline_cache
+from app.geo_clusters import geo_cluster_cache
+from app.geometry import BBoxRegion
+from app.clustering import get_zoom_tier, cluster_events
+from app.span_packing import pack_intervals, prepare_spans_and_points
+from synthetic import generate_events
+
+DEFAULT_SIZES = '1000,10000,100000'
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baselines', 'timeline_pipeline.json')
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+DEFAULT_THRESHOLD = 0.25  # Slower than baseline by more than 25% is a regression
+MIN_REGRESSION_SECONDS = 0.005  # Ignore smaller differences (scheduling noise)
+
+# (name, start_year, end_year)
+VIEWS = [
+    ('all', Config.DEFAULT_START_YEAR, Config.DEFAULT_END_YEAR),
+    ('deep_time', -10_000, 2025),
+    ('recent', 1500, 2025),
+]
+EUROPE = BBoxRegion.from_string('-10,35,40,60')
+
+
+def measure(fn, repeat, setup=None):
+    """Best and median wall time (seconds) of `repeat` calls of fn, after one warm-up call"""
+    if setup is not None:
+        setup()
+    fn()
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {'best_s': min(times), 'median_s': statistics.median(times), 'runs': repeat}
+
+
+def load_synthetic_events(events):
+    """Replace the database's events with `events` and bump the data generation"""
+    db.session.query(TimelineEvent).delete()
+    db.session.commit()
+    with db.engine.begin() as connection:
+        events.to_sql(TimelineEvent.__tablename__, connection, if_exists='append', index=False, chunksize=10000)
+    bump_generation(db.session)
+    db.session.commit()
+
+
+def clear_caches():
+    timeline_cache.clear()
+    geo_cluster_cache.clear()
+
+
+def bench_size(app, n, repeat, seed):
+    """Benchmarks for one dataset size; returns {name: result}"""
+    results = {}
+
+    def record(name, result, **info):
+        result.update(info)
+        results[name] = result
+        print(f"  {name:<34} {result['best_s'] * 1000:10.2f} ms  (median {result['median_s'] * 1000:.2f} ms)")
+
+    events = generate_events(n, seed)
+    with app.app_context():
+        load_synthetic_events(events)
+        generation = current_generation(db.session)
+        record('load_store', measure(lambda: load_store_frame(db.session, generation), repeat), events=n)
+
+        generator = TimelineGenerator(db.session)
+        for view, start_year, end_year in VIEWS:
+            filtered = generator.get_filtered_data(start_year, end_year)
+            record(f'get_filtered_data/{view}',
+                   measure(lambda: generator.get_filtered_data(start_year, end_year), repeat),
+                   rows_out=len(filtered))
+        filtered = generator.get_filtered_data(Config.DEFAULT_START_YEAR, Config.DEFAULT_END_YEAR, region=EUROPE)
+        record('get_filtered_data/bbox',
+               measure(lambda: generator.get_filtered_data(Config.DEFAULT_START_YEAR, Config.DEFAULT_END_YEAR,
+                                                           region=EUROPE), repeat),
+               rows_out=len(filtered))
+
+        # Clustering the full range, as a zoomed-out render would
+        start_year, end_year = Config.DEFAULT_START_YEAR, Config.DEFAULT_END_YEAR
+        all_events = generator.get_filtered_data(start_year, end_year)
+        tier = get_zoom_tier(end_year - start_year)
+        clustered, _ = cluster_events(all_events, start_year, end_year, tier)
+        record('cluster_events', measure(lambda: cluster_events(all_events, start_year, end_year, tier), repeat),
+               rows_in=len(all_events), markers_out=len(clustered))
+
+        # Lane packing of every span in the recent view, and of its largest category
+        recent = generator.get_filtered_data(1500, 2025)
+        spans = recent[recent['end_year'] > recent['start_year']]
+        intervals = [{'start': s, 'end': e, 'data': i}
+                     for i, (s, e) in enumerate(zip(spans['start_year'], spans['end_year']))]
+        record('pack_intervals', measure(lambda: pack_intervals(intervals), repeat), intervals=len(intervals))
+        if not recent.empty:
+            category = recent['category'].astype(str).value_counts().index[0]
+            category_events = recent[recent['category'].astype(str) == category]
+            record('prepare_spans_and_points',
+                   measure(lambda: prepare_spans_and_points(category_events, 2025 - 1500, category), repeat),
+                   rows_in=len(category_events))
+
+        figure = generator.make_figure_json(start_year, end_year, enable_clustering=True, enable_spans=False)
+        record('make_figure_json/all_clustered',
+               measure(lambda: generator.make_figure_json(start_year, end_year, enable_clustering=True,
+                                                          enable_spans=False), repeat),
+               traces=len(figure['data']))
+        figure = generator.make_figure_json(1500, 2025, enable_clustering=True, enable_spans=True)
+        record('make_figure_json/recent_spans',
+               measure(lambda: generator.make_figure_json(1500, 2025, enable_clustering=True, enable_spans=True),
+                       repeat),
+               traces=len(figure['data']))
+
+    client = app.test_client()
+    url = f'/api/timeline?start_year={Config.DEFAULT_START_YEAR}&end_year={Config.DEFAULT_END_YEAR}'
+
+    def get_timeline():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        return response
+
+    size = len(get_timeline().get_data())
+    record('route/timeline_cold', measure(get_timeline, repeat, setup=clear_caches), bytes=size)
+    record('route/timeline_cached', measure(get_timeline, repeat), bytes=size)
+    return results
+
+
+def compare(results, baseline, default_threshold):
+    """Benchmarks slower than their baseline by more than the threshold: [(name, base, now, threshold)]"""
+    regressions = []
+    thresholds = baseline.get('thresholds', {})
+    for name, result in sorted(results.items()):
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        threshold = thresholds.get(name, baseline.get('threshold', default_threshold))
+        limit = base['best_s'] * (1 + threshold)
+        if result['best_s'] > limit and result['best_s'] - base['best_s'] > MIN_REGRESSION_SECONDS:
+            regressions.append((name, base['best_s'], result['best_s'], threshold))
+    return regressions
+
+
+def environment():
+    import numpy as np
+    import plotly
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plotly': plotly.__version__,
+    }
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the timeline pipeline on synthetic events')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f'Comma-separated event counts (default {DEFAULT_SIZES})')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark (best is compared)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the synthetic events')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown for a new baseline (0.25 = 25%%)')
+    parser.add_argument('--output', help='Results JSON (default benchmarks/results/timeline_pipeline-<time>.json)')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    app = create_app()
+    results = {}
+    for n in sizes:
+        print(f"{n:,} synthetic events, best of {args.repeat}:")
+        for name, result in bench_size(app, n, args.repeat, args.seed).items():
+            results[f'{name}@{n}'] = result
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'sizes': sizes,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"timeline_pipeline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    write_json(output, report)
+    print(f"\nResults written to {output}")
+
+    if args.save_baseline:
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                previous = json.load(f)
+        report['threshold'] = previous.get('threshold', args.threshold)
+        report['thresholds'] = previous.get('thresholds', {})
+        write_json(args.baseline, report)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} (create one with --save-baseline)")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != report['environment']:
+        print("Note: the baseline was recorded in a different environment")
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"✓ No regressions against {args.baseline}")
+        return 0
+    print(f"✗ {len(regressions)} regression(s) against {args.baseline}:")
+    for name, base, now, threshold in regressions:
+        print(f"  {name}: {base * 1000:.2f} ms -> {now * 1000:.2f} ms "
+              f"(+{(now / base - 1) * 100:.0f}%, allowed +{threshold * 100:.0f}%)")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -25,6 +25,38 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool: pre-ping drops connections the server closed, recycle
+    # replaces them before a proxy's idle timeout (pool sizing is not used by SQLite)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() != 'false'
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': DB_POOL_PRE_PING,
+        'pool_recycle': DB_POOL_RECYCLE,
+    }
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    
+    # Optional database for read-only endpoints (e.g. a PostgreSQL replica);
+    # unset: everything uses SQLALCHEMY_DATABASE_URI
+    READ_DATABASE_URL = os.environ.get('READ_DATABASE_URL')
+    if READ_DATABASE_URL:
+        if READ_DATABASE_URL.startswith('postgres://'):
+            READ_DATABASE_URL = READ_DATABASE_URL.replace('postgres://', 'postgresql://', 1)
+        SQLALCHEMY_BINDS = {'read': READ_DATABASE_URL}
+    
+    # SQLite: WAL journal (readers are not blocked by a writer), how long to wait
+    # for a lock before failing, and page cache size per connection
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'true').lower() != 'false'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536))
+    
     # Legacy CSV file path (for migration purposes)
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     TIMELINE_DATA_FILE = os.path.join(BASE_DIR, 'timeline_data_4.csv')
@@ -38,6 +70,86 @@ class Config:
     RECENT_MIN_YEAR = 1678  # pandas.Timestamp min year
     RECENT_MAX_YEAR = 2262  # pandas.Timestamp max year
     
+    # Directory for on-disk snapshots of the prepared events (unset: disabled);
+    # workers load the event store from the snapshot matching the data generation
+    EVENT_SNAPSHOT_DIR = os.environ.get('EVENT_SNAPSHOT_DIR')
+    
+    # Spatiotemporal index grid cell size (degrees of lat/lon)
+    SPATIAL_INDEX_CELL_DEGREES = float(os.environ.get('SPATIAL_INDEX_CELL_DEGREES', 10.0))
+    
+    # Douglas-Peucker tolerance (degrees) for cached event geometry shapes
+    GEOMETRY_SIMPLIFY_TOLERANCE = float(os.environ.get('GEOMETRY_SIMPLIFY_TOLERANCE', 0.01))
+    
+    # Map zoom level of the compact geometry embedded in API payloads
+    # (finer levels are served by /api/events/<id>/geometry?zoom=N)
+    GEOMETRY_PAYLOAD_ZOOM = int(os.environ.get('GEOMETRY_PAYLOAD_ZOOM', 4))
+    
+    # Number of cached /api/geo-clusters responses
+    GEO_CLUSTER_CACHE_SIZE = int(os.environ.get('GEO_CLUSTER_CACHE_SIZE', 256))
+    
+    # Number of cached /api/timeline figures
+    TIMELINE_CACHE_SIZE = int(os.environ.get('TIMELINE_CACHE_SIZE', 32))
+    
+    # Worker processes rendering /api/timeline figures outside the web
+    # process's GIL (0: render in the request thread), and how long a request
+    # waits for one (seconds)
+    RENDER_POOL_WORKERS = int(os.environ.get('RENDER_POOL_WORKERS', 0))
+    RENDER_POOL_TIMEOUT = int(os.environ.get('RENDER_POOL_TIMEOUT', 60))
+    
+    # Workers building a timeline's per-category traces in parallel (0: one
+    # after another in the rendering thread), in a 'process' or 'thread' pool
+    TIMELINE_CATEGORY_WORKERS = int(os.environ.get('TIMELINE_CATEGORY_WORKERS', 0))
+    TIMELINE_CATEGORY_POOL = os.environ.get('TIMELINE_CATEGORY_POOL', 'process')
+    
+    # Admission control for timeline renders: concurrent renders, renders
+    # waiting for a slot (more are answered 503), the longest wait (seconds)
+    # and the Retry-After sent when shedding
+    RENDER_MAX_ACTIVE = int(os.environ.get('RENDER_MAX_ACTIVE', 4))
+    RENDER_QUEUE_SIZE = int(os.environ.get('RENDER_QUEUE_SIZE', 16))
+    RENDER_QUEUE_TIMEOUT = float(os.environ.get('RENDER_QUEUE_TIMEOUT', 30))
+    RENDER_RETRY_AFTER = int(os.environ.get('RENDER_RETRY_AFTER', 2))
+    
+    # Background cache warmer (started by run.py): renders these viewports
+    # ('start:end,...', frontend default options) plus the TOP_N most requested
+    # recent ones (out of the last LOG_SIZE requests) at startup and after every
+    # data change, checking the data generation every INTERVAL seconds. Off by
+    # default: every server process warms its own caches, so each gunicorn
+    # worker would render all the viewports at boot
+    CACHE_WARMER_ENABLED = os.environ.get('CACHE_WARMER_ENABLED', 'false').lower() != 'false'
+    CACHE_WARM_VIEWPORTS = os.environ.get(
+        'CACHE_WARM_VIEWPORTS', f'0:2025,{DEFAULT_START_YEAR}:{DEFAULT_END_YEAR},-10000:2025,1500:2025')
+    CACHE_WARM_TOP_N = int(os.environ.get('CACHE_WARM_TOP_N', 5))
+    CACHE_WARM_LOG_SIZE = int(os.environ.get('CACHE_WARM_LOG_SIZE', 1000))
+    CACHE_WARM_INTERVAL = float(os.environ.get('CACHE_WARM_INTERVAL', 10))
+    
+    # Log each timed request's stage timings (also sent as Server-Timing headers)
+    # as a JSON line on stderr
+    TIMING_LOG = os.environ.get('TIMING_LOG', 'true').lower() != 'false'
+    
+    # /metrics: with several server processes (gunicorn workers), set METRICS_DIR
+    # to a directory (emptied before each start) where every process writes its
+    # totals at most every METRICS_FLUSH_INTERVAL seconds; scrapes add them up
+    METRICS_DIR = os.environ.get('METRICS_DIR') or None
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+    
+    # Rows per insert batch (and commit) when importing CSV data
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 5000))
+    
+    # Rows fetched and written at a time by exports (one Parquet row group each)
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 10000))
+    
+    # Page size of the event management list (GET /api/events), default and maximum
+    EVENTS_PAGE_SIZE = int(os.environ.get('EVENTS_PAGE_SIZE', 100))
+    EVENTS_PAGE_MAX_SIZE = int(os.environ.get('EVENTS_PAGE_MAX_SIZE', 1000))
+    
+    # Maximum events per /api/events/batch request
+    EVENT_BATCH_MAX_SIZE = int(os.environ.get('EVENT_BATCH_MAX_SIZE', 1000))
+    
+    # Background CSV imports: rows read from the file at a time, and how long a
+    # running job may go without progress before it counts as interrupted
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 50000))
+    IMPORT_JOB_STALE_SECONDS = int(os.environ.get('IMPORT_JOB_STALE_SECONDS', 300))
+    
     # Category order for timeline
     CATEGORY_ORDER = ["era", "migration", "civilization", "empire", "war", "religion", "biblical"]
 
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Migration script to add indexes to the timeline_events table
+This script safely creates the indexes declared on TimelineEvent if they don't
+exist, and prints the query plans of typical queries before and after
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models import db, TimelineEvent
+from sqlalchemy import text, inspect
+
+# Typical queries whose plans should change once the indexes exist
+SAMPLE_QUERIES = [
+    (
+        'Time window (/api/events)',
+        "SELECT id FROM timeline_events WHERE end_year >= :start_year AND start_year <= :end_year",
+        {'start_year': 1000, 'end_year': 1100},
+    ),
+    (
+        'Category',
+        "SELECT id FROM timeline_events WHERE category = :category",
+        {'category': 'war'},
+    ),
+    (
+        'Location box',
+        "SELECT id FROM timeline_events WHERE lat BETWEEN :min_lat AND :max_lat AND lon BETWEEN :min_lon AND :max_lon",
+        {'min_lat': 30.0, 'max_lat': 45.0, 'min_lon': 10.0, 'max_lon': 30.0},
+    ),
+    (
+        'Next page (/api/events keyset)',
+        "SELECT id FROM timeline_events WHERE start_year >= :after_year "
+        "AND (start_year > :after_year OR id > :after_id) ORDER BY start_year, id LIMIT 101",
+        {'after_year': 1000, 'after_id': 'example-id'},
+    ),
+    (
+        'Point lookup (import/add)',
+        "SELECT id FROM timeline_events WHERE id = :id",
+        {'id': 'example-id'},
+    ),
+]
+
+def query_plans(connection):
+    """Return {query name: plan text} for SAMPLE_QUERIES"""
+    dialect = connection.dialect.name
+    plans = {}
+    for name, sql, params in SAMPLE_QUERIES:
+        if dialect == 'sqlite':
+            rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+            plans[name] = '; '.join(row[-1] for row in rows)
+        else:
+            rows = connection.execute(text(f"EXPLAIN {sql}"), params).all()
+            plans[name] = '; '.join(row[0].strip() for row in rows)
+    return plans
+
+def migrate_add_indexes():
+    """Create the indexes declared on TimelineEvent if they don't exist"""
+    app = create_app()
+    with app.app_context():
+        engine = db.engine
+        dialect = engine.dialect.name
+        
+        print("Checking database indexes...")
+        with engine.connect() as connection:
+            plans_before = query_plans(connection)
+        
+        existing = {index['name'] for index in inspect(engine).get_indexes('timeline_events')}
+        created = []
+        
+        # PostgreSQL builds indexes CONCURRENTLY so the table stays writable;
+        # that cannot run inside a transaction, hence AUTOCOMMIT
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            for index in TimelineEvent.__table__.indexes:
+                if index.name in existing:
+                    print(f"  ✓ '{index.name}' already exists")
+                    continue
+                columns = ', '.join(column.name for column in index.columns)
+                print(f"Creating '{index.name}' on ({columns})...")
+                if dialect == 'postgresql':
+                    connection.execute(text(
+                        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON timeline_events ({columns})"
+                    ))
+                else:
+                    connection.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS {index.name} ON timeline_events ({columns})"
+                    ))
+                created.append(index.name)
+                print(f"  ✓ Created '{index.name}'")
+            
+            if created:
+                # Refresh planner statistics so the new indexes get used
+                connection.execute(text("ANALYZE timeline_events"))
+        
+        with engine.connect() as connection:
+            plans_after = query_plans(connection)
+        
+        print("\nQuery plans:")
+        for name, _, _ in SAMPLE_QUERIES:
+            before, after = plans_before[name], plans_after[name]
+            status = 'changed' if before != after else 'unchanged'
+            print(f"  {name} ({status})")
+            print(f"    before: {before}")
+            if before != after:
+                print(f"    after:  {after}")
+        
+        print("\nMigration complete!")
+
+if __name__ == '__main__':
+    migrate_add_indexes()
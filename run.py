@@ -9,12 +9,20 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config import Config
 from app import create_app
+from app.cache_warmer import start_cache_warmer
 
 app = create_app()
+debug = os.environ.get('FLASK_ENV') != 'production'
+
+# Render common viewports in the background (once per server process). In debug
+# mode the reloader runs this file twice: in a watcher process, and in the child
+# that serves requests (WERKZEUG_RUN_MAIN=true); only the child warms.
+reloader_watcher = __name__ == '__main__' and debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+if not reloader_watcher:
+    start_cache_warmer(app)
 
 if __name__ == '__main__':
     port = Config.PORT
-    debug = os.environ.get('FLASK_ENV') != 'production'
     print(f"Starting Chronoverse on http://localhost:{port}")
     print(f"Press Ctrl+C to stop the server")
     app.run(debug=debug, host='0.0.0.0', port=port)
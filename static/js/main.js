@@ -36,6 +36,14 @@ let clusterInfo = {};  // Store cluster info from API response
 // Span rendering state
 let spansEnabled = false;  // Whether to render events with duration as spans (default: off)
 
+// Timeline requests: the server lets a newer request from this page replace a
+// queued older one (X-Client-Id), and sheds load with 503 + Retry-After
+const TIMELINE_CLIENT_ID = (window.crypto && crypto.randomUUID)
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+const TIMELINE_MAX_RETRIES = 3;
+let timelineRequest = null;  // AbortController of the timeline request in flight
+
 // Map selection functions
 function toggleMapSelectionMode() {
     window.appState.mapSelectionMode = !window.appState.mapSelectionMode;
@@ -204,6 +212,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const importCsvClearBtn = document.getElementById('import-csv-clear-btn');
     if (importCsvBtn) importCsvBtn.addEventListener('click', () => importCsv(false));
     if (importCsvClearBtn) importCsvClearBtn.addEventListener('click', () => importCsv(true));
+    const importCsvSyncBtn = document.getElementById('import-csv-sync-btn');
+    if (importCsvSyncBtn) importCsvSyncBtn.addEventListener('click', () => importCsv(false, 'sync'));
     
     // Form submission
     if (addEventForm) addEventForm.addEventListener('submit', handleAddEvent);
@@ -235,7 +245,7 @@ document.addEventListener('DOMContentLoaded', () => {
             
             searchTimeout = setTimeout(() => {
                 searchEvents(query);
-            }, 300); // Debounce search
+            }, 100); // Debounce search (served from the in-memory typeahead index)
         });
         
         eventSearchInput.addEventListener('keydown', (e) => {
@@ -319,7 +329,42 @@ function toggleSpans() {
     loadTimeline(currentStart, currentEnd);
 }
 
+// Fetch the timeline figure, retrying after Retry-After when the server is overloaded.
+// Returns null if a newer loadTimeline() call replaced this one.
+async function fetchTimeline(url, controller) {
+    for (let attempt = 0; ; attempt++) {
+        let response;
+        try {
+            response = await fetch(url, {
+                headers: { 'X-Client-Id': TIMELINE_CLIENT_ID },
+                signal: controller.signal
+            });
+        } catch (error) {
+            if (error.name === 'AbortError') return null;
+            throw error;
+        }
+        if (response.status === 409) {
+            // Superseded by our own newer request
+            return null;
+        }
+        if (response.status === 503 && attempt < TIMELINE_MAX_RETRIES) {
+            const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 2;
+            await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+            if (controller.signal.aborted) return null;
+            continue;
+        }
+        return response;
+    }
+}
+
 async function loadTimeline(startYear, endYear) {
+    // A newer viewport replaces the one still loading
+    if (timelineRequest) {
+        timelineRequest.abort();
+    }
+    const controller = new AbortController();
+    timelineRequest = controller;
+    
     hideError();
     showLoading();
     
@@ -342,9 +387,22 @@ async function loadTimeline(startYear, endYear) {
             if (window.appState.mapFilter.radius) {
                 url += `&filter_radius=${window.appState.mapFilter.radius}`;
             }
+        } else if (window.appState.mapFilter && window.appState.mapFilter.type === 'region') {
+            // Region filter: GeoJSON polygon, or bbox [minLon, minLat, maxLon, maxLat]
+            if (window.appState.mapFilter.geometry) {
+                const geometry = typeof window.appState.mapFilter.geometry === 'string'
+                    ? window.appState.mapFilter.geometry
+                    : JSON.stringify(window.appState.mapFilter.geometry);
+                url += `&filter_polygon=${encodeURIComponent(geometry)}`;
+            } else if (window.appState.mapFilter.bbox) {
+                url += `&filter_bbox=${window.appState.mapFilter.bbox.join(',')}`;
+            }
         }
         
-        const response = await fetch(url);
+        const response = await fetchTimeline(url, controller);
+        if (response === null) {
+            return;  // The newer request shows its own result
+        }
         
         if (!response.ok) {
             const error = await response.json();
@@ -353,6 +411,9 @@ async function loadTimeline(startYear, endYear) {
         }
         
         const figureData = await response.json();
+        if (controller.signal.aborted) {
+            return;
+        }
         console.log('Received figure data:', {
             dataLength: figureData.data?.length || 0,
             layout: figureData.layout?.title?.text || 'No title',
@@ -412,6 +473,9 @@ async function loadTimeline(startYear, endYear) {
         // Wire up Plotly events for Observatory Mode
         wireUpPlotlyEvents();
         
+        // Show where the events in this time window are on the mini map
+        loadGeoClusters(startYear, endYear);
+        
         // Set initial backdrop based on current year range
         const midYear = (startYear + endYear) / 2;
         if (typeof setBackdropForYear === 'function') {
@@ -428,6 +492,9 @@ async function loadTimeline(startYear, endYear) {
         }
         
     } catch (error) {
+        if (controller.signal.aborted) {
+            return;  // Replaced by a newer request
+        }
         console.error('Error loading timeline:', error);
         showError(`Error: ${error.message}`);
         hideLoading();
@@ -560,18 +627,66 @@ async function handleAddEvent(e) {
 }
 
 // Load events list for management
-async function loadEventsList() {
+// The list is paged with the server's keyset cursor; "Load more" fetches the next page
+const EVENTS_PAGE_SIZE = 100;
+let eventsListCursor = null;
+let eventsListLoaded = 0;
+let eventsListTotal = null;
+
+function renderEventCard(event) {
+    return `
+            <div class="event-card">
+                <div class="event-info">
+                    <div class="event-title">${escapeHtml(event.title || 'Untitled')}</div>
+                    <div class="event-details">
+                        <span class="event-category-chip">${escapeHtml(event.category || 'N/A')}</span>
+                        <span class="event-time-chip">${formatYear(event.start_year)} - ${formatYear(event.end_year || event.start_year)}</span>
+                        ${event.continent && event.continent !== 'Global' ? `<span style="opacity: 0.7;">${escapeHtml(event.continent)}</span>` : ''}
+                    </div>
+                    ${event.description ? `<div class="event-description">${escapeHtml(event.description)}</div>` : ''}
+                </div>
+                <button class="btn-delete" onclick="deleteEvent('${event.id}')">Delete</button>
+            </div>
+        `;
+}
+
+function renderEventsListFooter() {
+    const footer = document.getElementById('events-list-footer');
+    if (!footer) return;
+    const total = eventsListTotal !== null ? ` of about ${eventsListTotal}` : '';
+    footer.innerHTML = `
+        <p style="opacity: 0.7; margin: 10px 0;">Showing ${eventsListLoaded}${total} events</p>
+        ${eventsListCursor ? '<button class="btn-secondary" id="events-load-more-btn" onclick="loadEventsList(true)">Load more</button>' : ''}
+    `;
+}
+
+async function loadEventsList(append = false) {
     try {
-        eventsListContainer.innerHTML = '<div class="loading">Loading events...</div>';
+        const loadMoreBtn = document.getElementById('events-load-more-btn');
+        if (append && loadMoreBtn) {
+            loadMoreBtn.disabled = true;
+            loadMoreBtn.textContent = 'Loading...';
+        } else {
+            append = false;
+            eventsListContainer.innerHTML = '<div class="loading">Loading events...</div>';
+        }
         
         const currentStart = parseInt(startYearInput.value);
         const currentEnd = parseInt(endYearInput.value);
+        const params = new URLSearchParams({
+            start_year: currentStart,
+            end_year: currentEnd,
+            limit: EVENTS_PAGE_SIZE
+        });
+        if (append && eventsListCursor) {
+            params.set('cursor', eventsListCursor);
+        }
         
         // Add timeout to prevent hanging
         const controller = new AbortController();
         const timeoutId = setTimeout(() => controller.abort(), 10000); // 10 second timeout
         
-        const response = await fetch(`/api/events?start_year=${currentStart}&end_year=${currentEnd}`, {
+        const response = await fetch(`/api/events?${params}`, {
             signal: controller.signal
         });
         
@@ -584,28 +699,25 @@ async function loadEventsList() {
         
         const result = await response.json();
         
-        if (result.count === 0) {
+        if (!append && result.count === 0) {
             eventsListContainer.innerHTML = '<div class="empty-state">No events found in the current time range.</div>';
             return;
         }
         
         // Render events list
-        const eventsHtml = result.data.map(event => `
-            <div class="event-card">
-                <div class="event-info">
-                    <div class="event-title">${escapeHtml(event.title || 'Untitled')}</div>
-                    <div class="event-details">
-                        <span class="event-category-chip">${escapeHtml(event.category || 'N/A')}</span>
-                        <span class="event-time-chip">${formatYear(event.start_year)} - ${formatYear(event.end_year || event.start_year)}</span>
-                        ${event.continent && event.continent !== 'Global' ? `<span style="opacity: 0.7;">${escapeHtml(event.continent)}</span>` : ''}
-                    </div>
-                    ${event.description ? `<div class="event-description">${escapeHtml(event.description)}</div>` : ''}
-                </div>
-                <button class="btn-delete" onclick="deleteEvent('${event.id}')">Delete</button>
-            </div>
-        `).join('');
+        const eventsHtml = result.data.map(renderEventCard).join('');
         
-        eventsListContainer.innerHTML = `<div class="events-list">${eventsHtml}</div>`;
+        if (append) {
+            const list = eventsListContainer.querySelector('.events-list');
+            if (list) list.insertAdjacentHTML('beforeend', eventsHtml);
+            eventsListLoaded += result.count;
+        } else {
+            eventsListContainer.innerHTML = `<div class="events-list">${eventsHtml}</div><div id="events-list-footer"></div>`;
+            eventsListLoaded = result.count;
+            eventsListTotal = result.total_estimate !== undefined ? result.total_estimate : null;
+        }
+        eventsListCursor = result.next_cursor;
+        renderEventsListFooter();
         
     } catch (error) {
         console.error('Error loading events:', error);
@@ -695,16 +807,19 @@ window.deleteEvent = deleteEvent;
 let searchTimeout;
 let selectedSearchIndex = -1;
 let currentSearchResults = [];
+let searchRequestId = 0;
 
 async function searchEvents(query) {
+    const requestId = ++searchRequestId;
     try {
-        const response = await fetch(`/api/events/search?q=${encodeURIComponent(query)}&limit=10`);
+        const response = await fetch(`/api/events/typeahead?q=${encodeURIComponent(query)}&limit=10`);
         
         if (!response.ok) {
             throw new Error('Search failed');
         }
         
         const result = await response.json();
+        if (requestId !== searchRequestId) return;  // A newer keystroke superseded this request
         currentSearchResults = result.data || [];
         selectedSearchIndex = -1;
         
@@ -1109,16 +1224,92 @@ function populateEventDetails(eventData) {
     // Store selected event in app state
     window.appState.selectedEvent = event;
     
-    // Update Earth view - use event location if available, otherwise use continent
+    // Update Earth view - use event location if available, then geometry, otherwise continent
+    const geometryCenter = event.geometry ? compactGeometryCenter(event.geometry) : null;
     if (event.lat !== null && event.lat !== undefined && event.lon !== null && event.lon !== undefined) {
         // Center on event location
         centerGlobeOnLocation(event.lat, event.lon, event.location_label || event.continent || 'Global');
+    } else if (geometryCenter) {
+        // Center on the middle of the event's geometry
+        centerGlobeOnLocation(geometryCenter.lat, geometryCenter.lon, event.location_label || event.continent || 'Region');
     } else {
         // Fall back to continent
         updateEarthView(event.continent || 'Global');
     }
 }
 
+// Decode a polyline-encoded coordinate string into [lon, lat] pairs
+function decodePolyline(encoded, precision) {
+    const values = [];
+    let value = 0;
+    let shift = 0;
+    for (let i = 0; i < encoded.length; i++) {
+        const chunk = encoded.charCodeAt(i) - 63;
+        value |= (chunk & 0x1f) << shift;
+        shift += 5;
+        if (chunk < 0x20) {
+            values.push(value & 1 ? ~(value >> 1) : value >> 1);
+            value = 0;
+            shift = 0;
+        }
+    }
+    const factor = Math.pow(10, precision);
+    const coords = [];
+    let lon = 0;
+    let lat = 0;
+    for (let i = 0; i + 1 < values.length; i += 2) {
+        lon += values[i];
+        lat += values[i + 1];
+        coords.push([lon / factor, lat / factor]);
+    }
+    return coords;
+}
+
+// Decode a compact geometry (see /api/events/<id>/geometry) into GeoJSON
+function decodeCompactGeometry(compact) {
+    const geometry = typeof compact === 'string' ? JSON.parse(compact) : compact;
+    if (!geometry || geometry.encoding !== 'polyline') {
+        return geometry;  // Already plain GeoJSON
+    }
+    if (geometry.type === 'GeometryCollection') {
+        return { type: 'GeometryCollection', geometries: geometry.geometries.map(decodeCompactGeometry) };
+    }
+    const decode = (value) => Array.isArray(value)
+        ? value.map(decode)
+        : decodePolyline(value, geometry.precision);
+    let coordinates = decode(geometry.coordinates);
+    if (geometry.type === 'Point') {
+        coordinates = coordinates[0];
+    }
+    return { type: geometry.type, coordinates };
+}
+
+// Center of a compact geometry's bounding box, or null if it cannot be decoded
+function compactGeometryCenter(compact) {
+    let geometry;
+    try {
+        geometry = decodeCompactGeometry(compact);
+    } catch (e) {
+        return null;
+    }
+    let minLon = Infinity, maxLon = -Infinity, minLat = Infinity, maxLat = -Infinity;
+    const visit = (value) => {
+        if (!Array.isArray(value)) return;
+        if (typeof value[0] === 'number') {
+            minLon = Math.min(minLon, value[0]);
+            maxLon = Math.max(maxLon, value[0]);
+            minLat = Math.min(minLat, value[1]);
+            maxLat = Math.max(maxLat, value[1]);
+        } else {
+            value.forEach(visit);
+        }
+    };
+    const geometries = geometry && geometry.type === 'GeometryCollection' ? geometry.geometries : [geometry];
+    geometries.forEach(g => g && visit(g.coordinates));
+    if (!isFinite(minLon)) return null;
+    return { lat: (minLat + maxLat) / 2, lon: (minLon + maxLon) / 2 };
+}
+
 // Center globe on specific location (lat/lon)
 function centerGlobeOnLocation(lat, lon, label) {
     const earthContainer = document.getElementById('earth-container');
@@ -1173,10 +1364,68 @@ function normalizeContinentName(continent) {
 // App state for two-way linking
 window.appState = {
     selectedEvent: null,
-    mapFilter: null, // { type: 'point'|'region', lat, lon, radius?, geometry? }
+    mapFilter: null, // { type: 'point'|'region', lat, lon, radius?, geometry?, bbox? }
     mapSelectionMode: false
 };
 
+// Zoom level for /api/geo-clusters (0 = a few world-sized cells, higher = finer grid)
+const GEO_CLUSTER_ZOOM = 2;
+
+// Load grid-clustered counts of located events in the time window
+async function loadGeoClusters(startYear, endYear) {
+    const container = document.getElementById('geo-clusters-container');
+    if (!container) return;
+    
+    try {
+        const response = await fetch(`/api/geo-clusters?start_year=${startYear}&end_year=${endYear}&zoom=${GEO_CLUSTER_ZOOM}`);
+        if (!response.ok) {
+            throw new Error('Failed to load geo clusters');
+        }
+        const data = await response.json();
+        renderGeoClusters(container, data);
+    } catch (error) {
+        console.error('Error loading geo clusters:', error);
+        container.classList.add('hidden');
+    }
+}
+
+// Draw clusters on an equirectangular mini map; clicking a cluster filters the timeline to its cell
+function renderGeoClusters(container, data) {
+    if (!data.clusters || data.clusters.length === 0) {
+        container.innerHTML = '';
+        container.classList.add('hidden');
+        return;
+    }
+    
+    const maxCount = data.clusters[0].count; // Sorted by count, largest first
+    const dots = data.clusters.map(cluster => {
+        const x = cluster.lon + 180;
+        const y = 90 - cluster.lat;
+        const r = Math.max(1.5, 8 * Math.sqrt(cluster.count / maxCount));
+        return `<circle class="geo-cluster-dot" cx="${x.toFixed(2)}" cy="${y.toFixed(2)}" r="${r.toFixed(2)}" data-bounds="${cluster.bounds.join(',')}">
+                    <title>${cluster.count.toLocaleString()} event${cluster.count === 1 ? '' : 's'}</title>
+                </circle>`;
+    }).join('');
+    
+    container.innerHTML = `
+        <div class="geo-clusters-header">${data.total.toLocaleString()} located events in this time range</div>
+        <svg class="geo-clusters-svg" viewBox="0 0 360 180" preserveAspectRatio="xMidYMid meet">
+            <rect class="geo-clusters-bg" x="0" y="0" width="360" height="180"></rect>
+            ${dots}
+        </svg>
+    `;
+    container.classList.remove('hidden');
+    
+    container.querySelectorAll('.geo-cluster-dot').forEach(dot => {
+        dot.addEventListener('click', () => {
+            const bbox = dot.dataset.bounds.split(',').map(parseFloat);
+            window.appState.mapFilter = { type: 'region', bbox: bbox };
+            loadTimeline(parseInt(startYearInput.value), parseInt(endYearInput.value));
+            centerGlobeOnLocation((bbox[1] + bbox[3]) / 2, (bbox[0] + bbox[2]) / 2, 'Selected region');
+        });
+    });
+}
+
 // Create a simple globe visualization (no heavy dependencies)
 function createGlobeVisualization(container, continent, coords, isSpecificLocation = false) {
     // Clear container
@@ -1581,13 +1830,23 @@ function enableFluidScrolling(graphDiv) {
 }
 
 // Import CSV functionality
-async function checkImportStatus() {
+// Imports run as background jobs on the server; the modal polls their progress
+const IMPORT_POLL_INTERVAL = 1000;
+const ACTIVE_IMPORT_STATUSES = ['queued', 'running', 'cancelling'];
+let importJobId = null;
+let importPollTimer = null;
+
+async function checkImportStatus(jobId = importJobId) {
     try {
         if (!importStatusContainer) return;
         
-        importStatusContainer.innerHTML = '<div class="loading">Checking status...</div>';
+        clearTimeout(importPollTimer);
+        if (!importStatusContainer.dataset.loaded) {
+            importStatusContainer.innerHTML = '<div class="loading">Checking status...</div>';
+        }
         
-        const response = await fetch('/api/import-status');
+        const url = jobId ? `/api/import-status?job_id=${encodeURIComponent(jobId)}` : '/api/import-status';
+        const response = await fetch(url);
         const result = await response.json();
         
         if (result.error) {
@@ -1610,6 +1869,21 @@ async function checkImportStatus() {
         }
         
         importStatusContainer.innerHTML = statusHtml;
+        importStatusContainer.dataset.loaded = 'true';
+        
+        const job = result.job;
+        if (!job) return;
+        const wasTracking = importJobId === job.job_id;
+        renderImportJob(job);
+        
+        if (ACTIVE_IMPORT_STATUSES.includes(job.status)) {
+            importJobId = job.job_id;
+            importPollTimer = setTimeout(() => checkImportStatus(job.job_id), IMPORT_POLL_INTERVAL);
+        } else if (wasTracking) {
+            // The job we were following just finished
+            importJobId = null;
+            await refreshAfterImport();
+        }
         
     } catch (error) {
         console.error('Error checking import status:', error);
@@ -1619,58 +1893,134 @@ async function checkImportStatus() {
     }
 }
 
-async function importCsv(clearExisting = false) {
+function renderImportJob(job) {
+    if (!importResultDiv) return;
+    
+    const active = ACTIVE_IMPORT_STATUSES.includes(job.status);
+    const resumable = ['cancelled', 'failed', 'interrupted'].includes(job.status);
+    const percent = job.total_rows ? Math.min(100, Math.round(100 * job.rows_read / job.total_rows)) : 0;
+    const titles = {
+        queued: 'Import queued...',
+        running: `Importing CSV data... ${percent}%`,
+        cancelling: 'Cancelling import...',
+        cancelled: 'Import cancelled',
+        interrupted: 'Import interrupted',
+        failed: 'Import failed',
+        completed: '✓ Import Complete!'
+    };
+    const ok = active || job.status === 'completed';
+    
+    let resultHtml = `
+        <div style="padding: 15px; background: ${ok ? 'rgba(40, 167, 69, 0.2)' : 'rgba(255, 193, 7, 0.15)'}; border: 1px solid ${ok ? 'rgba(40, 167, 69, 0.5)' : 'rgba(255, 193, 7, 0.5)'}; border-radius: 8px; color: ${ok ? '#6cff87' : '#ffd700'};">
+            <strong>${titles[job.status] || job.status}</strong><br>
+            Rows read: <strong>${job.rows_read}</strong>${job.total_rows ? ` of ~${job.total_rows}` : ''}<br>
+            Imported: <strong>${job.imported}</strong> events<br>
+    `;
+    if (job.mode === 'sync') {
+        resultHtml += `
+            Updated: <strong>${job.updated}</strong> events<br>
+            Deleted: <strong>${job.deleted}</strong> events<br>
+            Unchanged: ${job.unchanged} events<br>
+        `;
+    }
+    resultHtml += `
+            Skipped: ${job.skipped} events
+    `;
+    
+    if (active) {
+        resultHtml += `
+            <div style="margin-top: 10px; height: 6px; background: rgba(255,255,255,0.15); border-radius: 3px;">
+                <div style="width: ${percent}%; height: 100%; background: #6cff87; border-radius: 3px;"></div>
+            </div>
+        `;
+    }
+    
+    if (job.status === 'failed' && job.message) {
+        resultHtml += `<br>Error: ${escapeHtml(job.message)}`;
+    }
+    
+    if (job.total_errors > 0) {
+        resultHtml += `<br>Errors: ${job.total_errors}`;
+        if (job.errors && job.errors.length > 0) {
+            resultHtml += '<ul style="margin-top: 10px; font-size: 0.9em;">';
+            job.errors.forEach(err => {
+                resultHtml += `<li>${escapeHtml(err)}</li>`;
+            });
+            resultHtml += '</ul>';
+        }
+    }
+    
+    if (job.status === 'running' || job.status === 'queued') {
+        resultHtml += '<div style="margin-top: 10px;"><button type="button" class="btn-secondary" id="import-job-cancel-btn">Stop Import</button></div>';
+    } else if (resumable) {
+        resultHtml += '<div style="margin-top: 10px;"><button type="button" class="btn-primary" id="import-job-resume-btn">Resume Import</button></div>';
+    }
+    
+    resultHtml += '</div>';
+    
+    importResultDiv.innerHTML = resultHtml;
+    
+    const cancelBtn = document.getElementById('import-job-cancel-btn');
+    if (cancelBtn) cancelBtn.addEventListener('click', () => importJobAction(job.job_id, 'cancel'));
+    const resumeBtn = document.getElementById('import-job-resume-btn');
+    if (resumeBtn) resumeBtn.addEventListener('click', () => importJobAction(job.job_id, 'resume'));
+}
+
+async function importJobAction(jobId, action) {
     try {
-        if (!importResultDiv) return;
-        
-        importResultDiv.innerHTML = '<div class="loading">Importing CSV data...</div>';
-        
-        const url = clearExisting ? '/api/import-csv?clear=true' : '/api/import-csv';
-        const response = await fetch(url, {
+        const response = await fetch(`/api/import-jobs/${encodeURIComponent(jobId)}/${action}`, {
             method: 'POST'
         });
-        
         const result = await response.json();
         
         if (!response.ok) {
-            throw new Error(result.error || 'Import failed');
+            throw new Error(result.error || `Could not ${action} import`);
         }
         
-        let resultHtml = `
-            <div style="padding: 15px; background: rgba(40, 167, 69, 0.2); border: 1px solid rgba(40, 167, 69, 0.5); border-radius: 8px; color: #6cff87;">
-                <strong>✓ Import Complete!</strong><br>
-                Imported: <strong>${result.imported}</strong> events<br>
-                Skipped: ${result.skipped} events
-        `;
+        importJobId = jobId;
+        await checkImportStatus(jobId);
         
-        if (result.total_errors > 0) {
-            resultHtml += `<br>Errors: ${result.total_errors}`;
-            if (result.errors && result.errors.length > 0) {
-                resultHtml += '<ul style="margin-top: 10px; font-size: 0.9em;">';
-                result.errors.forEach(err => {
-                    resultHtml += `<li>${escapeHtml(err)}</li>`;
-                });
-                resultHtml += '</ul>';
-            }
+    } catch (error) {
+        console.error(`Error trying to ${action} import:`, error);
+        if (importResultDiv) {
+            importResultDiv.innerHTML = `<div class="error">Error: ${error.message}</div>`;
         }
+    }
+}
+
+async function importCsv(clearExisting = false, mode = 'append') {
+    try {
+        if (!importResultDiv) return;
         
-        resultHtml += '</div>';
+        importResultDiv.innerHTML = '<div class="loading">Starting import...</div>';
         
-        importResultDiv.innerHTML = resultHtml;
+        let url = '/api/import-csv';
+        if (mode === 'sync') {
+            url += '?mode=sync';
+        } else if (clearExisting) {
+            url += '?clear=true';
+        }
+        const response = await fetch(url, {
+            method: 'POST'
+        });
         
-        // Refresh status and events list
-        await checkImportStatus();
+        const result = await response.json();
         
-        // Reload timeline
-        const currentStart = parseInt(startYearInput.value);
-        const currentEnd = parseInt(endYearInput.value);
-        await loadTimeline(currentStart, currentEnd);
+        if (response.status === 409 && result.job) {
+            // An import is already running: follow it instead
+            importJobId = result.job.job_id;
+            await checkImportStatus(importJobId);
+            return;
+        }
         
-        // If manage events modal is open, refresh it
-        if (manageEventsModal && !manageEventsModal.classList.contains('hidden')) {
-            await loadEventsList();
+        if (!response.ok) {
+            throw new Error(result.error || 'Import failed');
         }
         
+        importJobId = result.job_id;
+        renderImportJob(result.job);
+        await checkImportStatus(importJobId);
+        
     } catch (error) {
         console.error('Error importing CSV:', error);
         if (importResultDiv) {
@@ -1679,3 +2029,15 @@ async function importCsv(clearExisting = false) {
     }
 }
 
+async function refreshAfterImport() {
+    // Reload timeline
+    const currentStart = parseInt(startYearInput.value);
+    const currentEnd = parseInt(endYearInput.value);
+    await loadTimeline(currentStart, currentEnd);
+    
+    // If manage events modal is open, refresh it
+    if (manageEventsModal && !manageEventsModal.classList.contains('hidden')) {
+        await loadEventsList();
+    }
+}
+
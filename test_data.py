@@ -16,7 +16,7 @@ print()
 
 # Load data
 try:
-    timeline_gen = TimelineGenerator(Config.TIMELINE_DATA_FILE)
+    timeline_gen = TimelineGenerator()  # No database session: loads Config.TIMELINE_DATA_FILE
     print(f"✓ Successfully loaded {len(timeline_gen.df)} rows")
     print(f"✓ Columns: {list(timeline_gen.df.columns)}")
     print()